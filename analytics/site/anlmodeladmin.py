@@ -90,13 +90,13 @@ class AnlModelAdmin(crmmodeladmin.CrmModelAdmin):
     def add_chart_data(response: TemplateResponse, title: str, param, max_value) -> None:
         aa = {
             'title': title,
-            'data': ({
+            'data': [{
                 'period': x['period'],
                 'total': round(x['total']) or 0,
                 'pct':
                     (int(round((x['total'] or 0)) / max_value * 100)) or 2
                     if max_value else 2,
-            } for x in param)
+            } for x in param]
         }
         response.context_data['charts'].append(aa)
 
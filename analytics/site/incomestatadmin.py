@@ -31,6 +31,7 @@ from analytics.utils.helpers import get_current_currency_amount
 from analytics.utils.helpers import get_income_over_time
 from analytics.utils.helpers import get_currency_info
 from analytics.utils.helpers import GroupConcat
+from analytics.utils.income_snapshot import add_snapshot
 from common.utils.helpers import get_today
 from common.utils.helpers import LEADERS
 from crm.models import Output
@@ -76,16 +77,11 @@ class IncomeStatAdmin(AnlModelAdmin):
         extra_context['today'] = get_today()
         extra_context['username'] = username
         extra_context['next'] = request.build_absolute_uri()
-        snapshot = super().changelist_view(
-            request, extra_context=extra_context,
-        )
-        if hasattr(snapshot, 'render'):
-            snapshot = snapshot.render()
-            snapshot = snapshot.content.decode()
-            extra_context['snapshot'] = snapshot
-        return super().changelist_view(
+        response = super().changelist_view(
             request, extra_context=extra_context,
         )
+        add_snapshot(response)
+        return response
 
     def get_urls(self):
         urls = [
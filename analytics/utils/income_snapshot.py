@@ -0,0 +1,70 @@
+from importlib import import_module
+from django.conf import settings
+from django.contrib.messages.storage import default_storage
+from django.http import HttpRequest
+from django.http import QueryDict
+from django.template.response import TemplateResponse
+from django.urls import resolve
+from django.urls import reverse
+from django.utils.translation import override
+
+from analytics.models import IncomeStat
+from analytics.models import IncomeStatSnapshot
+from common.utils.user_context import get_group_data
+from common.utils.usermiddleware import set_user_department
+from common.utils.usermiddleware import set_user_roles
+
+
+def add_snapshot(response: TemplateResponse) -> None:
+    """Renders the computed Income Summary page into the 'snapshot'
+    context variable, so the same context serves both the page
+    and the snapshot that can be saved from it."""
+    if getattr(response, 'context_data', None) is not None:
+        response.context_data['snapshot'] = response.rendered_content
+
+
+def create_snapshot(user, department_id: int) -> IncomeStatSnapshot:
+    """Computes the Income Summary page of the department
+    and saves it as a snapshot."""
+    from crm.site.crmadminsite import crm_site
+
+    model_admin = crm_site._registry[IncomeStat]  # NOQA
+    with override(settings.LANGUAGE_CODE):
+        request = get_snapshot_request(user, department_id)
+        response = model_admin.changelist_view(request)
+        webpage = response.context_data['snapshot']
+    return IncomeStatSnapshot.objects.create(
+        department_id=department_id,
+        webpage=webpage,
+    )
+
+
+def get_snapshot_request(user, department_id: int) -> HttpRequest:
+    """Returns a GET request to the Income Summary page
+    on behalf of the user, prepared as the middleware does."""
+    path = reverse("site:analytics_incomestat_changelist")
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.GET = QueryDict(f'department={department_id}')
+    request.META.update({
+        'SERVER_NAME': get_snapshot_host(),
+        'SERVER_PORT': '80',
+        'SCRIPT_NAME': '',
+        'HTTP_ACCEPT_LANGUAGE': settings.LANGUAGE_CODE,
+    })
+    request.resolver_match = resolve(path)
+    request.session = import_module(settings.SESSION_ENGINE).SessionStore()
+    request._messages = default_storage(request)
+    request.user = user
+    group_names, department_ids = get_group_data(user.groups.all())
+    set_user_roles(request, group_names, department_ids)
+    set_user_department(request, department_ids)
+    return request
+
+
+def get_snapshot_host() -> str:
+    for host in settings.ALLOWED_HOSTS:
+        if host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
@@ -1,21 +1,19 @@
 import calendar
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from tendo.singleton import SingleInstance
-from unittest import skip
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.mail import mail_admins
 from django.db import connection
-from django.test import Client
-from django.test import override_settings
-from django.test import TestCase
 from django.utils import timezone
-from django.urls import reverse
 
-from analytics.models import IncomeStatSnapshot
+from analytics.utils.income_snapshot import create_snapshot
 from common.utils.helpers import get_manager_departments
 
+SNAPSHOT_WORKERS = 4
+
 
 class MonthlySnapshotSaving(threading.Thread, SingleInstance):
     """Save Snapshot for all departments at the end of last day of every month"""
@@ -66,28 +64,30 @@ def get_time_to_next_monthly_snapshot_saving(now: timezone.datetime) -> int:
     return secs
 
 
-@skip("This is not a test")
-class SaveSnapshot(TestCase):
+class SaveSnapshot:
     """Save Snapshot for all departments"""
 
-    @override_settings(
-        SECURE_HSTS_SECONDS=0,
-        SECURE_SSL_REDIRECT=False,
-        SECURE_HSTS_PRELOAD=False
-    )
     def save_snapshots(self) -> None:
-        self.client = Client(SERVER_NAME='localhost')
         user = User.objects.filter(is_superuser=True).first()
-        self.client.force_login(user)
-        departments = get_manager_departments()
-        for dep in departments:
-            url = reverse("site:analytics_incomestat_changelist")
-            response = self.client.get(
-                url + f'?department={dep.id}',
-                HTTP_ACCEPT_LANGUAGE=settings.LANGUAGE_CODE
-            )
-            snapshot = IncomeStatSnapshot(
-                department_id=dep.id,
-                webpage=response.context_data['snapshot'],
-            )
-            snapshot.save()
+        department_ids = list(
+            get_manager_departments().values_list('id', flat=True)
+        )
+        if settings.TESTING:
+            # test transactions are not visible to other connections
+            for department_id in department_ids:
+                create_snapshot(user, department_id)
+            return
+        with ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS) as executor:
+            futures = [
+                executor.submit(self.save_snapshot, user, department_id)
+                for department_id in department_ids
+            ]
+        for future in futures:
+            future.result()     # re-raise worker exceptions
+
+    @staticmethod
+    def save_snapshot(user, department_id: int) -> None:
+        try:
+            create_snapshot(user, department_id)
+        finally:
+            connection.close()
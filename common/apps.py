@@ -13,10 +13,13 @@ class CommonConfig(AppConfig):
     def ready(self):
         # Implicitly connect a signal handler
         from common.signals.handlers import user_creation_handler   # NOQA
+        from common.utils.export_jobs import ExportJobRunner
         from common.utils.notif_email_sender import NotifEmailSender
 
         self.nes = NotifEmailSender()       # NOQA
         self.nes.start()
+        self.export_runner = ExportJobRunner()      # NOQA
+        self.export_runner.start()
         if not settings.TESTING:
             from common.utils.reminders_sender import RemindersSender
             try:
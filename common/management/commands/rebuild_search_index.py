@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from common.utils import search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search documents of the CRM objects"
+
+    def handle(self, *args, **options):
+        for model in search_index.indexed_models:
+            number = search_index.rebuild(model)
+            self.stdout.write(f"{model._meta.verbose_name_plural}: {number} indexed.")
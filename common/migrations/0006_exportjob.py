@@ -0,0 +1,37 @@
+# Generated by Django 6.0.9 on 2026-10-18 20:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0005_userprofile_avatar'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('R', 'Running'), ('D', 'Done'), ('F', 'Failed')], default='P', max_length=1, verbose_name='Status')),
+                ('total', models.PositiveIntegerField(default=0, help_text='Number of objects to export', verbose_name='Total')),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Number of exported objects', verbose_name='Processed')),
+                ('file_name', models.CharField(blank=True, default='', max_length=250, verbose_name='File name')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation date')),
+                ('completion_date', models.DateTimeField(blank=True, null=True, verbose_name='Completion date')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Objects type')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Owner')),
+            ],
+            options={
+                'verbose_name': 'Export job',
+                'verbose_name_plural': 'Export jobs',
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0.9 on 2026-10-18 20:27
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_messages(apps, schema_editor):
+    UserProfile = apps.get_model('common', 'UserProfile')
+    UserMessage = apps.get_model('common', 'UserMessage')
+    messages = []
+    for user_id, items in UserProfile.objects.values_list('user_id', 'messages'):
+        for text, level in zip(items[::2], items[1::2]):
+            messages.append(UserMessage(user_id=user_id, text=text, level=level))
+    UserMessage.objects.bulk_create(messages, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0006_exportjob'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserMessage',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.TextField()),
+                ('level', models.CharField(default='INFO', max_length=10)),
+                ('delivered', models.BooleanField(default=False)),
+                ('creation_date', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Creation date')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stored_messages', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User message',
+                'verbose_name_plural': 'User messages',
+                'indexes': [models.Index(fields=['user', 'delivered'], name='common_user_user_id_e5d10b_idx')],
+            },
+        ),
+        migrations.RunPython(copy_messages, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='userprofile',
+            name='messages',
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.9 on 2026-10-18 20:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The full-text index of the documents depends on the database engine.
+CREATE_INDEX_SQL = {
+    'postgresql': [
+        "CREATE INDEX common_searchdocument_fts ON common_searchdocument "
+        "USING gin (to_tsvector('simple', document))",
+    ],
+    'mysql': [
+        "CREATE FULLTEXT INDEX common_searchdocument_fts "
+        "ON common_searchdocument (document)",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE common_searchdocument_fts USING fts5("
+        "document, content='common_searchdocument', content_rowid='id')",
+        "CREATE TRIGGER common_searchdocument_ai AFTER INSERT ON common_searchdocument "
+        "BEGIN INSERT INTO common_searchdocument_fts(rowid, document) "
+        "VALUES (new.id, new.document); END",
+        "CREATE TRIGGER common_searchdocument_ad AFTER DELETE ON common_searchdocument "
+        "BEGIN INSERT INTO common_searchdocument_fts(common_searchdocument_fts, rowid, document) "
+        "VALUES ('delete', old.id, old.document); END",
+        "CREATE TRIGGER common_searchdocument_au AFTER UPDATE ON common_searchdocument "
+        "BEGIN INSERT INTO common_searchdocument_fts(common_searchdocument_fts, rowid, document) "
+        "VALUES ('delete', old.id, old.document); "
+        "INSERT INTO common_searchdocument_fts(rowid, document) "
+        "VALUES (new.id, new.document); END",
+    ],
+}
+DROP_INDEX_SQL = {
+    'postgresql': ["DROP INDEX common_searchdocument_fts"],
+    'mysql': ["DROP INDEX common_searchdocument_fts ON common_searchdocument"],
+    'sqlite': [
+        "DROP TRIGGER common_searchdocument_ai",
+        "DROP TRIGGER common_searchdocument_ad",
+        "DROP TRIGGER common_searchdocument_au",
+        "DROP TABLE common_searchdocument_fts",
+    ],
+}
+
+
+def create_index(apps, schema_editor):
+    for sql in CREATE_INDEX_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def drop_index(apps, schema_editor):
+    for sql in DROP_INDEX_SQL.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0007_usermessage'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchDocument',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('document', models.TextField(blank=True, default='')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Search document',
+                'verbose_name_plural': 'Search documents',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.9 on 2026-10-18 21:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_hot_lookup_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('content_type', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='contenttypes.contenttype')),
+                ('rebuild_date', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Search index state',
+                'verbose_name_plural': 'Search index states',
+            },
+        ),
+    ]
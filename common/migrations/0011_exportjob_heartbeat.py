@@ -0,0 +1,19 @@
+# Generated by Django 6.0.9 on 2026-10-18 21:46
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0010_searchindexstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exportjob',
+            name='heartbeat',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, help_text='Last time the runner confirmed it still has the job'),
+        ),
+    ]
@@ -141,6 +141,10 @@ class Reminder(models.Model):
     class Meta:
         verbose_name = _("Reminder")
         verbose_name_plural = _("Reminders")
+        indexes = [
+            # due reminders
+            models.Index(fields=['active', 'reminder_date']),
+        ]
 
     content_type = models.ForeignKey(
         ContentType,
@@ -241,6 +245,7 @@ class StageBase(Base2):
 
 
 def messages_default():
+    # used by migrations
     return []
 
 
@@ -310,10 +315,6 @@ class UserProfile(models.Model):
         default=False,
         verbose_name=_("Activate this time zone"),
     )
-    messages = models.JSONField(
-        default=messages_default,
-        help_text=_("Field for temporary storage of messages to the user")
-    )
     language_code = models.CharField(
         max_length=7, default='',
         null=False, blank=True,
@@ -358,3 +359,155 @@ class UserProfile(models.Model):
             self.language_code = settings.LANGUAGE_CODE
 
         super().save(*args, **kwargs)
+
+
+class ExportJob(models.Model):
+    """Export of objects to an Excel file run in the background."""
+
+    class Meta:
+        verbose_name = _("Export job")
+        verbose_name_plural = _("Export jobs")
+
+    PENDING = 'P'
+    RUNNING = 'R'
+    DONE = 'D'
+    FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (RUNNING, _('Running')),
+        (DONE, _('Done')),
+        (FAILED, _('Failed')),
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        verbose_name=_("Owner"),
+        related_name="export_jobs",
+    )
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name=_("Objects type"),
+    )
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=PENDING,
+        verbose_name=_("Status"),
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Total"),
+        help_text=_("Number of objects to export")
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Processed"),
+        help_text=_("Number of exported objects")
+    )
+    file_name = models.CharField(
+        max_length=250, blank=True, default='',
+        verbose_name=_("File name"),
+    )
+    error = models.TextField(
+        blank=True, default='',
+        verbose_name=_("Error"),
+    )
+    creation_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Creation date")
+    )
+    completion_date = models.DateTimeField(
+        blank=True, null=True,
+        verbose_name=_("Completion date")
+    )
+    heartbeat = models.DateTimeField(
+        default=timezone.now, editable=False,
+        help_text=_("Last time the runner confirmed it still has the job")
+    )
+
+    def __str__(self):
+        return f'{self.content_type.model} export #{self.id}'
+
+    def get_download_url(self):
+        return reverse('download_export', args=(self.id,))
+
+    def get_status_url(self):
+        return reverse('export_job_status', args=(self.id,))
+
+
+class UserMessage(models.Model):
+    """
+    Message to the user stored until it is shown.
+    Messages are only inserted and marked as delivered,
+    so concurrent senders do not overwrite each other.
+    """
+
+    class Meta:
+        verbose_name = _("User message")
+        verbose_name_plural = _("User messages")
+        indexes = [
+            # pending messages of the user
+            models.Index(fields=['user', 'delivered']),
+        ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="stored_messages",
+    )
+    text = models.TextField()
+    level = models.CharField(max_length=10, default='INFO')
+    delivered = models.BooleanField(default=False)
+    creation_date = models.DateTimeField(
+        default=timezone.now,
+        verbose_name=_("Creation date")
+    )
+
+    def __str__(self):
+        return f'{self.level}: {self.text}'
+
+
+class SearchDocument(models.Model):
+    """
+    Text of the search fields of an object indexed by the full-text
+    index of the database (see common.utils.search_index).
+    """
+
+    class Meta:
+        verbose_name = _("Search document")
+        verbose_name_plural = _("Search documents")
+        unique_together = (('content_type', 'object_id'),)
+
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    object_id = models.PositiveIntegerField()
+    document = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f'{self.content_type.model} #{self.object_id}'
+
+
+class SearchIndexState(models.Model):
+    """
+    Marks the models whose objects are all indexed. It is set only by
+    the rebuild of the index (see rebuild_search_index command), so the
+    objects saved before are not missed by the full-text search.
+    """
+
+    class Meta:
+        verbose_name = _("Search index state")
+        verbose_name_plural = _("Search index states")
+
+    content_type = models.OneToOneField(
+        ContentType,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    rebuild_date = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.content_type.model
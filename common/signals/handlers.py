@@ -1,9 +1,26 @@
 from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
 from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
 from django.dispatch import receiver
 
+from common.models import Department
 from common.models import UserProfile
 from common.utils.helpers import USER_MODEL
+from common.utils.menu_counters import menu_counters
+from common.utils.user_context import user_contexts
+from crm.models import CrmEmail
+from crm.models import Deal
+from crm.models import DealSummary
+from crm.models import Payment
+from crm.models import Request
+from crm.utils.deal_summary import update_counterparty_deals
+from crm.utils.deal_summary import update_paid_amounts
+from crm.utils.deal_summary import update_quality_scores
+from quality.models import TransactionQualityEvent
+from tasks.models import Memo
+from tasks.models import Task
 
 
 @receiver(post_save, sender=USER_MODEL)
@@ -12,3 +29,113 @@ def user_creation_handler(sender, instance, created, **kwargs):
         co_workers = Group.objects.get(name='co-workers')
         instance.groups.add(co_workers)
         UserProfile.objects.create(user=instance)
+
+
+@receiver(m2m_changed, sender=USER_MODEL.groups.through)
+def user_groups_changed_handler(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        if not reverse:
+            user_contexts.invalidate(instance.id)
+        elif pk_set:
+            for user_id in pk_set:
+                user_contexts.invalidate(user_id)
+        else:
+            user_contexts.invalidate()
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def user_profile_changed_handler(sender, instance, **kwargs):
+    user_contexts.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Department)
+@receiver(post_delete, sender=Department)
+def group_changed_handler(sender, instance, **kwargs):
+    user_contexts.invalidate()
+
+
+@receiver(post_save, sender=CrmEmail)
+@receiver(post_delete, sender=CrmEmail)
+def crm_email_changed_handler(sender, instance, **kwargs):
+    menu_counters.invalidate(instance.owner_id)
+
+
+@receiver(post_save, sender=Memo)
+@receiver(post_delete, sender=Memo)
+def memo_changed_handler(sender, instance, **kwargs):
+    menu_counters.invalidate(instance.to_id)
+
+
+@receiver(post_save, sender=Request)
+@receiver(post_delete, sender=Request)
+@receiver(post_save, sender=Task)
+@receiver(post_delete, sender=Task)
+@receiver(m2m_changed, sender=Task.responsible.through)
+def counted_objects_changed_handler(sender, **kwargs):
+    menu_counters.invalidate()
+
+
+@receiver(pre_save, sender=Deal)
+def deal_pre_save_handler(sender, instance, raw, update_fields, **kwargs):
+    if update_fields and not {'company', 'lead'} & set(update_fields):
+        instance._old_counterparty = (instance.company_id, instance.lead_id)
+    elif not raw and not instance._state.adding:
+        instance._old_counterparty = Deal.objects.filter(
+            id=instance.id
+        ).values_list('company_id', 'lead_id').first()
+
+
+@receiver(post_save, sender=Deal)
+def deal_post_save_handler(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        DealSummary.objects.create(deal=instance)
+    company_ids = {instance.company_id}
+    lead_ids = {instance.lead_id}
+    old_counterparty = getattr(instance, '_old_counterparty', None)
+    if old_counterparty:
+        if old_counterparty == (instance.company_id, instance.lead_id):
+            return
+        company_ids.add(old_counterparty[0])
+        lead_ids.add(old_counterparty[1])
+    update_counterparty_deals(company_ids, lead_ids)
+
+
+@receiver(post_delete, sender=Deal)
+def deal_deleted_handler(sender, instance, **kwargs):
+    update_counterparty_deals((instance.company_id,), (instance.lead_id,))
+
+
+@receiver(pre_save, sender=Payment)
+@receiver(pre_save, sender=TransactionQualityEvent)
+def deal_item_pre_save_handler(sender, instance, raw, update_fields, **kwargs):
+    if update_fields and 'deal' not in update_fields:
+        instance._old_deal_id = instance.deal_id
+    elif not raw and not instance._state.adding:
+        instance._old_deal_id = sender.objects.filter(
+            id=instance.id
+        ).values_list('deal_id', flat=True).first()
+
+
+def get_changed_deal_ids(instance) -> set:
+    """Returns the ids of the deal of the instance and
+    of the deal it was moved from."""
+    return {instance.deal_id, getattr(instance, '_old_deal_id', None)} - {None}
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_changed_handler(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        update_paid_amounts(get_changed_deal_ids(instance))
+
+
+@receiver(post_save, sender=TransactionQualityEvent)
+@receiver(post_delete, sender=TransactionQualityEvent)
+def quality_event_changed_handler(sender, instance, **kwargs):
+    if not kwargs.get('raw'):
+        update_quality_scores(get_changed_deal_ids(instance))
@@ -1,6 +1,7 @@
 import re
 from django.contrib import admin
 from django.contrib import messages
+from django.contrib.admin.views.main import ORDER_VAR
 from django.core.handlers.wsgi import WSGIRequest
 from django.utils.formats import date_format
 from django.utils.safestring import mark_safe
@@ -9,6 +10,7 @@ from django.urls import reverse
 
 from common.models import Reminder
 from common.views.export_objects import export_selected_objects
+from common.utils import search_index
 from common.utils.helpers import SAFE_SUBJECT_ICON, get_department_id
 from common.utils.helpers import SAFE_ATTACH_FILE_ICON
 from common.utils.helpers import OBJ_DOESNT_EXIT_STR
@@ -39,6 +41,13 @@ class BaseModelAdmin(admin.ModelAdmin):
     empty_value_display = ''
     show_facets = admin.ShowFacets.NEVER
     save_on_top = True
+    # search by the full-text index of the search_fields
+    full_text_search = False
+
+    def __init__(self, model, admin_site):
+        super().__init__(model, admin_site)
+        if self.full_text_search:
+            search_index.register(model, self.search_fields)
 
     # -- ModelAdmin methods -- #
 
@@ -83,6 +92,14 @@ class BaseModelAdmin(admin.ModelAdmin):
                 request,
                 _("Filters may affect search results.")
             )
+            if self.full_text_search and search_index.is_available(self.model, st):
+                queryset = search_index.search(queryset, st)
+                if ORDER_VAR not in request.GET:
+                    # the best matches first
+                    queryset = queryset.order_by(
+                        '-search_rank', *queryset.query.order_by
+                    )
+                return queryset, False
         return super().get_search_results(request, queryset, search_term)
 
     def save_model(self, request, obj, form, change):
@@ -105,7 +122,11 @@ class BaseModelAdmin(admin.ModelAdmin):
 
     @admin.display(description='')
     def attachment(self, obj):
-        if obj.files.exists():
+        # 'has_files' is annotation of the changelist queryset
+        has_files = getattr(obj, 'has_files', None)
+        if has_files is None:
+            has_files = obj.files.exists()
+        if has_files:
             return SAFE_ATTACH_FILE_ICON
         return ''
 
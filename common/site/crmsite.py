@@ -2,20 +2,17 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib.admin.models import LogEntry
 from django.contrib.admin.utils import quote
-from django.db.models import Count
-from django.db.models import Q
 from django.template.response import TemplateResponse
 from django.urls import NoReverseMatch
 from django.urls import reverse
-from django.utils.timezone import localtime
-from django.utils.timezone import now
 from django.utils.translation import get_language
 from django.utils.safestring import mark_safe
 
 from common.models import Reminder
 from common.models import UserProfile
-from common.utils.hide_main_tasks import hide_main_tasks
 from common.utils.helpers import LEADERS
+from common.utils.menu_counters import has_crm_counters
+from common.utils.menu_counters import menu_counters
 from crm.models import CrmEmail
 from crm.models import Request
 from help.models import Page
@@ -150,32 +147,24 @@ class BaseSite(admin.AdminSite):
 
 def get_counters(request, app_label, models):
     if app_label == 'crm':
-        if any((
-            request.user.is_manager,
-            request.user.is_operator,
-            request.user.is_superoperator,
-            request.user.is_superuser,
-            request.user.is_chief,
-        )):
-            get_outbox_email_count(request, models)
-            get_request_count(request, models)
+        if has_crm_counters(request.user):
+            counters = menu_counters.get(request)
+            set_outbox_email_count(models, counters['outbox']['regular'])
+            if counters['request']['urgent'] or counters['request']['regular']:
+                set_counters(Request, models, counters['request'])
 
     elif app_label == 'tasks':
-        get_task_count(request, models)
-        get_memo_count(request, models)
+        counters = menu_counters.get(request)
+        if counters['task']['urgent'] or counters['task']['regular']:
+            set_counters(Task, models, counters['task'])
+        set_memo_count(models, counters['memo']['regular'])
 
     elif app_label == 'common':
         set_icon(Reminder, models, alarm_icon)
         set_icon(UserProfile, models, people_icon)
 
 
-def get_outbox_email_count(request, models):
-    outbox_count = CrmEmail.objects.filter(
-        owner=request.user,
-        sent=False,
-        incoming=False,
-        trash=False
-    ).count()
+def set_outbox_email_count(models, outbox_count):
     if outbox_count:
         model_name = CrmEmail._meta.verbose_name_plural
         post = next((m for m in models if m['name'] == model_name), None)
@@ -186,11 +175,7 @@ def get_outbox_email_count(request, models):
             )
 
 
-def get_memo_count(request, models):
-    memo_count = Memo.objects.filter(
-        stage=Memo.PENDING,
-        to=request.user,
-    ).count()
+def set_memo_count(models, memo_count):
     if memo_count:
         model_name = Memo._meta.verbose_name_plural
         memo = next((
@@ -204,48 +189,6 @@ def get_memo_count(request, models):
         )
 
 
-def get_request_count(request, models):
-    today = localtime(now()).replace(hour=0, minute=0, second=0, microsecond=0)
-    qs = Request.objects.filter(pending=True)
-    q_params = Q()
-    if any((
-        request.user.is_operator,
-        request.user.is_superoperator,
-        request.user.is_superuser,
-        request.user.is_chief,
-    )) and not request.user.is_manager:
-        q_params = Q(owner__groups__name__in=('superoperators', 'operators'))
-        q_params |= Q(owner__isnull=True)
-        if request.user.department_id:
-            qs = qs.filter(department_id=request.user.department_id)
-    elif request.user.is_manager:
-        q_params = Q(owner=request.user) | Q(co_owner=request.user)
-
-    counts = qs.filter(q_params).aggregate(
-        regular=Count('pk', filter=Q(creation_date__gte=today)),
-        urgent=Count('pk', filter=Q(creation_date__lt=today))
-    )
-    if counts['urgent'] or counts['regular']:
-        set_counters(Request, models, counts)
-
-
-def get_task_count(request, models):
-    today = localtime(now()).replace(hour=0, minute=0, second=0, microsecond=0)
-    qs = Task.objects.filter(
-        stage__active=True,
-        responsible=request.user,
-    )
-    qs = hide_main_tasks(request, qs)
-    counts = qs.aggregate(
-        regular=Count('pk', filter=Q(next_step_date__isnull=True)
-                      | Q(next_step_date__gte=today)),
-        urgent=Count('pk', filter=Q(next_step_date__isnull=False)
-                     & Q(next_step_date__lt=today))
-    )
-    if counts['urgent'] or counts['regular']:
-        set_counters(Task, models, counts)
-
-
 def set_app_models(app: dict, app_label: str) -> dict:
     models = []
     for object_name in settings.MODEL_ON_INDEX_PAGE[app_label]['app_model_list']:
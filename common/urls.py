@@ -4,6 +4,8 @@ from django.urls import path
 
 from common.views.copy_department import copy_department
 from common.views.debugs import debug
+from common.views.export_objects import download_export
+from common.views.export_objects import export_job_status
 from common.views.reload_field import reload_field
 from common.views.select_email_account import select_email_account
 from common.views.select_emails_import import select_emails_import
@@ -46,4 +48,14 @@ urlpatterns = [
         login_required(reload_field),
         name='reload_field'
     ),
+    path(
+        'export-jobs/<int:job_id>/download/',
+        staff_member_required(download_export),
+        name='download_export'
+    ),
+    path(
+        'export-jobs/<int:job_id>/',
+        staff_member_required(export_job_status),
+        name='export_job_status'
+    ),
 ]
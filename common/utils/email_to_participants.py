@@ -1,3 +1,4 @@
+from collections import defaultdict
 from typing import List
 from django.contrib.auth.models import User
 from django.contrib.sites.models import Site
@@ -5,31 +6,60 @@ from django.template import loader
 from django.utils.translation import gettext as _
 from django.utils.translation import override
 
+from common.models import UserProfile
 from common.utils.helpers import compose_subject
-from common.utils.helpers import send_crm_email
+from common.utils.helpers import get_profile_language_code
+from common.utils.helpers import send_crm_emails
 
 
 def email_to_participants(obj, subject: str, recipient_list: List[User],
-                          composed_subject: str = '', responsible: User =None) -> None:
-    
+                          composed_subject: str = '', responsible: User = None) -> None:
+    groups = group_by_language(recipient_list, get_language_codes(recipient_list))
+    send_crm_emails(
+        get_emails(obj, subject, groups, composed_subject, responsible)
+    )
+
+
+def get_language_codes(users: List[User]) -> dict:
+    """Returns the language codes of the users loaded with one query."""
+    profiles = UserProfile.objects.filter(user__in=users).only(
+        'user_id', 'language_code'
+    )
+    return {p.user_id: get_profile_language_code(p) for p in profiles}
+
+
+def group_by_language(users: List[User], codes: dict) -> dict:
+    """Groups the users by the language codes of their profiles."""
+    groups = defaultdict(list)
+    for user in users:
+        groups[codes.get(user.id)].append(user)
+    return groups
+
+
+def get_emails(obj, subject: str, groups: dict, composed_subject: str = '',
+               responsible: User = None, each_responsible: bool = False) -> list:
+    """
+    Returns the (subject, body, to) emails to the users grouped by language.
+    Each language variant is rendered once. If each_responsible is True,
+    every user gets their own email with the task completed button.
+    """
     template = loader.get_template("common/notice_participants_email.html")
     site = Site.objects.get_current()
-    context = {'obj': obj, 'domain': site.domain, 'responsible': responsible}
-    while recipient_list:
-        user = recipient_list.pop()
-        to = [user.email]
-        code = user.profile.language_code   # NOQA
+    emails = []
+    for code, users in groups.items():
         with override(code):
-            if not composed_subject:
-                composed_subject = compose_subject(
-                    obj, _(subject), responsible)
-            html_message = template.render(context)
-        temp_list = []
-        while recipient_list:
-            u = recipient_list.pop()
-            if u.profile.language_code == code: # NOQA
-                to.append(u.email)
+            subject_str = composed_subject or compose_subject(
+                obj, _(subject), responsible
+            )
+            if each_responsible:
+                for user in users:
+                    context = {'obj': obj, 'domain': site.domain, 'responsible': user}
+                    emails.append(
+                        (subject_str, template.render(context), [user.email])
+                    )
             else:
-                temp_list.append(u)
-        send_crm_email(composed_subject, html_message, to)
-        recipient_list.extend(temp_list)
+                context = {'obj': obj, 'domain': site.domain, 'responsible': responsible}
+                emails.append(
+                    (subject_str, template.render(context), [u.email for u in users])
+                )
+    return emails
@@ -0,0 +1,199 @@
+import threading
+import time
+from contextlib import suppress
+from datetime import timedelta
+from queue import Empty
+from queue import Queue
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.mail import mail_admins
+from django.db import close_old_connections
+from django.db.models.query import QuerySet
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext as _
+from django.utils.translation import override
+
+from common.models import ExportJob
+from common.utils.helpers import get_user_language_code
+from common.utils.helpers import save_message
+from common.views.export_objects import get_columns_data
+from common.views.export_objects import get_exported_dir
+from common.views.export_objects import get_file_path
+from common.views.export_objects import save_to_excel
+
+# Exported files are deleted after this time.
+EXPORTED_FILES_TTL = 24 * 60 * 60       # seconds
+# The runner checks for old files at least this often.
+CLEANUP_INTERVAL = 60 * 60              # seconds
+# The runner confirms its pending and running jobs this often.
+HEARTBEAT_INTERVAL = 60                 # seconds
+# Unconfirmed for this time, a job is considered lost
+# (its process was restarted) and is failed.
+LOST_JOB_TIME = 10 * 60                 # seconds
+
+
+class ExportJobRunner(threading.Thread):
+    """
+    Runs the export jobs one by one using queue.
+    The owner of a job is notified with a download link
+    when the file is ready. Old exported files are deleted.
+    The queue lives in memory only, so the runner keeps confirming
+    its jobs in the database and fails the jobs lost by other
+    (e.g. restarted) processes.
+    """
+
+    def __init__(self):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.job_queue = Queue()
+        self.job_ids = set()
+        self._lock = threading.Lock()
+
+    def submit(self, user, queryset: QuerySet, total: int) -> ExportJob:
+        job = ExportJob.objects.create(
+            owner=user,
+            content_type=ContentType.objects.get_for_model(queryset.model),
+            total=total
+        )
+        with self._lock:
+            self.job_ids.add(job.id)
+        self.job_queue.put((job.id, queryset))
+        return job
+
+    def beat(self) -> None:
+        """Confirms the jobs of this runner and fails the lost ones."""
+        with self._lock:
+            job_ids = list(self.job_ids)
+        if job_ids:
+            ExportJob.objects.filter(id__in=job_ids).update(
+                heartbeat=timezone.now()
+            )
+        fail_lost_jobs()
+
+    def keep_alive(self):
+        while True:
+            try:
+                self.beat()
+            except Exception as e:
+                mail_admins(
+                    "ExportJobRunner heartbeat Exception",
+                    f"Exception: {e}",
+                    fail_silently=True,
+                )
+            finally:
+                close_old_connections()
+            time.sleep(HEARTBEAT_INTERVAL)
+
+    def run(self):
+        if not settings.TESTING:
+            threading.Thread(target=self.keep_alive, daemon=True).start()
+        while True:
+            job_id = None
+            try:
+                try:
+                    job_id, queryset = self.job_queue.get(timeout=CLEANUP_INTERVAL)
+                except Empty:
+                    remove_old_files()
+                    continue
+                run_export_job(job_id, queryset)
+                remove_old_files()
+            except Exception as e:
+                mail_admins(
+                    "ExportJobRunner Exception",
+                    f"Job: {job_id}\nException: {e}",
+                    fail_silently=True,
+                )
+                if job_id:
+                    with suppress(Exception):   # the database may be unavailable
+                        set_job_failed(job_id, e)
+            finally:
+                if job_id:
+                    with self._lock:
+                        self.job_ids.discard(job_id)
+                close_old_connections()
+
+
+def run_export_job(job_id: int, queryset: QuerySet) -> None:
+    job = ExportJob.objects.select_related('owner').get(id=job_id)
+    job.status = ExportJob.RUNNING
+    job.save(update_fields=['status'])
+    file_path = get_file_path(job.owner.username, queryset, job_id=job.id)
+    columns = get_columns_data()[job.content_type_id]
+
+    def progress(processed: int) -> None:
+        ExportJob.objects.filter(id=job.id).update(processed=processed)
+
+    try:
+        save_to_excel(columns, queryset, file_path, progress=progress)
+    except Exception as e:
+        job.status = ExportJob.FAILED
+        job.error = str(e)
+        job.completion_date = timezone.now()
+        job.save(update_fields=['status', 'error', 'completion_date'])
+        mail_admins(
+            "Export job error",
+            f"Job: {job_id}\nException: {e}",
+            fail_silently=True,
+        )
+        with override(get_user_language_code(job.owner)):
+            save_message(job.owner, _('Export #%s failed.') % job.id, 'ERROR')
+        return
+
+    job.status = ExportJob.DONE
+    job.processed = job.total
+    job.file_name = file_path.name
+    job.completion_date = timezone.now()
+    job.save(update_fields=['status', 'processed', 'file_name', 'completion_date'])
+    with override(get_user_language_code(job.owner)):
+        msg = _('Export #%s is ready') % job.id
+        save_message(
+            job.owner,
+            mark_safe(
+                f'{msg}: <a href="{job.get_download_url()}">{file_path.name}</a>'
+            ),
+            'SUCCESS'
+        )
+
+
+def set_job_failed(job_id: int, error: Exception) -> None:
+    """Marks the job failed unless it has already been completed."""
+    ExportJob.objects.filter(
+        id=job_id, status__in=(ExportJob.PENDING, ExportJob.RUNNING)
+    ).update(
+        status=ExportJob.FAILED,
+        error=str(error),
+        completion_date=timezone.now()
+    )
+
+
+def fail_lost_jobs() -> None:
+    """
+    Fails the pending and running jobs not confirmed for LOST_JOB_TIME
+    and notifies their owners.
+    """
+    expiration_time = timezone.now() - timedelta(seconds=LOST_JOB_TIME)
+    lost_jobs = ExportJob.objects.filter(
+        status__in=(ExportJob.PENDING, ExportJob.RUNNING),
+        heartbeat__lt=expiration_time
+    )
+    for job in lost_jobs.select_related('owner'):
+        # another runner may have failed the job already
+        if lost_jobs.filter(id=job.id).update(
+            status=ExportJob.FAILED,
+            error='The export was interrupted by a restart.',
+            completion_date=timezone.now()
+        ):
+            with override(get_user_language_code(job.owner)):
+                save_message(job.owner, _('Export #%s failed.') % job.id, 'ERROR')
+
+
+def remove_old_files() -> None:
+    """Deletes the exported files older than EXPORTED_FILES_TTL."""
+    expiration_time = time.time() - EXPORTED_FILES_TTL
+    for file_path in get_exported_dir().glob('*.xlsx'):
+        try:
+            if file_path.stat().st_mtime < expiration_time:
+                file_path.unlink()
+        except FileNotFoundError:
+            pass
@@ -1,3 +1,4 @@
+import re
 import secrets
 from datetime import timedelta
 from django.apps import apps
@@ -60,13 +61,20 @@ def add_chat_context(request, extra_context, object_id, content_type):
 
 def add_phone_q_params(phone: str, q_params: Q = None) -> Q:
     q_params = q_params or Q()
-    digits = [i for i in phone if i.isdigit()]
-    if len(digits) > 4:
-        digits_re = ''.join((f'[^0-9]*[{i}]{{1}}' for i in digits))
-        phone_re = fr"{digits_re}"
-        q_params |= Q(phone__iregex=phone_re)
-        q_params |= Q(other_phone__iregex=phone_re)
-        q_params |= Q(mobile__iregex=phone_re)
+    phone_key = get_phone_key(phone)
+    if phone_key:
+        min_length = settings.PHONE_KEY_MIN_MATCH
+        # the keys are reversed, so the ends of the numbers are their prefixes
+        prefixes = [phone_key[:n] for n in range(min_length, len(phone_key))]
+        for field in ('phone_key', 'other_phone_key', 'mobile_key'):
+            if min_length <= len(phone_key) < settings.PHONE_KEY_LENGTH:
+                # the number is written without its code
+                q_params |= Q(**{f'{field}__startswith': phone_key})
+            else:
+                q_params |= Q(**{field: phone_key})
+            if prefixes:
+                # the stored number is written without its code
+                q_params |= Q(**{f'{field}__in': prefixes})
     return q_params
 
 
@@ -120,6 +128,18 @@ def get_formatted_short_date():
     )
 
 
+def get_phone_key(phone: str) -> str:
+    """Returns the digits-only key of the phone number used for indexed
+    lookups. The key is the last PHONE_KEY_LENGTH digits of the number,
+    so the same number written with or without a country code or
+    a trunk prefix gets the same key. The digits are reversed, so
+    a number written without its code is found by a prefix lookup."""
+    digits = re.sub(r'[^0-9]', '', phone or '')
+    if len(digits) > 4:
+        return digits[-settings.PHONE_KEY_LENGTH:][::-1]
+    return ''
+
+
 def get_trans_for_lang(text: str, language_code: str) -> str:
     """Get translation for a specific language"""
     with override(language_code):
@@ -133,8 +153,12 @@ def get_trans_for_user(text: str, user) -> str:
 
 
 def get_user_language_code(user) -> str:
+    return get_profile_language_code(user.profile)
+
+
+def get_profile_language_code(profile) -> str:
     if settings.USE_I18N:
-        return user.profile.language_code or settings.LANGUAGE_CODE
+        return profile.language_code or settings.LANGUAGE_CODE
     return settings.LANGUAGE_CODE
 
 
@@ -219,9 +243,9 @@ def get_today():
 
 def save_message(user, msg: str, level: str = 'INFO'):
     """Save message to not current user."""
-    profile = user.profile
-    profile.messages.extend([msg, level])
-    profile.save(update_fields=['messages'])
+    # imported here to avoid a circular import with common.models
+    from common.utils.user_messages import save_messages
+    save_messages([(user.id, msg, level)])
 
 
 def send_crm_email(
@@ -235,6 +259,13 @@ def send_crm_email(
     app_config.nes.send_msg(subject, body, to)
 
 
+def send_crm_emails(emails: list) -> None:
+    """Sends CRM notification emails (subject, body, to) as one batch."""
+
+    app_config = apps.get_app_config('common')
+    app_config.nes.send_msgs(emails)
+
+
 def set_toggle_tooltip(key: str, request: WSGIRequest, extra_context: dict) -> None:
     if key in request.session:
         extra_context['toggle_title'] = _("sort by creation date")
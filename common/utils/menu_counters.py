@@ -0,0 +1,171 @@
+import threading
+from time import monotonic
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db.models import CharField
+from django.db.models import Count
+from django.db.models import IntegerField
+from django.db.models import Q
+from django.db.models import Value
+from django.db.models.query import QuerySet
+from django.utils.timezone import localtime
+from django.utils.timezone import now
+
+from common.utils.hide_main_tasks import hide_main_tasks
+from crm.models import CrmEmail
+from crm.models import Request
+from tasks.models import Memo
+from tasks.models import Task
+
+# The counters are recomputed after this time even without signals
+# (e.g. when the objects are changed by another process).
+COUNTERS_TTL = 30       # seconds
+
+
+class MenuCounters:
+    """
+    Per-user cache of the counters shown in the menu:
+    outbox emails, pending requests, active tasks and pending memos.
+
+    All counters of a user are computed with one query. They are dropped
+    on save or delete of CrmEmail, Request, Task and Memo objects
+    (see common.signals.handlers). They are not cached when testing
+    because the test database is rolled back without signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._version = 0
+        self.ttl = 0 if settings.TESTING else COUNTERS_TTL
+
+    def get(self, request: WSGIRequest) -> dict:
+        """Returns the counters of the request user.
+        They are computed once per request at most."""
+        counters = getattr(request, 'menu_counters', None)
+        if counters is not None:
+            return counters
+        key = get_counters_key(request)
+        with self._lock:
+            expires, cached_key, counters = self._counters.get(
+                request.user.id, (0, None, None)
+            )
+            version = self._version
+        if cached_key != key or expires <= monotonic():
+            counters = get_counters(request)
+            with self._lock:
+                # do not store counters computed before an invalidation
+                if version == self._version:
+                    self._counters[request.user.id] = (
+                        monotonic() + self.ttl, key, counters
+                    )
+        request.menu_counters = counters
+        return counters
+
+    def invalidate(self, user_id=None, **kwargs) -> None:
+        """Drops the counters of the user or all counters."""
+        with self._lock:
+            self._version += 1
+            if user_id is None:
+                self._counters.clear()
+            else:
+                self._counters.pop(user_id, None)
+
+
+def count(queryset: QuerySet, name: str,
+          regular: Q = Q(), urgent: Q = None) -> QuerySet:
+    """Returns a single row query (name, regular, urgent)
+    counting the objects of the queryset."""
+    urgent_count = Count('pk', filter=urgent) if urgent \
+        else Value(0, output_field=IntegerField())
+    return queryset.order_by().annotate(
+        counter=Value(name, output_field=CharField())
+    ).values('counter').annotate(
+        regular=Count('pk', filter=regular),
+        urgent=urgent_count,
+    ).values_list('counter', 'regular', 'urgent')
+
+
+def get_counters(request: WSGIRequest) -> dict:
+    """Computes the menu counters of the user with one query."""
+    today = localtime(now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    tasks = hide_main_tasks(request, Task.objects.filter(
+        stage__active=True,
+        responsible=request.user,
+    ))
+    queries = [
+        count(
+            tasks, 'task',
+            regular=Q(next_step_date__isnull=True) | Q(next_step_date__gte=today),
+            urgent=Q(next_step_date__isnull=False) & Q(next_step_date__lt=today),
+        ),
+        count(Memo.objects.filter(stage=Memo.PENDING, to=request.user), 'memo'),
+    ]
+    if has_crm_counters(request.user):
+        queries.append(count(
+            CrmEmail.objects.filter(
+                owner=request.user,
+                sent=False,
+                incoming=False,
+                trash=False
+            ),
+            'outbox'
+        ))
+        queries.append(count(
+            get_requests(request), 'request',
+            regular=Q(creation_date__gte=today),
+            urgent=Q(creation_date__lt=today),
+        ))
+    counters = {
+        name: {'regular': 0, 'urgent': 0}
+        for name in ('task', 'memo', 'outbox', 'request')
+    }
+    for name, regular, urgent in queries[0].union(*queries[1:], all=True):
+        counters[name] = {'regular': regular, 'urgent': urgent}
+    return counters
+
+
+def get_counters_key(request: WSGIRequest) -> tuple:
+    """The counters are recomputed if the key is changed."""
+    user = request.user
+    return (
+        localtime(now()).date(),
+        user.department_id,
+        user.is_manager,
+        user.is_operator,
+        user.is_superoperator,
+        user.is_superuser,
+        user.is_chief,
+    )
+
+
+def get_requests(request: WSGIRequest) -> QuerySet:
+    """Returns the pending requests counted for the user."""
+    qs = Request.objects.filter(pending=True)
+    q_params = Q()
+    if any((
+        request.user.is_operator,
+        request.user.is_superoperator,
+        request.user.is_superuser,
+        request.user.is_chief,
+    )) and not request.user.is_manager:
+        q_params = Q(owner__groups__name__in=('superoperators', 'operators'))
+        q_params |= Q(owner__isnull=True)
+        if request.user.department_id:
+            qs = qs.filter(department_id=request.user.department_id)
+    elif request.user.is_manager:
+        q_params = Q(owner=request.user) | Q(co_owner=request.user)
+    return qs.filter(q_params)
+
+
+def has_crm_counters(user) -> bool:
+    return any((
+        user.is_manager,
+        user.is_operator,
+        user.is_superoperator,
+        user.is_superuser,
+        user.is_chief,
+    ))
+
+
+menu_counters = MenuCounters()
@@ -3,12 +3,13 @@ from queue import Queue
 from smtplib import SMTPServerDisconnected
 from django.conf import settings
 from django.core.mail import EmailMessage
+from django.core.mail import get_connection
 
 
 class NotifEmailSender(threading.Thread):
     """
     Used to send CRM mail notifications.
-    Creates email messages and sends them one by one using queue.
+    Creates email messages and sends them batch by batch using queue.
     Email body always serves as HTML type.
     """
 
@@ -19,7 +20,16 @@ class NotifEmailSender(threading.Thread):
 
     def send_msg(self, subject: str = "",
                  body: str = "", to: list = None) -> None:
+        self.send_queue.put([self.get_msg(subject, body, to)])
 
+    def send_msgs(self, emails: list) -> None:
+        """Queues the (subject, body, to) emails as one batch.
+        The batch is sent through one SMTP connection."""
+        if emails:
+            self.send_queue.put([self.get_msg(*eml) for eml in emails])
+
+    @staticmethod
+    def get_msg(subject: str = "", body: str = "", to: list = None) -> EmailMessage:
         msg = EmailMessage(
             subject=subject,
             body=body,
@@ -28,17 +38,17 @@ class NotifEmailSender(threading.Thread):
             reply_to=settings.CRM_REPLY_TO
         )
         msg.content_subtype = "html"
-        self.send_queue.put(msg)
+        return msg
 
     def run(self):
         while True:
-            eml = self.send_queue.get()
+            emls = self.send_queue.get()
             if not settings.DEBUG:
                 try:
-                    eml.send()
+                    get_connection().send_messages(emls)
                 except SMTPServerDisconnected:
                     try:
-                        eml.send()
+                        get_connection().send_messages(emls)
                     except:     # NOQA
                         pass
                 except:         # NOQA
@@ -0,0 +1,55 @@
+from typing import Iterable
+from typing import List
+from django.contrib.auth.models import User
+from django.utils.translation import gettext as _
+from django.utils.translation import override
+
+from common.utils.email_to_participants import get_emails
+from common.utils.email_to_participants import get_language_codes
+from common.utils.email_to_participants import group_by_language
+from common.utils.helpers import compose_message
+from common.utils.helpers import compose_subject
+from common.utils.helpers import notify_admins_no_email
+from common.utils.helpers import send_crm_emails
+from common.utils.user_messages import save_messages
+
+
+def notify_users(obj, users: Iterable[User], subject: str, message: str = '', *,
+                 level: str = 'INFO', responsible: User = None,
+                 each_responsible: bool = False) -> List[User]:
+    """
+    Notifies the users about the object in bulk.
+    The languages of the users are loaded with one query, each language
+    variant of the message and email is composed once, the messages are
+    stored with one insert and the emails are sent as one batch.
+    If the message is empty, the subject is saved as the message.
+    Returns the users that have been emailed.
+    """
+    users = list(users)
+    if not users:
+        return []
+    groups = group_by_language(users, get_language_codes(users))
+    stored_messages = []
+    for code, group in groups.items():
+        with override(code):
+            if message:
+                msg = _(message)
+            else:
+                msg = compose_subject(obj, _(subject))
+        if message:
+            msg = compose_message(obj, msg)
+        stored_messages.extend((user.id, msg, level) for user in group)
+    save_messages(stored_messages)
+
+    recipients = {}
+    for code, group in groups.items():
+        recipients[code] = [u for u in group if u.email]
+        for user in group:
+            if not user.email:
+                notify_admins_no_email(user)
+    recipients = {code: group for code, group in recipients.items() if group}
+    send_crm_emails(
+        get_emails(obj, subject, recipients, responsible=responsible,
+                   each_responsible=each_responsible)
+    )
+    return [u for group in recipients.values() for u in group]
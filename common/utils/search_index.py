@@ -0,0 +1,208 @@
+import re
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import FloatField
+from django.db.models.expressions import RawSQL
+from django.db.models.query import QuerySet
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+
+from common.models import SearchDocument
+from common.models import SearchIndexState
+
+# Number of objects indexed at a time.
+INDEX_BATCH_SIZE = 1000
+
+# Objects of a content type matching the query (content type id, query).
+MATCH_SQL = {
+    'postgresql': (
+        "SELECT object_id FROM common_searchdocument WHERE content_type_id = %s "
+        "AND to_tsvector('simple', document) @@ to_tsquery('simple', %s)"
+    ),
+    'mysql': (
+        "SELECT object_id FROM common_searchdocument WHERE content_type_id = %s "
+        "AND MATCH(document) AGAINST (%s IN BOOLEAN MODE)"
+    ),
+    'sqlite': (
+        "SELECT d.object_id FROM common_searchdocument d "
+        "JOIN common_searchdocument_fts ON common_searchdocument_fts.rowid = d.id "
+        "WHERE d.content_type_id = %s AND common_searchdocument_fts MATCH %s"
+    ),
+}
+# Rank of the document of the object (query, content type id),
+# {pk} is the primary key column of the object table.
+RANK_SQL = {
+    'postgresql': (
+        "SELECT ts_rank(to_tsvector('simple', document), to_tsquery('simple', %s)) "
+        "FROM common_searchdocument WHERE content_type_id = %s AND object_id = {pk}"
+    ),
+    'mysql': (
+        "SELECT MATCH(document) AGAINST (%s IN BOOLEAN MODE) "
+        "FROM common_searchdocument WHERE content_type_id = %s AND object_id = {pk}"
+    ),
+    'sqlite': (
+        "SELECT -bm25(common_searchdocument_fts) FROM common_searchdocument_fts "
+        "JOIN common_searchdocument d ON d.id = common_searchdocument_fts.rowid "
+        "WHERE common_searchdocument_fts MATCH %s AND d.content_type_id = %s "
+        "AND d.object_id = {pk}"
+    ),
+}
+
+# model -> search fields of the model
+indexed_models = defaultdict(list)
+# related model -> (model, lookup) of the objects whose documents include it
+dependent_models = defaultdict(set)
+
+
+def register(model, search_fields) -> None:
+    """
+    Indexes the search fields of the model. The document of an object
+    is updated when the object or an object of its search fields
+    across relations is saved.
+    """
+    fields = indexed_models[model]
+    for field in search_fields:
+        field = field.lstrip('^=@')
+        if field not in fields:
+            fields.append(field)
+            add_dependencies(model, field)
+    uid = f'search_index_{model._meta.label_lower}'
+    post_save.connect(update_document_handler, sender=model, dispatch_uid=uid)
+    post_delete.connect(delete_document_handler, sender=model, dispatch_uid=uid)
+
+
+def add_dependencies(model, field: str) -> None:
+    opts = model._meta
+    path = []
+    for name in field.split('__')[:-1]:
+        related_model = opts.get_field(name).related_model
+        path.append(name)
+        dependent_models[related_model].add((model, '__'.join(path)))
+        post_save.connect(
+            update_dependents_handler, sender=related_model,
+            dispatch_uid=f'search_index_dependents_{related_model._meta.label_lower}'
+        )
+        opts = related_model._meta
+
+
+def is_available(model, search_term: str) -> bool:
+    """Returns True if the objects of the model can be searched
+    for the term with the full-text index."""
+    if not settings.FULL_TEXT_SEARCH or model not in indexed_models \
+            or connection.vendor not in MATCH_SQL or not get_words(search_term):
+        return False
+    # the objects are not all indexed yet (see rebuild_search_index command)
+    return SearchIndexState.objects.filter(
+        content_type=ContentType.objects.get_for_model(model)
+    ).exists()
+
+
+def search(queryset: QuerySet, search_term: str) -> QuerySet:
+    """Filters the queryset by the full-text index and
+    annotates the objects with the 'search_rank' of the match."""
+    query = get_query(search_term)
+    vendor = connection.vendor
+    content_type_id = ContentType.objects.get_for_model(queryset.model).id
+    opts = queryset.model._meta
+    pk = f'{connection.ops.quote_name(opts.db_table)}.' \
+         f'{connection.ops.quote_name(opts.pk.column)}'
+    return queryset.filter(
+        pk__in=RawSQL(MATCH_SQL[vendor], (content_type_id, query))
+    ).annotate(
+        search_rank=RawSQL(
+            RANK_SQL[vendor].format(pk=pk), (query, content_type_id),
+            output_field=FloatField()
+        )
+    )
+
+
+def get_query(search_term: str) -> str:
+    """Returns the query matching the documents that contain
+    all words of the search term as word prefixes."""
+    words = get_words(search_term)
+    vendor = connection.vendor
+    if vendor == 'postgresql':
+        return ' & '.join(f'{w}:*' for w in words)
+    if vendor == 'mysql':
+        return ' '.join(f'+{w}*' for w in words)
+    return ' AND '.join(f'"{w}"*' for w in words)
+
+
+def get_words(text: str) -> list:
+    return re.findall(r'\w+', text.lower())
+
+
+def update_documents(model, ids) -> None:
+    """Creates or updates the documents of the model objects.
+    An object without words gets an empty document, so that
+    its old words are not found anymore."""
+    fields = indexed_models[model]
+    content_type = ContentType.objects.get_for_model(model)
+    ids = list(ids)
+    # MySQL updates the conflicting rows without specifying the unique fields
+    unique_fields = {}
+    if connection.features.supports_update_conflicts_with_target:
+        unique_fields['unique_fields'] = ['content_type', 'object_id']
+    for i in range(0, len(ids), INDEX_BATCH_SIZE):
+        words = {}
+        rows = model._default_manager.filter(
+            pk__in=ids[i:i + INDEX_BATCH_SIZE]
+        ).values_list('pk', *fields)
+        for pk, *values in rows:
+            # the rows of to-many fields repeat the pk
+            words.setdefault(pk, [])
+            for value in values:
+                if value is not None and value != '':
+                    words[pk].extend(get_words(str(value)))
+        SearchDocument.objects.bulk_create(
+            [
+                SearchDocument(
+                    content_type=content_type,
+                    object_id=pk,
+                    document=' '.join(object_words)
+                )
+                for pk, object_words in words.items()
+            ],
+            update_conflicts=True,
+            update_fields=['document'],
+            **unique_fields
+        )
+
+
+def rebuild(model) -> int:
+    """Indexes all objects of the model. Returns their number."""
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(model)
+    ).exclude(
+        object_id__in=model._default_manager.values('pk')
+    ).delete()
+    ids = list(model._default_manager.values_list('pk', flat=True))
+    update_documents(model, ids)
+    SearchIndexState.objects.update_or_create(
+        content_type=ContentType.objects.get_for_model(model)
+    )
+    return len(ids)
+
+
+def update_document_handler(sender, instance, raw=False, **kwargs):
+    if not raw:
+        update_documents(sender, [instance.pk])
+
+
+def delete_document_handler(sender, instance, **kwargs):
+    SearchDocument.objects.filter(
+        content_type=ContentType.objects.get_for_model(sender),
+        object_id=instance.pk
+    ).delete()
+
+
+def update_dependents_handler(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    for model, lookup in dependent_models[sender]:
+        ids = model._default_manager.filter(
+            **{lookup: instance.pk}
+        ).values_list('pk', flat=True)
+        update_documents(model, ids)
@@ -0,0 +1,114 @@
+import threading
+from time import monotonic
+from typing import NamedTuple
+from typing import Optional
+from django.conf import settings
+from django.db.models import Exists
+
+from common.models import UserMessage
+from common.models import UserProfile
+
+# The cached context is rebuilt after this time even without signals
+# (e.g. when the data is changed by another process).
+USER_CONTEXT_TTL = 60           # seconds
+# Email import is triggered for a user not more often than this.
+IMPORT_EMAILS_PERIOD = 60       # seconds
+
+
+class UserContext(NamedTuple):
+    group_names: frozenset
+    department_ids: tuple
+    utc_timezone: str
+    activate_timezone: bool
+    language_code: Optional[str]    # None if the user has no profile
+    has_messages: bool
+    expires: float
+
+
+class UserContexts:
+    """
+    In-process cache of the user data needed by UserMiddleware
+    on every request (groups, departments and profile settings).
+
+    A context is dropped by the signals of the user groups,
+    departments and user profiles (see common.signals.handlers).
+    It is not cached when testing because the test database is
+    rolled back without signals.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contexts = {}
+        self._import_times = {}
+        self._version = 0
+        self.ttl = 0 if settings.TESTING else USER_CONTEXT_TTL
+
+    def get(self, user) -> UserContext:
+        with self._lock:
+            context = self._contexts.get(user.id)
+            version = self._version
+        if context is None or context.expires <= monotonic():
+            context = get_user_context(user, monotonic() + self.ttl)
+            with self._lock:
+                # do not store a context built before an invalidation
+                if version == self._version:
+                    self._contexts[user.id] = context
+        return context
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drops the context of the user or all contexts."""
+        with self._lock:
+            self._version += 1
+            if user_id is None:
+                self._contexts.clear()
+            else:
+                self._contexts.pop(user_id, None)
+
+    def is_import_due(self, user_id: int) -> bool:
+        """Returns True once per IMPORT_EMAILS_PERIOD for the user."""
+        now = monotonic()
+        with self._lock:
+            last_time = self._import_times.get(user_id)
+            if last_time is not None and now - last_time < IMPORT_EMAILS_PERIOD:
+                return False
+            self._import_times[user_id] = now
+            return True
+
+    def update(self, user_id: int, **kwargs) -> None:
+        """Updates the cached context after the data is saved."""
+        with self._lock:
+            context = self._contexts.get(user_id)
+            if context:
+                self._contexts[user_id] = context._replace(**kwargs)
+
+
+def get_group_data(groups) -> tuple:
+    """Returns the names of the groups and the ids of the departments
+    among them with one query."""
+    rows = list(groups.order_by('id').values_list('name', 'department'))
+    group_names = frozenset(name for name, _ in rows)
+    department_ids = tuple(d for _, d in rows if d)
+    return group_names, department_ids
+
+
+def get_user_context(user, expires: float) -> UserContext:
+    group_names, department_ids = get_group_data(user.groups.all())
+    profile = UserProfile.objects.filter(user_id=user.id).annotate(
+        has_messages=Exists(
+            UserMessage.objects.filter(user_id=user.id, delivered=False)
+        )
+    ).values(
+        'utc_timezone', 'activate_timezone', 'language_code', 'has_messages'
+    ).first() or {}
+    return UserContext(
+        group_names=group_names,
+        department_ids=department_ids,
+        utc_timezone=profile.get('utc_timezone', ''),
+        activate_timezone=profile.get('activate_timezone', False),
+        language_code=profile.get('language_code'),
+        has_messages=profile.get('has_messages', False),
+        expires=expires,
+    )
+
+
+user_contexts = UserContexts()
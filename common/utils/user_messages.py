@@ -0,0 +1,44 @@
+from typing import Iterable
+from django.contrib import messages
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import transaction
+from django.utils.safestring import mark_safe
+
+from common.models import UserMessage
+from common.utils.user_context import user_contexts
+
+
+def save_messages(items: Iterable[tuple]) -> None:
+    """Stores the (user_id, message, level) messages with one insert.
+    They are shown to the users on their next request."""
+    objs = [
+        UserMessage(user_id=user_id, text=msg, level=level)
+        for user_id, msg, level in items
+    ]
+    UserMessage.objects.bulk_create(objs)
+    user_ids = {obj.user_id for obj in objs}
+
+    def set_has_messages():
+        for user_id in user_ids:
+            user_contexts.update(user_id, has_messages=True)
+
+    # the messages cannot be read before the transaction is committed
+    transaction.on_commit(set_has_messages)
+
+
+def activate_stored_messages_to_user(request: WSGIRequest) -> None:
+    """Adds the pending messages of the user to the request
+    and marks them as delivered."""
+    pending = list(
+        UserMessage.objects.filter(
+            user_id=request.user.id, delivered=False
+        ).order_by('id').values_list('id', 'text', 'level')
+    )
+    for _, msg, level in pending:
+        messages.add_message(
+            request, getattr(messages, level), mark_safe(msg)   # NOQA
+        )
+    if pending:
+        UserMessage.objects.filter(
+            id__in=[p[0] for p in pending]
+        ).update(delivered=True)
@@ -2,12 +2,14 @@ import zoneinfo
 from django.apps import apps
 from django.conf import settings
 from django.core.handlers.wsgi import WSGIRequest
-from django.contrib import messages
 from django.utils import timezone
-from django.utils.safestring import mark_safe
 from django.utils.translation import get_language
 
 from common.models import UserProfile
+from common.utils.user_context import get_group_data
+from common.utils.user_context import UserContext
+from common.utils.user_context import user_contexts
+from common.utils.user_messages import activate_stored_messages_to_user
 
 
 class UserMiddleware:
@@ -16,35 +18,29 @@ class UserMiddleware:
 
     def __call__(self, request):
         if request.user.is_authenticated:
-            profile = getattr(request.user, 'profile', None)
-            groups = request.user.groups.all()      
-            set_user_timezone(profile)
-            set_user_groups(request, groups)
-            set_user_department(request, groups)
-            iem = apps.get_app_config('crm')
-            iem.import_emails(request.user)
-            activate_stored_messages_to_user(request, profile)
-            check_user_language(profile)
+            context = user_contexts.get(request.user)
+            set_user_timezone(context)
+            set_user_roles(request, context.group_names, context.department_ids)
+            set_user_department(request, context.department_ids)
+            if user_contexts.is_import_due(request.user.id):
+                iem = apps.get_app_config('crm')
+                iem.import_emails(request.user)
+            if context.has_messages:
+                # reset before reading so that new messages are not missed
+                user_contexts.update(request.user.id, has_messages=False)
+                activate_stored_messages_to_user(request)
+            check_user_language(request.user, context)
         return self.get_response(request)
 
 
-def activate_stored_messages_to_user(request: WSGIRequest, profile: UserProfile) -> None:
-    if profile.messages:
-        while profile.messages:
-            msg = mark_safe(profile.messages.pop(0))    # NOQA
-            level = profile.messages.pop(0)             # NOQA
-            messages.add_message(request, getattr(messages, level), msg)
-        profile.save(update_fields=['messages'])
-
-
-def check_user_language(profile: UserProfile) -> None:
+def check_user_language(user, context: UserContext) -> None:
     cur_language = get_language()
-    if cur_language != profile.language_code:
-        profile.language_code = cur_language
-        profile.save(update_fields=['language_code'])
+    if context.language_code is not None and cur_language != context.language_code:
+        UserProfile.objects.filter(user_id=user.id).update(language_code=cur_language)
+        user_contexts.update(user.id, language_code=cur_language)
 
 
-def set_user_department(request: WSGIRequest, groups) -> None:
+def set_user_department(request: WSGIRequest, department_ids: tuple) -> None:
     if request.headers.get('x-requested-with') != 'XMLHttpRequest':
         if any((
             request.user.is_superuser,
@@ -64,15 +60,16 @@ def set_user_department(request: WSGIRequest, groups) -> None:
                 request.user.department_id = None
                 request.session['department_id'] = None
         else:
-            department = groups.filter(
-                department__isnull=False
-            ).first()
-            request.user.department_id = department.id if department else None
+            request.user.department_id = department_ids[0] if department_ids else None
             request.user.is_chief = False
 
 
 def set_user_groups(request: WSGIRequest, groups) -> None:
-    group_names = groups.values_list('name', flat=True)
+    set_user_roles(request, *get_group_data(groups))
+
+
+def set_user_roles(request: WSGIRequest, group_names: frozenset,
+                   department_ids: tuple) -> None:
     request.user.is_superoperator = 'superoperators' in group_names
     request.user.is_operator = 'operators' in group_names
     request.user.is_chief = 'chiefs' in group_names
@@ -82,18 +79,17 @@ def set_user_groups(request: WSGIRequest, groups) -> None:
     request.user.is_department_head = 'department heads' in group_names
 
     if request.user.is_operator:
-        departments = groups.filter(department__isnull=False).count()
-        if departments > 1:
+        if len(department_ids) > 1:
             request.user.is_superoperator = True
             request.user.is_operator = False
     
 
-def set_user_timezone(profile: UserProfile) -> None:
-    utc_timezone = getattr(profile, 'utc_timezone', None)  
+def set_user_timezone(context: UserContext) -> None:
+    utc_timezone = getattr(context, 'utc_timezone', None)  
     if settings.USE_TZ and utc_timezone:
-        if profile.activate_timezone:
+        if context.activate_timezone:
             timezone.activate(
-                zoneinfo.ZoneInfo(profile.utc_timezone)
+                zoneinfo.ZoneInfo(context.utc_timezone)
             )
         else:
             timezone.deactivate()
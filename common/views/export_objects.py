@@ -1,15 +1,27 @@
-import pandas as pd
+import xlsxwriter
+from datetime import date
+from decimal import Decimal
 from pathlib import Path
+from typing import Callable
 from typing import Union
-from django.http import HttpResponse
+from django.apps import apps
+from django.contrib import messages
+from django.http import FileResponse
 from django.http import HttpResponseNotFound
+from django.http import HttpResponseRedirect
+from django.http import JsonResponse
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldDoesNotExist
 from django.core.handlers.wsgi import WSGIRequest
 from django.db.models.query import QuerySet
 from django.utils.encoding import escape_uri_path
+from django.shortcuts import get_object_or_404
 from django.utils.formats import date_format
+from django.utils.safestring import mark_safe
+from django.utils.translation import gettext as _
 
+from common.models import ExportJob
 from common.utils.helpers import get_today
 from common.utils.helpers import get_verbose_name
 from crm.models import Company
@@ -18,18 +30,29 @@ from crm.models import Deal
 from crm.models import Lead
 from tasks.models import Task
 
+# Number of objects loaded from the database at a time when exporting
+EXPORT_CHUNK_SIZE = 2000
+# Exports of more objects are run in the background (see ExportJobRunner).
+EXPORT_SYNC_LIMIT = 5000
 
-def get_file_path(username: str, queryset: QuerySet = None, model=None) -> Path:
+
+def get_exported_dir() -> Path:
+    return settings.MEDIA_ROOT / 'exported'
+
+
+def get_file_path(username: str, queryset: QuerySet = None, model=None,
+                  job_id: int = None) -> Path:
     today = get_today()
-    file_path = settings.MEDIA_ROOT / 'exported'
-    if queryset:
-        file_name = f"{queryset.model.__name__}_db_{username}_{today}.xlsx"
-    else:
-        if not model:
-            raise Exception("either queryset or model must be specified")
-        file_name = f"{model.__name__}_db_{username}_{today}.xlsx"
+    file_path = get_exported_dir()
+    if queryset is not None:
+        model = queryset.model
+    elif not model:
+        raise Exception("either queryset or model must be specified")
+    file_name = f"{model.__name__}_db_{username}_{today}"
+    if job_id:
+        file_name += f"_{job_id}"
 
-    return file_path / escape_uri_path(file_name)
+    return file_path / escape_uri_path(f"{file_name}.xlsx")
 
 
 def get_columns_data() -> dict:
@@ -42,7 +65,8 @@ def get_columns_data() -> dict:
     }
 
 
-def export_objects_view(request: WSGIRequest) -> Union[HttpResponse, HttpResponseNotFound]:
+def export_objects_view(request: WSGIRequest) -> Union[FileResponse, HttpResponseRedirect,
+                                                       HttpResponseNotFound]:
     content_type_id = request.GET.get("content_type")
     content_type = ContentType.objects.get(id=content_type_id)
     queryset = content_type.model_class().objects.filter(
@@ -52,105 +76,145 @@ def export_objects_view(request: WSGIRequest) -> Union[HttpResponse, HttpRespons
 
 
 def export_selected_objects(request: WSGIRequest,
-                            queryset: QuerySet) -> Union[HttpResponse, HttpResponseNotFound]:
+                            queryset: QuerySet) -> Union[FileResponse, HttpResponseRedirect,
+                                                         HttpResponseNotFound]:
     content_type = ContentType.objects.get_for_model(queryset.model)
+    total = queryset.count()
+    if total > EXPORT_SYNC_LIMIT:
+        return start_export_job(request, queryset, total)
 
     file_path = get_file_path(request.user.username, queryset)
     columns_data = get_columns_data()
-    datadict = get_datadict(
-        request,
-        columns_data[content_type.id],
-        queryset=queryset
-    )
-    save_to_excel(datadict, file_path)
+    save_to_excel(columns_data[content_type.id], queryset, file_path)
     return get_export_response(file_path)
 
 
-def save_to_excel(datadict: dict, file_path: Path) -> None:
-    df = pd.DataFrame(datadict)
-    df = df.replace('nan', '')
-    df = df.replace('None', '')
-    writer = pd.ExcelWriter(file_path, engine='xlsxwriter')
-    df.to_excel(excel_writer=writer, sheet_name='Sheet1',
-                index=False, na_rep=' ')
-    writer.close()
+def save_to_excel(columns: list, queryset: QuerySet, file_path: Path,
+                  progress: Callable[[int], None] = None) -> None:
+    """Writes the objects to the file in one pass over the queryset.
+    The rows are flushed to the disk as they are written,
+    so the memory used does not depend on the number of objects."""
+    model = queryset.model
+    workbook = xlsxwriter.Workbook(
+        file_path,
+        {
+            'constant_memory': True,
+            'default_date_format': 'yyyy-mm-dd',
+            'remove_timezone': True,
+        }
+    )
+    worksheet = workbook.add_worksheet('Sheet1')
+    header_format = workbook.add_format({'bold': True, 'border': 1})
+    for col, attr in enumerate(columns):
+        if model == Task:
+            attr = get_verbose_name(model, attr)
+        worksheet.write_string(0, col, str(attr), header_format)
+
+    for row, obj in enumerate(get_export_queryset(columns, queryset), 1):
+        for col, attr in enumerate(columns):
+            value = get_value(obj, attr, model)
+            if value is None or value == '':
+                continue
+            if not isinstance(value, (bool, int, float, Decimal, date)):
+                value = str(value)
+            worksheet.write(row, col, value)
+        if progress and not row % EXPORT_CHUNK_SIZE:
+            progress(row)
+    workbook.close()
+
+
+def start_export_job(request: WSGIRequest, queryset: QuerySet,
+                     total: int) -> HttpResponseRedirect:
+    """Runs the export in the background. The user is notified
+    with a download link when the file is ready."""
+    runner = apps.get_app_config('common').export_runner
+    job = runner.submit(request.user, queryset, total)
+    messages.info(
+        request,
+        mark_safe(
+            _('Export #%(id)s of %(total)s objects is started. '
+              'You will be notified when the file is ready.') % {
+                'id': job.id, 'total': total
+            } + f' <a href="{job.get_status_url()}">{_("Progress")}</a>'
+        )
+    )
+    return HttpResponseRedirect(request.META.get('HTTP_REFERER', '/'))
 
 
-def get_export_response(file_path: Path) -> Union[HttpResponse, HttpResponseNotFound]:
-    if file_path.exists():
-        with open(file_path, 'rb') as fh:
-            response = HttpResponse(
-                fh.read(), content_type="application/vnd.ms-excel")
-            response['Content-Disposition'] = 'inline; filename=' + \
-                                              file_path.name
-            return response
+def download_export(request: WSGIRequest, job_id: int) -> Union[FileResponse, HttpResponseNotFound]:
+    job = get_object_or_404(
+        ExportJob, id=job_id, owner=request.user, status=ExportJob.DONE
+    )
+    return get_export_response(get_exported_dir() / job.file_name)
 
-    return HttpResponseNotFound()
 
+def export_job_status(request: WSGIRequest, job_id: int) -> JsonResponse:
+    job = get_object_or_404(ExportJob, id=job_id, owner=request.user)
+    return JsonResponse({
+        'id': job.id,
+        'status': job.get_status_display(),
+        'total': job.total,
+        'processed': job.processed,
+        'download_url': job.get_download_url() if job.status == ExportJob.DONE else '',
+    })
 
-def get_datadict(request: WSGIRequest, columns,
-                 obj=None, queryset: QuerySet = None) -> dict:
-    datadict = dict()
-    model = _get_model(obj, queryset)
+
+def get_export_queryset(columns: list, queryset: QuerySet) -> QuerySet:
+    """Returns the queryset iterator with the relations of the columns
+    selected with the objects."""
+    select_related, prefetch_related = set(), set()
     for attr in columns:
-        objects = _get_object_iterator(request, obj, queryset)
-
-        value_list = []
-        for o in objects:
-            if attr == 'industry':
-                name_list = []
-                for ind in o.industry.all():
-                    name_list.append(ind.name)
-                value = ",".join(name_list)
-            else:
-                if '__' in attr:
-                    attrs = attr.split('__')
-                    rel_o = getattr(o, attrs[0])
-                    if rel_o:
-                        value = getattr(rel_o, attrs[1])
-                    else:
-                        value = ''
-                else:
-                    value = getattr(o, attr)
-
-            if attr in ('birth_date', 'was_in_touch', 'lead_time'):
-                value = str(value)
-            elif attr == 'creation_date':
-                if model == Task:
-                    value = date_format(
-                        o.creation_date.date(),
-                        format="SHORT_DATE_FORMAT",
-                        use_l10n=True
-                    )
-                else:
-                    value = str(o.creation_date.date()) if value else ''
-
-            value_list.append(value)
+        name = attr.split('__')[0]
+        try:
+            field = queryset.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        if field.many_to_many:
+            prefetch_related.add(name)
+        elif field.many_to_one or field.one_to_one:
+            select_related.add(name)
+    queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        # prefetch_related is applied to each chunk of the iterator
+        return queryset.prefetch_related(*prefetch_related).iterator(
+            chunk_size=EXPORT_CHUNK_SIZE
+        )
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def get_value(obj, attr: str, model):
+    if attr == 'industry':
+        return ",".join(ind.name for ind in obj.industry.all())
+    if '__' in attr:
+        attrs = attr.split('__')
+        rel_o = getattr(obj, attrs[0])
+        value = getattr(rel_o, attrs[1]) if rel_o else ''
+    else:
+        value = getattr(obj, attr)
 
+    if attr in ('birth_date', 'was_in_touch', 'lead_time'):
+        value = str(value)
+    elif attr == 'creation_date':
         if model == Task:
-            attr = get_verbose_name(model, attr)
-        datadict[attr] = value_list
-    return datadict
-
-
-def _get_object_iterator(request: WSGIRequest, obj,
-                         queryset: QuerySet) -> QuerySet:
-    if obj:
-        if request.user.is_superuser:
-            objects = obj.objects.all().iterator()
+            value = date_format(
+                obj.creation_date.date(),
+                format="SHORT_DATE_FORMAT",
+                use_l10n=True
+            )
         else:
-            objects = obj.objects.filter(owner=request.user).iterator()
-    elif queryset:
-        objects = queryset.iterator()
-    else:
-        raise RuntimeError(
-            'Error: either object or queryset does not received')
-    return objects
+            value = str(obj.creation_date.date()) if value else ''
+    if value == 'None':
+        value = ''
+    return value
 
 
-def _get_model(obj, queryset: QuerySet):
-    if obj and obj.__class__ == Task:
-        model = obj.__class__
-    elif queryset:
-        model = queryset.model
-    return model  # NOQA
+def get_export_response(file_path: Path) -> Union[FileResponse, HttpResponseNotFound]:
+    if file_path.exists():
+        # the file is sent in chunks
+        return FileResponse(
+            open(file_path, 'rb'),
+            filename=file_path.name,
+            content_type="application/vnd.ms-excel"
+        )
+
+    return HttpResponseNotFound()
@@ -18,7 +18,9 @@ from django.urls import reverse
 from crm.models import Deal
 from crm.models import CrmEmail
 from crm.models import Request
-from crm.utils.helpers import get_crmimap
+from crm.utils.helpers import crmimap_connection
+from crm.utils.helpers import imap_busy_str
+from crm.utils.imap_headers import get_headers
 from crm.utils.import_emails import get_email_headers_page
 from crm.utils.import_emails import parse_message_bytes
 from crm.site.crmadminsite import crm_site
@@ -42,15 +44,21 @@ def select_emails_import(request: WSGIRequest):
         ]
         if uids:
             uids_str = ','.join(uids)
-            crmimap = get_crmimap(ea, 'INBOX')
-            if crmimap:
-                if action == 'delete':
-                    crmimap.delete_emails(uids_str)
-                elif action == 'spam':
-                    crmimap.move_emails_to_spam(uids_str)
-                elif action == 'seen':
-                    crmimap.mark_emails_as_read(uids_str)
-                crmimap.release()
+            try:
+                with crmimap_connection(ea, 'INBOX') as crmimap:
+                    if crmimap:
+                        headers = get_headers(ea, 'INBOX').filter(uid__in=uids)
+                        if action == 'delete':
+                            crmimap.delete_emails(uids_str)
+                            headers.delete()
+                        elif action == 'spam':
+                            crmimap.move_emails_to_spam(uids_str)
+                            headers.delete()
+                        elif action == 'seen':
+                            crmimap.mark_emails_as_read(uids_str)
+                            headers.update(seen=True)
+            except TimeoutError:
+                messages.error(request, imap_busy_str)
         url = request.get_full_path()
         return HttpResponseRedirect(url)
 
@@ -137,7 +145,10 @@ def emails_import(data: dict, request: WSGIRequest,
         if ticket:
             t = 'incoming'
         if not settings.TESTING:
-            _get_emails_by_uid(request, ea, t, uids, ticket)
+            try:
+                _get_emails_by_uid(request, ea, t, uids, ticket)
+            except TimeoutError:
+                messages.error(request, imap_busy_str)
             sleep(0.7)
 
     return HttpResponseRedirect(url)
@@ -163,12 +174,11 @@ def select_ea_view(eas: QuerySet, next_url: str, ticket: str,
 
 def _get_emails_by_uid(request: WSGIRequest, ea: EmailAccount, t: str, uids: list,
                        ticket: Optional[str] = None) -> None:
-    crmimap = get_crmimap(ea, 'INBOX')
-    if crmimap:
-        if not crmimap.error:
+    with crmimap_connection(ea, 'INBOX') as crmimap:
+        if crmimap and not crmimap.error:
             for uid in uids:
                 result, data, err = crmimap.uid_fetch(uid)
-                if result == 'OK' and data[0] and not err:
+                if result == 'OK' and data and data[0] and not err:
                     b_msg = parse_message_bytes(uid, data)
                     if not b_msg:
                         result, data, err = crmimap.uid_fetch(uid)
@@ -176,7 +186,7 @@ def _get_emails_by_uid(request: WSGIRequest, ea: EmailAccount, t: str, uids: lis
                     if b_msg:
                         crm_conf = apps.get_app_config('crm')
                         crm_conf.eml_queue.put((b_msg, ea, t, uid, ticket, request))
-                if result != 'OK' or not data[0] or err:
+                if result != 'OK' or not data or not data[0] or err:
                     mail_admins(
                         f"The result is {result} at get_emails_by_uid",
                         f'''
@@ -187,4 +197,3 @@ def _get_emails_by_uid(request: WSGIRequest, ea: EmailAccount, t: str, uids: lis
                         ''',
                         fail_silently=True,
                     )
-        crmimap.release()
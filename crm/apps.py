@@ -13,17 +13,23 @@ class CrmConfig(AppConfig):
         from crm.utils.create_email_request import CreateEmailInquiry
         from crm.utils.import_emails import ImportEmails
         from crm.utils.manage_imaps import CrmImapManager
+        from crm.utils.restore_imap_emails import EmlQueue
         from crm.utils.restore_imap_emails import RestoreImapEmails
 
+        # concurrent writers lock the in-memory test database
+        import_workers = 1 if settings.TESTING else settings.IMAP_IMPORT_WORKERS
+        parse_workers = 1 if settings.TESTING else settings.IMAP_PARSE_WORKERS
         ea_queue = Queue()
         self.inq_eml_queue = Queue(2)
-        self.eml_queue = Queue(4)                           # NOQA
+        self.eml_queue = EmlQueue(parse_workers)            # NOQA
         self.mci = CrmImapManager(ea_queue)                 # NOQA
         self.mci.start()
-        self.im = ImportEmails(ea_queue, self.eml_queue)    # NOQA
-        self.im.start()
-        rim = RestoreImapEmails(self.eml_queue, self.inq_eml_queue)
-        rim.start()
+        for _ in range(import_workers):
+            self.im = ImportEmails(ea_queue, self.eml_queue)    # NOQA
+            self.im.start()
+        for eml_queue in self.eml_queue.queues:
+            rim = RestoreImapEmails(eml_queue, self.inq_eml_queue)
+            rim.start()
         cei = CreateEmailInquiry(self.inq_eml_queue)
         cei.start()
         if not settings.TESTING:
@@ -36,3 +42,10 @@ class CrmConfig(AppConfig):
 
     def import_emails(self, user):
         self.im.send(user)
+
+    @staticmethod
+    def get_import_lag() -> dict:
+        """Returns the import lag of the email accounts
+        shared by all ImportEmails workers."""
+        from crm.utils.import_emails import ImportEmails
+        return ImportEmails.get_lag()
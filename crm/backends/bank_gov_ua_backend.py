@@ -5,6 +5,7 @@ from datetime import date
 from django.utils.formats import date_format
 
 from crm.backends.basebackend import BaseBackend
+from crm.backends.basebackend import rates_cache
 
 STATE_CURRENCY = 'UAH'
 
@@ -29,11 +30,18 @@ class BankGovUaBackend(BaseBackend):
 
     def get_data(self, currency: str = 'USD') -> list:
         date_str = date_format(self.rate_date, format=self.date_format, use_l10n=False)
+        key = (self.url, date_str, currency)
+        data = rates_cache.get(key)
+        if data is not None:
+            return data
         params = {'date': date_str, 'valcode': currency, 'json': ''}
         try:
             response = requests.get(self.url, params=params)
             response.raise_for_status()
-            return response.json()
+            data = response.json()
+            if data:
+                rates_cache.set(key, data)
+            return data
         except JSONDecodeError:
             self.error = f"Failed to decode JSON response from API. Status: {response.status_code}. Response text: {response.text[:100]}"
             return []
@@ -1,9 +1,49 @@
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import date
 from typing import Tuple
 from django.core.mail import mail_admins
 
 STATE_CURRENCY = 'EUR'
+# Number of API responses kept in the rates cache.
+RATES_CACHE_SIZE = 2048
+
+
+class RatesCache:
+    """
+    In-process LRU cache of the exchange rate API responses shared by
+    the backends. Rates of a past date do not change, so the rate of
+    the marketing currency on a date is requested only once
+    for all currencies and payments of that date.
+    """
+
+    def __init__(self, maxsize: int = RATES_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+        self.maxsize = maxsize
+
+    def get(self, key):
+        """Returns the cached value or None."""
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+rates_cache = RatesCache()
 
 
 class BaseBackend(ABC):
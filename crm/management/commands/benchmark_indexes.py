@@ -0,0 +1,202 @@
+import random
+from datetime import date
+from datetime import timedelta
+from time import perf_counter
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+
+from common.models import Reminder
+from common.utils.helpers import USER_MODEL
+from crm.models import CrmEmail
+from crm.models import Currency
+from crm.models import Deal
+from crm.models import Payment
+from crm.models import Rate
+from crm.models import Request
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the query plans and timings of the hot lookups without and "
+        "with their indexes on generated data. All changes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=20000,
+            help="Number of generated emails, requests, payments and reminders."
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help="Number of runs of each query."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor == 'mysql':
+            # indexes are dropped and created, and MySQL commits DDL implicitly
+            raise CommandError("Run the benchmark on a PostgreSQL or SQLite copy of the database.")
+        owner = USER_MODEL.objects.first()
+        if not owner:
+            raise CommandError("At least one user is required.")
+        try:
+            with transaction.atomic():
+                params = generate_data(owner, options['rows'])
+                queries = get_queries(params)
+                self.stdout.write("Without indexes:")
+                with dropped_indexes():
+                    before = self.run_queries(queries, options['repeat'])
+                self.stdout.write("With indexes:")
+                after = self.run_queries(queries, options['repeat'])
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(f"{'Query':<32}{'before, ms':>12}{'after, ms':>12}")
+        for name, _ in queries:
+            self.stdout.write(f"{name:<32}{before[name]:>12.3f}{after[name]:>12.3f}")
+
+    def run_queries(self, queries: list, repeat: int) -> dict:
+        """Prints the query plans and returns the average times."""
+        timings = {}
+        for name, queryset in queries:
+            self.stdout.write(f"  {name}:")
+            for line in queryset.explain().splitlines():
+                self.stdout.write(f"    {line}")
+            list(queryset.all())    # warm up
+            start = perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            timings[name] = (perf_counter() - start) / repeat * 1000
+        return timings
+
+
+INDEXED_MODELS = (CrmEmail, Request, Payment, Rate, Reminder)
+
+
+class dropped_indexes:
+    """Drops the indexes of the hot lookups and creates them again."""
+
+    def __enter__(self):
+        with connection.cursor() as cursor:
+            for _, index in get_indexes():
+                cursor.execute(f"DROP INDEX {connection.ops.quote_name(index.name)}")
+
+    def __exit__(self, *args):
+        editor = connection.schema_editor()
+        with connection.cursor() as cursor:
+            for model, index in get_indexes():
+                cursor.execute(str(index.create_sql(model, editor)))
+
+
+def get_indexes():
+    for model in INDEXED_MODELS:
+        for index in model._meta.indexes:
+            yield model, index
+
+
+def generate_data(owner, rows: int) -> dict:
+    """Creates the objects with bulk_create, without signals.
+    Returns the parameters of the benchmark queries."""
+    rnd = random.Random(1)
+    today = date.today()
+    now = timezone.now()
+    deals_number = max(rows // 10, 1)
+    deals = Deal.objects.bulk_create(
+        Deal(
+            name=f"Benchmark deal {i}", next_step="call",
+            next_step_date=today, ticket=f"bm{i:012d}", owner=owner,
+        )
+        for i in range(deals_number)
+    )
+    CrmEmail.objects.bulk_create((
+        CrmEmail(
+            subject=f"Benchmark email {i}", content="", owner=owner,
+            deal=deals[i % deals_number], trash=i % 7 == 0,
+            ticket=f"bm{i % deals_number:012d}",
+            message_id=f"<{i}.benchmark@example.com>",
+            email_host_user=f"user{i % 20}@example.com", uid=i,
+            creation_date=now - timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ), batch_size=1000)
+    Request.objects.bulk_create((
+        Request(
+            request_for=f"Benchmark request {i}", first_name="Benchmark",
+            ticket=f"rq{i:012d}", owner=owner,
+        )
+        for i in range(rows)
+    ), batch_size=1000)
+    currencies = [
+        Currency.objects.create(name=f"B{i:02d}") for i in range(5)
+    ]
+    Rate.objects.bulk_create((
+        Rate(
+            currency=currency, payment_date=today - timedelta(days=day),
+            rate_to_state_currency=1, rate_to_marketing_currency=1,
+        )
+        for currency in currencies
+        for day in range(rows // len(currencies))
+    ), batch_size=1000)
+    Payment.objects.bulk_create((
+        Payment(
+            deal=deals[i % deals_number], amount=100, currency=currencies[0],
+            status=rnd.choice('rghl'),
+            payment_date=today - timedelta(days=rnd.randrange(1000)),
+        )
+        for i in range(rows)
+    ), batch_size=1000)
+    content_type = ContentType.objects.get_for_model(Deal)
+    Reminder.objects.bulk_create((
+        Reminder(
+            content_type=content_type, object_id=deals[i % deals_number].id,
+            subject="Benchmark reminder", owner=owner,
+            reminder_date=now + timedelta(hours=i - rows // 2),
+            # the past reminders are sent already
+            active=i > rows // 2 - 10,
+        )
+        for i in range(rows)
+    ), batch_size=1000)
+    deal = deals[deals_number // 2]
+    return {
+        'now': now,
+        'today': today,
+        'deal': deal,
+        'currency': currencies[2],
+        'email_number': rows // 2,
+    }
+
+
+def get_queries(params: dict) -> list:
+    n = params['email_number']
+    deal = params['deal']
+    return [
+        ("CrmEmail by ticket", CrmEmail.objects.filter(ticket=deal.ticket)),
+        ("CrmEmail by message_id", CrmEmail.objects.filter(
+            message_id=f"<{n}.benchmark@example.com>"
+        )),
+        ("CrmEmail by account and uid", CrmEmail.objects.filter(
+            email_host_user=f"user{n % 20}@example.com", uid=n
+        )),
+        ("Latest emails of a deal", CrmEmail.objects.filter(
+            deal=deal, trash=False
+        ).order_by('-creation_date')[:4]),
+        ("Request by ticket", Request.objects.filter(ticket=f"rq{n:012d}")),
+        ("Received payments of a deal", Payment.objects.filter(
+            deal=deal, status=Payment.RECEIVED,
+            payment_date__gte=params['today'] - timedelta(days=365)
+        )),
+        ("Currency rate on a date", Rate.objects.filter(
+            currency=params['currency'],
+            payment_date=params['today'] - timedelta(days=100)
+        )),
+        ("Due reminders", Reminder.objects.filter(
+            active=True, reminder_date__lte=params['now']
+        )),
+    ]
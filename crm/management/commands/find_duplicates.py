@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from crm.models import Company
+from crm.models import Contact
+from crm.models import Lead
+from crm.models.country import City
+from crm.utils.merge_duplicates import find_duplicates
+from crm.utils.merge_duplicates import merge_duplicates
+
+MODELS = {
+    'company': Company,
+    'contact': Contact,
+    'lead': Lead,
+    'city': City,
+}
+
+
+class Command(BaseCommand):
+    help = "Find likely duplicates of Companies, Contacts, Leads and Cities"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', choices=list(MODELS), default=list(MODELS),
+            help="Models to check (all by default)."
+        )
+        parser.add_argument(
+            '--merge', action='store_true',
+            help="Merge each group of duplicates into its oldest object."
+        )
+
+    def handle(self, *args, **options):
+        for name in options['models']:
+            model = MODELS[name]
+            groups = find_duplicates(model)
+            merged = 0
+            for ids in groups:
+                self.stdout.write(f"{name}: {', '.join(map(str, ids))}")
+                if options['merge']:
+                    objects = model.objects.in_bulk(ids)
+                    original = objects.pop(min(ids))
+                    merged += merge_duplicates(original, objects.values())
+            msg = f"{model._meta.verbose_name_plural}: {len(groups)} groups of duplicates found"  # NOQA
+            if options['merge']:
+                msg += f", {merged} duplicates merged"
+            self.stdout.write(f"{msg}.")
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from crm.models import Deal
+from crm.utils.deal_summary import rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = "Recompute the paid amounts, quality scores and counters of Deals"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of deals recomputed per batch."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Deal.objects.order_by('id').values_list('id', flat=True)
+        last_id = rebuilt = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            rebuilt += rebuild_summaries(batch)
+            last_id = batch[-1]
+        self.stdout.write(f"Deal summaries: {rebuilt} rebuilt.")
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from crm.models import Company
+from crm.models import Contact
+from crm.models import Lead
+
+
+class Command(BaseCommand):
+    help = "Fill in the indexed phone keys of Companies, Contacts and Leads"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Number of objects updated per query."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model in (Company, Contact, Lead):
+            fields = model.phone_fields
+            key_fields = [f'{field}_key' for field in fields]
+            queryset = model.objects.only('id', *fields, *key_fields).order_by('id')
+            last_id = updated = 0
+            while True:
+                batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+                if not batch:
+                    break
+                for obj in batch:
+                    obj.set_phone_keys()
+                updated += model.objects.bulk_update(batch, key_fields)
+                last_id = batch[-1].id
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {updated} updated."  # NOQA
+            )
@@ -0,0 +1,77 @@
+# Generated by Django 6.0.9 on 2026-10-18 18:29
+
+from django.db import migrations, models
+
+from common.utils.helpers import get_phone_key
+
+BATCH_SIZE = 1000
+PHONE_FIELDS = {
+    'Company': ('phone',),
+    'Contact': ('phone', 'other_phone', 'mobile'),
+    'Lead': ('phone', 'other_phone', 'mobile'),
+}
+
+
+def set_phone_keys(apps, schema_editor):
+    """Fills in the keys of the existing phone numbers
+    (the same values as the update_phone_keys command)."""
+    for model_name, fields in PHONE_FIELDS.items():
+        model = apps.get_model('crm', model_name)
+        key_fields = [f'{field}_key' for field in fields]
+        queryset = model.objects.only('id', *fields).order_by('id')
+        last_id = 0
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            for obj in batch:
+                for field in fields:
+                    setattr(obj, f'{field}_key', get_phone_key(getattr(obj, field)))
+            model.objects.bulk_update(batch, key_fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0011_contact_avatar_lead_avatar'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='mobile_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='other_phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='contact',
+            name='phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='mobile_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='other_phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='lead',
+            name='phone_key',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=15),
+        ),
+        migrations.RunPython(set_phone_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 6.0.9 on 2026-10-18 19:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+from django.db.models import Sum
+
+BATCH_SIZE = 1000
+
+
+def build_summaries(apps, schema_editor):
+    """Builds the summaries of the existing deals
+    (the same values as the rebuild_deal_summaries command)."""
+    Deal = apps.get_model('crm', 'Deal')
+    DealSummary = apps.get_model('crm', 'DealSummary')
+    Payment = apps.get_model('crm', 'Payment')
+    TransactionQualityEvent = apps.get_model('quality', 'TransactionQualityEvent')
+    company_counts = dict(
+        Deal.objects.filter(company__isnull=False).order_by()
+        .values_list('company').annotate(c=Count('id'))
+    )
+    lead_counts = dict(
+        Deal.objects.filter(lead__isnull=False).order_by()
+        .values_list('lead').annotate(c=Count('id'))
+    )
+    deals = Deal.objects.order_by('id').values_list('id', 'company_id', 'lead_id')
+    last_id = 0
+    while True:
+        batch = list(deals.filter(id__gt=last_id)[:BATCH_SIZE])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+        ids = [deal_id for deal_id, _, _ in batch]
+        paid = dict(
+            Payment.objects.filter(deal_id__in=ids, status='r').order_by()
+            .values_list('deal').annotate(s=Sum('amount'))
+        )
+        scores = dict(
+            TransactionQualityEvent.objects.filter(deal_id__in=ids).order_by()
+            .values_list('deal').annotate(s=Sum('weight'))
+        )
+        DealSummary.objects.bulk_create(
+            [
+                DealSummary(
+                    deal_id=deal_id,
+                    paid_amount=paid.get(deal_id) or 0,
+                    quality_score=scores.get(deal_id),
+                    counterparty_deals=company_counts.get(company_id, 0) if company_id
+                    else lead_counts.get(lead_id, 0)
+                )
+                for deal_id, company_id, lead_id in batch
+            ],
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0012_company_phone_key_contact_mobile_key_and_more'),
+        ('quality', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealSummary',
+            fields=[
+                ('deal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='crm.deal')),
+                ('paid_amount', models.DecimalField(decimal_places=2, default=0, help_text='Sum of received payments', max_digits=12, verbose_name='Paid')),
+                ('quality_score', models.IntegerField(blank=True, help_text='Sum of the weights of transaction-quality events', null=True, verbose_name='Quality score')),
+                ('counterparty_deals', models.PositiveIntegerField(default=0, help_text='Number of deals of the company or lead', verbose_name='Counterparty deals')),
+            ],
+            options={
+                'verbose_name': 'Deal summary',
+                'verbose_name_plural': 'Deal summaries',
+            },
+        ),
+        migrations.RunPython(build_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 6.0.9 on 2026-10-18 20:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('crm', '0013_dealsummary'),
+        ('massmail', '0007_mailingoutrecipient_content_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='crmemail',
+            index=models.Index(fields=['ticket'], name='crm_crmemai_ticket_3c4ebb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crmemail',
+            index=models.Index(fields=['message_id'], name='crm_crmemai_message_87140c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crmemail',
+            index=models.Index(fields=['email_host_user', 'uid'], name='crm_crmemai_email_h_3fc56b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='crmemail',
+            index=models.Index(fields=['deal', 'trash', 'creation_date'], name='crm_crmemai_deal_id_3cda7e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['deal', 'status', 'payment_date'], name='crm_payment_deal_id_116be7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rate',
+            index=models.Index(fields=['currency', 'payment_date'], name='crm_rate_currenc_9faa45_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['ticket'], name='crm_request_ticket_2481f9_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.9 on 2026-10-18 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0014_hot_lookup_indexes'),
+        ('massmail', '0007_mailingoutrecipient_content_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImapHeader',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('box', models.CharField(max_length=20)),
+                ('uidvalidity', models.PositiveIntegerField(default=0)),
+                ('uid', models.PositiveIntegerField()),
+                ('seen', models.BooleanField(default=False)),
+                ('date', models.DateTimeField(blank=True, null=True)),
+                ('subject', models.TextField(blank=True, default='')),
+                ('from_field', models.TextField(blank=True, default='')),
+                ('to', models.TextField(blank=True, default='')),
+                ('email_account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='imap_headers', to='massmail.emailaccount')),
+            ],
+            options={
+                'verbose_name': 'IMAP header',
+                'verbose_name_plural': 'IMAP headers',
+                'unique_together': {('email_account', 'box', 'uid')},
+            },
+        ),
+    ]
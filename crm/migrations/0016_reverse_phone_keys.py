@@ -0,0 +1,24 @@
+# Generated by Django 6.0.9 on 2026-10-18 21:40
+
+from importlib import import_module
+
+from django.db import migrations
+
+
+def set_phone_keys(apps, schema_editor):
+    """Rewrites the keys of the phone numbers in reversed digit order."""
+    migration = import_module(
+        'crm.migrations.0012_company_phone_key_contact_mobile_key_and_more'
+    )
+    migration.set_phone_keys(apps, schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crm', '0015_imapheader'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_phone_keys, migrations.RunPython.noop),
+    ]
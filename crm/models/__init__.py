@@ -10,7 +10,9 @@ from crm.models.payment import Rate
 from crm.models.lead import Lead
 from crm.models.contact import Contact
 from crm.models.deal import Deal
+from crm.models.deal import DealSummary
 from crm.models.crmemail import CrmEmail
+from crm.models.imap_header import ImapHeader
 from crm.models.company import Company
 from crm.models.request import Request
 from crm.models.tag import Tag
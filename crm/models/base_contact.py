@@ -5,6 +5,7 @@ from django.urls import reverse
 from django.utils.safestring import mark_safe
 from django.utils.translation import gettext_lazy as _
 
+from common.utils.helpers import get_phone_key
 from common.utils.helpers import get_today
 from common.utils.helpers import token_default
 from massmail.models import MassContact
@@ -65,6 +66,19 @@ class BaseContact(models.Model):
         max_length=100, blank=True, default='',
         verbose_name=_("Mobile phone")
     )
+    phone_key = models.CharField(
+        max_length=15, blank=True, default='',
+        editable=False, db_index=True
+    )
+    other_phone_key = models.CharField(
+        max_length=15, blank=True, default='',
+        editable=False, db_index=True
+    )
+    mobile_key = models.CharField(
+        max_length=15, blank=True, default='',
+        editable=False, db_index=True
+    )
+    phone_fields = ('phone', 'other_phone', 'mobile')
     city_name = models.CharField(
         max_length=50, blank=True, default='',
         verbose_name=_("City")
@@ -199,6 +213,24 @@ class BaseCounterparty(models.Model):
         related_name="%(app_label)s_%(class)s_owner_related",
     )
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        key_fields = self.set_phone_keys(update_fields)
+        if update_fields is not None and key_fields:
+            kwargs['update_fields'] = {*update_fields, *key_fields}
+        super().save(*args, **kwargs)
+
+    def set_phone_keys(self, fields=None) -> list:
+        """Sets the indexed digits-only keys of the phone numbers.
+        Returns the names of the updated key fields."""
+        key_fields = []
+        for field in getattr(self, 'phone_fields', ()):
+            if fields is None or field in fields:
+                key_field = f'{field}_key'
+                setattr(self, key_field, get_phone_key(getattr(self, field)))
+                key_fields.append(key_field)
+        return key_fields
+
     def delete(self, *args, **kwargs):
         content_type = ContentType.objects.get_for_model(self)
         try:
@@ -44,6 +44,11 @@ class Company(BaseCounterparty, Base1):
         default='',
         verbose_name=_("Phone")
     )
+    phone_key = models.CharField(
+        max_length=15, blank=True, default='',
+        editable=False, db_index=True
+    )
+    phone_fields = ('phone',)
     city_name = models.CharField(
         max_length=100, 
         blank=True, 
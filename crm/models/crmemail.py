@@ -10,6 +10,15 @@ class CrmEmail(BaseEml):
     class Meta:
         verbose_name = _("Email")
         verbose_name_plural = _("Emails in CRM")
+        indexes = [
+            # ticket matching
+            models.Index(fields=['ticket']),
+            # duplicate checks of imported emails
+            models.Index(fields=['message_id']),
+            models.Index(fields=['email_host_user', 'uid']),
+            # the latest emails of a deal
+            models.Index(fields=['deal', 'trash', 'creation_date']),
+        ]
 
     to = models.TextField(
         null=True, blank=False,
@@ -201,3 +201,40 @@ class Deal(Base1):
         return self.next_step
 
     next_step_name.short_description = _('Next step')
+
+
+class DealSummary(models.Model):
+    """
+    Precomputed values of a deal kept current by the signals of Deal,
+    Payment and TransactionQualityEvent (see common.signals.handlers).
+    Run "manage.py rebuild_deal_summaries" to recompute them.
+    """
+    class Meta:
+        verbose_name = _("Deal summary")
+        verbose_name_plural = _("Deal summaries")
+
+    deal = models.OneToOneField(
+        'Deal',
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='summary',
+    )
+    paid_amount = models.DecimalField(
+        max_digits=12, decimal_places=2,
+        default=0,
+        verbose_name=_("Paid"),
+        help_text=_("Sum of received payments")
+    )
+    quality_score = models.IntegerField(
+        blank=True, null=True,
+        verbose_name=_("Quality score"),
+        help_text=_("Sum of the weights of transaction-quality events")
+    )
+    counterparty_deals = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_("Counterparty deals"),
+        help_text=_("Number of deals of the company or lead")
+    )
+
+    def __str__(self):
+        return str(self.deal_id)
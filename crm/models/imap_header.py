@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ImapHeader(models.Model):
+    """
+    Headers of the messages of an IMAP box shown in the email
+    import browser. New messages are added by UID delta, flags
+    are refreshed for the displayed page (see crm.utils.imap_headers).
+    """
+    class Meta:
+        verbose_name = _("IMAP header")
+        verbose_name_plural = _("IMAP headers")
+        unique_together = ('email_account', 'box', 'uid')
+
+    email_account = models.ForeignKey(
+        'massmail.EmailAccount',
+        on_delete=models.CASCADE,
+        related_name='imap_headers',
+    )
+    box = models.CharField(max_length=20)
+    uidvalidity = models.PositiveIntegerField(default=0)
+    uid = models.PositiveIntegerField()
+    seen = models.BooleanField(default=False)
+    date = models.DateTimeField(blank=True, null=True)
+    subject = models.TextField(blank=True, default='')
+    from_field = models.TextField(blank=True, default='')
+    to = models.TextField(blank=True, default='')
+
+    def __str__(self):
+        return f"{self.box} {self.uid}"
@@ -91,6 +91,10 @@ class Payment(BasePayment):
     class Meta:
         verbose_name = _("Payment")
         verbose_name_plural = _("Payments")
+        indexes = [
+            # payments of deals by status and period
+            models.Index(fields=['deal', 'status', 'payment_date']),
+        ]
 
     RECEIVED = 'r'
     GUARANTEED = 'g'
@@ -176,6 +180,10 @@ class Rate(models.Model):
     class Meta:
         verbose_name = _("Currency rate")
         verbose_name_plural = _("Currency rates")
+        indexes = [
+            # the rate of a currency on the payment date
+            models.Index(fields=['currency', 'payment_date']),
+        ]
 
     APPROXIMATE = 'A'
     OFFICIAL = 'O'
@@ -18,6 +18,10 @@ class Request(Base1):
     class Meta:
         verbose_name = _("Request")
         verbose_name_plural = _("Requests")
+        indexes = [
+            # ticket matching
+            models.Index(fields=['ticket']),
+        ]
 
     request_for = models.CharField(
         max_length=250, null=False, blank=False,
@@ -43,6 +43,19 @@ DEAL_COLUMNS = [
     'ticket', 'creation_date'
 ]
 
+# Number of the last digits of a phone number used as its key
+# when matching requests to contacts, leads and companies.
+# Run "manage.py update_phone_keys" after changing this value.
+PHONE_KEY_LENGTH = 10
+# Minimum number of digits of a number written without its code
+# (a local number) to match the end of a longer number.
+PHONE_KEY_MIN_MATCH = 7
+
+# Search the Deal, Contact, Company, Lead, Request and CrmEmail lists
+# with the full-text index of the database (PostgreSQL, MySQL or SQLite).
+# Run "manage.py rebuild_search_index" to index the existing objects.
+FULL_TEXT_SEARCH = True
+
 FIRST_STEP = _('Establish the first contact with the client.')
 
 
@@ -62,3 +75,12 @@ REUSE_IMAP_CONNECTION = False   # True - a little faster but less stable (with s
 IMAP_CONNECTION_IDLE = 4320     # minutes (3 days)
 IMAP_NOOP_PERIOD = 4 * 60       # seconds
 IMAP_DEBUG_LEVEL = 0
+IMAP_POOL_SIZE = 2              # connections per email account in use at a time (if reused)
+IMAP_POOL_TIMEOUT = 60          # seconds to wait for a free connection
+IMAP_IMPORT_WORKERS = 4         # threads importing email accounts
+IMAP_PARSE_WORKERS = 2          # threads saving imported emails
+IMAP_FETCH_BATCH_SIZE = 50      # messages per UID FETCH command
+IMAP_IMPORT_LIMIT = 500         # messages per box in one import
+# Size of the on-disk cache of original (raw) emails shown and downloaded
+# without fetching them from the IMAP server again. 0 - disabled.
+RAW_EMAIL_CACHE_SIZE = 500 * 1024 * 1024   # bytes
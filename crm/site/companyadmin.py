@@ -80,6 +80,7 @@ class CompanyAdmin(CrmModelAdmin):
         'export_selected',
         'change_owner'
     ]
+    full_text_search = True
     search_fields = [
         'full_name', 'website',
         'phone', 'city_name',
@@ -58,6 +58,7 @@ class ContactAdmin(CrmModelAdmin):
         'avatar_preview'
     ]
     save_on_top = True
+    full_text_search = True
     search_fields = [
         'first_name', 'last_name',
         'email', 'secondary_email',
@@ -91,6 +91,7 @@ class CrmEmailAdmin(CrmModelAdmin):
         'deal',
         'request'
     )
+    full_text_search = True
     search_fields = [
         'to',
         'cc',
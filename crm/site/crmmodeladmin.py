@@ -52,6 +52,7 @@ from crm.utils.make_massmail_form import get_massmail_form
 from massmail.admin_actions import BAD_RESULT_MSG
 from massmail.admin_actions import have_massmail_accounts
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 
 _thread_local = threading.local()
 _fields = {
@@ -184,6 +185,17 @@ class CrmModelAdmin(BaseModelAdmin):
             ).default_country_id
         return initial
 
+    def get_changelist_instance(self, request):
+        cl = super().get_changelist_instance(request)
+        if 'newsletters_subscriptions' in cl.list_display:
+            received = get_received_mailings(self.model).filter(
+                object_id=OuterRef('pk')
+            )
+            cl.result_list = cl.result_list.annotate(
+                has_received_mailing=Exists(received)
+            )
+        return cl
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         if obj and hasattr(obj, 'massmail'):
@@ -364,13 +376,13 @@ class CrmModelAdmin(BaseModelAdmin):
                 if recipients_number:
                     mailing_out = MailingOut(
                         name=settings.NO_NAME_STR,
-                        recipient_ids=",".join([str(x) for x in selected_ids]),
                         recipients_number=recipients_number,
                         content_type=content_type,
                         owner=request.user,
                         department_id=request.user.department_id
                     )
                     mailing_out.save()
+                    mailing_out.add_recipient_ids(selected_ids)
                     messages.info(request, _(FRIDAY_SATURDAY_SUNDAY_MSG)
                                   )
                     return HttpResponseRedirect(reverse(
@@ -421,12 +433,12 @@ class CrmModelAdmin(BaseModelAdmin):
     def newsletters_subscriptions(obj):
         if obj.massmail:
             if not obj.disqualified:
-                content_type = ContentType.objects.get_for_model(obj.__class__)
-                id_str = str(obj.id)
-                is_mcs = MailingOut.objects.filter(
-                    content_type=content_type,
-                    successful_ids__regex=fr"(^|,){id_str}(,|$)"
-                )
+                # 'has_received_mailing' is annotation of the changelist queryset
+                is_mcs = getattr(obj, 'has_received_mailing', None)
+                if is_mcs is None:
+                    is_mcs = get_received_mailings(obj.__class__).filter(
+                        object_id=obj.id
+                    ).exists()
                 if not is_mcs:
                     return mark_safe(
                         did_not_receive_icon.format(did_not_receive_title)
@@ -653,3 +665,11 @@ def get_phone_number(obj: Union[Contact, Deal, Lead], attr: str) -> str:
         number = getattr(obj, attr)
 
     return number
+
+
+def get_received_mailings(model) -> QuerySet:
+    """Returns the successful mailing out recipients of the model objects."""
+    return MailingOutRecipient.objects.filter(
+        content_type=ContentType.objects.get_for_model(model),
+        status=MailingOutRecipient.SUCCESSFUL
+    )
@@ -3,12 +3,14 @@ from django.conf import settings
 from django.contrib import admin
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case
 from django.db.models import Q
 from django.db.models import OuterRef
 from django.db.models import Subquery
 from django.db.models import Sum
 from django.db.models import Exists
 from django.db.models import F
+from django.db.models import When
 from django.http import HttpResponseRedirect
 from django.template.defaultfilters import truncatechars
 from django.utils import timezone
@@ -21,6 +23,7 @@ from django.urls import reverse
 from chat.models import ChatMessage
 from common.admin import FileInline
 from common.models import Department
+from common.models import TheFile
 from common.utils.helpers import add_chat_context
 from common.utils.helpers import set_toggle_tooltip
 from common.utils.helpers import get_now
@@ -32,6 +35,7 @@ from crm.forms.admin_forms import DealForm
 from crm.models import ClosingReason
 from crm.models import CrmEmail
 from crm.models import Deal
+from crm.models import DealSummary
 from crm.models import Output
 from crm.models import Payment
 from crm.models import Stage
@@ -119,6 +123,7 @@ class DealAdmin(CrmModelAdmin):
         'partner_contact',
         'request'
     )
+    full_text_search = True
     search_fields = [
         'name', 'next_step', 'description',
         'ticket', 'contact__first_name',
@@ -249,6 +254,10 @@ class DealAdmin(CrmModelAdmin):
         product = Output.objects.filter(
             deal=OuterRef('pk')
         ).values('id')
+        files = TheFile.objects.filter(
+            content_type=ContentType.objects.get_for_model(Deal),
+            object_id=OuterRef('pk')
+        ).values('id')
         kwargs = {
             'is_unanswered_email': Subquery(
                 newest.values('incoming')[:1]
@@ -256,9 +265,26 @@ class DealAdmin(CrmModelAdmin):
             'is_unanswered_inquiry': Subquery(
                 newest.values('inquiry')[:1]
             ),
+            # used if the newest email is an inquiry
+            'inquiry_date': Subquery(
+                newest.values('creation_date')[:1]
+            ),
+            'is_subsequent_inquiry': Subquery(
+                newest.values('request__subsequent')[:1]
+            ),
             'is_unread_chat': Exists(unread),
             'is_received_payment': Exists(received_payments),
             'is_no_product': ~Exists(product),
+            'has_files': Exists(files),
+            # precomputed values (see DealSummary)
+            'stqs_amount': F('summary__quality_score'),
+            'deal_count': Case(
+                When(
+                    Q(company__isnull=False) | Q(lead__isnull=False),
+                    then=F('summary__counterparty_deals')
+                ),
+            ),
+            'works_globally': F('department__department__works_globally'),
         }
         if settings.SHIPMENT_DATE_CHECK:
             today = get_today()
@@ -276,7 +302,10 @@ class DealAdmin(CrmModelAdmin):
             )
             kwargs['is_goods_shipped'] = F('stage__goods_shipped')
 
-        cl.result_list = cl.result_list.annotate(**kwargs)
+        cl.result_list = cl.result_list.select_related(
+            'stage', 'company__country', 'lead__country',
+            'owner__profile', 'co_owner__profile',
+        ).annotate(**kwargs)
         return cl
 
     def get_fieldsets(self, request, obj=None):
@@ -549,9 +578,10 @@ class DealAdmin(CrmModelAdmin):
             url += f"?{counterparty._meta.model_name}={counterparty.id}&active=all"  # NOQA
             name = getattr(
                 counterparty, 'thumbnail_full_name', None) or counterparty.full_name
-            if obj.department:
-
-                if obj.department_id in _thread_local.department_id:
+            if obj.department_id:
+                if hasattr(obj, 'works_globally'):
+                    works_globally = obj.works_globally
+                elif obj.department_id in _thread_local.department_id:
                     works_globally = _thread_local.department_id[obj.department_id]
                 else:
                     works_globally = Department.objects.get(
@@ -590,8 +620,11 @@ class DealAdmin(CrmModelAdmin):
     @staticmethod
     @admin.display(description='')
     def stqs(obj):
-        amount = obj.transactionqualityevent_set.aggregate(s=Sum("weight"))[
-            "s"]
+        if hasattr(obj, 'stqs_amount'):
+            amount = obj.stqs_amount
+        else:
+            amount = obj.transactionqualityevent_set.aggregate(s=Sum("weight"))[
+                "s"]
         if amount is not None:
             total = 100 + amount
             if total >= 95:
@@ -614,10 +647,14 @@ class DealAdmin(CrmModelAdmin):
     @admin.display(description='')
     def deal_counter(obj):
         counter = None
-        if obj.company:
-            counter = Deal.objects.filter(company=obj.company).count()
-        elif obj.lead:
-            counter = Deal.objects.filter(lead=obj.lead).count()
+        if getattr(obj, 'deal_count', None) is not None:
+            # annotation of the changelist queryset
+            counter = obj.deal_count
+        # the summary is not built yet (e.g. the deal is loaded by loaddata)
+        elif obj.company_id:
+            counter = Deal.objects.filter(company_id=obj.company_id).count()
+        elif obj.lead_id:
+            counter = Deal.objects.filter(lead_id=obj.lead_id).count()
 
         return mark_safe(
             deal_counter_icon.format(deal_counter_title, counter)
@@ -658,15 +695,8 @@ class DealAdmin(CrmModelAdmin):
     def marks(self, instance):
         icons, icon, days = '', '', 0
         if getattr(instance, 'is_unanswered_inquiry', False):
-            inquiry = CrmEmail.objects.filter(
-                deal=instance,
-                inquiry=True,
-                trash=False
-            ).order_by('-creation_date').annotate(
-                subsequent=F('request__subsequent')
-            ).values('creation_date', 'subsequent').first()
-            if not inquiry['subsequent']:
-                days = (timezone.now() - inquiry['creation_date']).days
+            if not instance.is_subsequent_inquiry:
+                days = (timezone.now() - instance.inquiry_date).days
             title = _(
                 'I have been waiting for an answer to my request for %d days') % days
             if days == 2:
@@ -711,10 +741,14 @@ class DealAdmin(CrmModelAdmin):
         obj.paid_amount = 0
         currency = obj.currency if obj.currency else ''
         if obj.amount:
-            paid_amount = Payment.objects.filter(
-                deal=obj,
-                status=Payment.RECEIVED
-            ).aggregate(amount=Sum('amount'))['amount']
+            paid_amount = DealSummary.objects.filter(
+                deal=obj
+            ).values_list('paid_amount', flat=True).first()
+            if paid_amount is None:
+                # the summary is not built yet
+                paid_amount = Payment.objects.filter(
+                    deal=obj, status=Payment.RECEIVED
+                ).aggregate(s=Sum('amount'))['s']
             if paid_amount:
                 obj.paid_amount = paid_amount
         return f"{obj.paid_amount} {currency}"
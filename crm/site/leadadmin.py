@@ -21,6 +21,7 @@ from crm.utils.admfilters import ByOwnerFilter
 from crm.utils.admfilters import IsDisqualifiedFilter
 from crm.utils.admfilters import TagFilter
 from crm.utils.check_city import check_city
+from crm.utils.deal_summary import update_counterparty_deals
 from crm.utils.helpers import get_email_domain
 from massmail.admin_actions import make_mailing_out
 from massmail.admin_actions import remove_vip_status
@@ -75,6 +76,7 @@ class LeadAdmin(CrmModelAdmin):
         'create_email',
         'avatar_preview'
     )
+    full_text_search = True
     search_fields = [
         'first_name',
         'last_name',
@@ -246,6 +248,7 @@ class LeadAdmin(CrmModelAdmin):
 
             Deal.objects.filter(lead=obj).update(
                 lead=None, contact=contact, company=contact.company)
+            update_counterparty_deals(company_ids=(contact.company_id,))
             Request.objects.filter(lead=obj).update(
                 lead=None, contact=contact, company=contact.company)
             CrmEmail.objects.filter(lead=obj).update(
@@ -153,6 +153,7 @@ class RequestAdmin(CrmModelAdmin):
         'the_city', 'loyalty', 'request_counter',
         'content_copy', 'mark_no_products'
     )
+    full_text_search = True
     search_fields = [
         'request_for', 'first_name',
         'last_name', 'email',
@@ -1,10 +1,8 @@
 
 import imaplib
 import os
-import sys
 import threading
 from datetime import datetime as dt
-from time import sleep
 from typing import Optional
 from django.conf import settings
 from django.contrib.sites.models import Site
@@ -13,41 +11,21 @@ from django.core.mail import mail_admins
 from massmail.models import EmailAccount
 
 
-if sys.platform != "win32":
-    import fcntl
-
-path = settings.MEDIA_ROOT / 'locks'
-sleep_time_sec = 0.03
-release_limit = int(60 / sleep_time_sec)    # 60 sec
-sleep_time_sec2 = 0.01
-lockfile_limit = int(20 / sleep_time_sec2)    # 20 sec
-
-
 class CrmIMAP:
 
     def __init__(self, email_host_user: str):
         # quick initialization
         self.email_host_user = email_host_user
-        self.locked = True
+        self.pool = None
+        self.last_used = None
 
     def check_box_status(self, box: str, upd_fields: list) -> tuple:
         """Return (changed, uid_validity)"""
         changed, uid_validity = False, True
-        names = "(UIDVALIDITY UIDNEXT)"
-        name_on_server = self.boxes[box]["name on server"]
-        result, data, _ = self._execute(
-            self.connection.status,
-            (name_on_server, names),
-            f"Exception at CrmIMAP.status ({box}, {names}."
-        )
-        if result != 'OK':
+        status_data = self.get_box_status(box)
+        if not status_data:
             return changed, uid_validity  # False, True
 
-        data_str = data[0].decode()
-        # '"INBOX" (UIDNEXT 11776 UIDVALIDITY 2)'
-        items = data_str.split("(")[1].split(")")[0].split(" ")
-        status_data = {items[0]: items[1], items[2]: items[3]}
-
         box = box.lower()
         uidnext = f"{box}_uidnext"
         uidvalidity = f"{box}_uidvalidity"
@@ -72,6 +50,7 @@ class CrmIMAP:
                 self.connection.logout()                # LOGOUT
             except imaplib.IMAP4.error:                 # NOQA
                 pass
+            self.connection = None
 
     def delete_emails(self, uids_str) -> None:
         """Move emails to 'Trash' box."""
@@ -81,6 +60,23 @@ class CrmIMAP:
         self._uid_copy(uids_str, 'Trash')
         self._uid_delete(uids_str)
 
+    def get_box_status(self, box: str, names: str = "(UIDVALIDITY UIDNEXT)") -> dict:
+        """Return the STATUS data items of the box,
+        e.g. {'UIDNEXT': '11776', 'UIDVALIDITY': '2'}, or {} on error."""
+        name_on_server = self.boxes[box]["name on server"]
+        result, data, _ = self._execute(
+            self.connection.status,
+            (name_on_server, names),
+            f"Exception at CrmIMAP.status ({box}, {names}."
+        )
+        if result != 'OK':
+            return {}
+
+        data_str = data[0].decode()
+        # '"INBOX" (UIDNEXT 11776 UIDVALIDITY 2)'
+        items = data_str.rsplit("(", 1)[1].split(")")[0].split(" ")
+        return dict(zip(items[::2], items[1::2]))
+
     def get_emails_by_message_id(self, message_id: str) -> tuple:
         """Return (result, data)"""
         result, data, _ = self._execute(
@@ -106,32 +102,6 @@ class CrmIMAP:
             return False
         return True
 
-    def lock(self) -> None:
-        """Lock this instance for other customers."""
-        if self.locked:
-            counter = release_limit
-            while self.locked:
-                sleep(sleep_time_sec)
-                counter -= 1
-                if not counter:
-                    n = release_limit * sleep_time_sec
-                    msg = f"The CrmIMAP.{self} was not released within {n} seconds"
-                    site = Site.objects.get_current()
-                    mail_admins(
-                        msg,
-                        f'''{msg}\n
-                        \nSite {site.domain}
-                        \nEmail account:_____{self.ea}
-                        \ncreate_time:_______{self.create_time}
-                        \nLast_Noop_time:___{self.noop_time}
-                        \nLast_request_time:_{self.last_request_time}
-                        \nException time:____{dt.now()}
-                        \nLog: \n{self._parse_log()}
-                        ''',
-                    )
-                    raise RuntimeError(msg)
-        self.locked = True
-
     def mark_emails_as_read(self, uids_str) -> None:
         result = self.select_box('INBOX')
         if result != 'OK':
@@ -156,10 +126,11 @@ class CrmIMAP:
         return result
 
     def release(self) -> None:
-        """Unlock this instance for other customers."""
+        """Return this instance to the pool for other customers."""
         if settings.REUSE_IMAP_CONNECTION:
-            self.locked = False
-        else:
+            if self.pool:
+                self.pool.release(self)
+        elif not self.pool or self.pool.discard(self):
             self.close_and_logout()
 
     def search(self, params: str) -> tuple:
@@ -195,34 +166,6 @@ class CrmIMAP:
             f'Exception at IMAP.uid FETCH {uid}'
         )
 
-    def _close_lockfile(self) -> None:
-        try:
-            if sys.platform == 'win32':
-                os.close(self.fd)
-                os.unlink(self.lockfile)
-            else:
-                fcntl.lockf(self.fp, fcntl.LOCK_UN)
-                if os.path.isfile(self.lockfile):
-                    os.unlink(self.lockfile)
-        except Exception as err:     # FileNotFoundError
-            msg = f"The lockfile of {self} was deleted already?"
-            site = Site.objects.get_current()
-            mail_admins(
-                msg,
-                f'''{msg}\n
-                \nException: {err} 
-                \nSite {site.domain}
-                \nThread: {threading.current_thread()}
-                \nProcess: {os.getpid()}\n                
-                \nEmail account:_____{self.ea}
-                \ncreate_time:_______{self.create_time}
-                \nLast_Noop_time:___{self.noop_time}
-                \nLast_request_time:_{self.last_request_time}
-                \nException time:____{dt.now()}
-                \nLog: \n{self._parse_log()}
-                ''',
-            )
-
     def _complete_init(self, boxes: dict, ea: EmailAccount):
         now = dt.now()
         self.boxes = boxes
@@ -231,7 +174,6 @@ class CrmIMAP:
         self.ea = ea
         self.error = None
         self.ea = ea
-        self.lockfile = path / f"{self.ea.imap_host}.lock"
         self.selected_box = None
         self.noop_time = None
         self.create_time = now
@@ -240,8 +182,6 @@ class CrmIMAP:
     def _execute(self, command,
                  params: Optional[tuple], msg: str) -> tuple:
         """Return (result, data, error)"""
-        if settings.REUSE_IMAP_CONNECTION:
-            self._open_lockfile()
         result = data = None
         try:
             if params:
@@ -255,9 +195,6 @@ class CrmIMAP:
         except Exception as err:
             self.error = err
             self._mail_admins(command, params, msg, result, data)
-
-        if settings.REUSE_IMAP_CONNECTION:
-            self._close_lockfile()
         return result, data, self.error
 
     def _expunge(self) -> tuple:
@@ -352,55 +289,6 @@ class CrmIMAP:
             fail_silently=True,
         )
 
-    def _open_lockfile(self) -> None:
-        counter = lockfile_limit
-        while counter:
-            if sys.platform == 'win32':
-                try:
-                    if os.path.exists(self.lockfile):
-                        os.unlink(self.lockfile)
-                    self.fd = os.open(
-                        self.lockfile, os.O_CREAT | os.O_EXCL | os.O_RDWR)
-                except OSError as err:
-                    _, e, _ = sys.exc_info()
-                    if e.errno == 13:
-                        pass
-                    print(err)
-                    raise
-                else:
-                    return
-
-            else:  # non Win32
-                self.fp = open(self.lockfile, 'w')
-                self.fp.flush()
-                try:
-                    fcntl.lockf(self.fp, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                except IOError:
-                    pass
-                else:
-                    return
-
-            sleep(sleep_time_sec2)
-            counter -= 1
-
-        n = lockfile_limit * sleep_time_sec2
-        msg = f"The lockfile of {self} was not released within {n} seconds"
-        site = Site.objects.get_current()
-        mail_admins(
-            msg,
-            f'''{msg}\n
-            \nThe connection will be restored automatically.\n
-            \nSite {site.domain}\n
-            Email account:_____{self.ea}\n
-            \ncreate_time:_______{self.create_time}\n
-            Last_Noop_time:___{self.noop_time}\n
-            Last_request_time:_{self.last_request_time}\n
-            Exception time:____{dt.now()}\n
-            \nLog: \n{self._parse_log()}
-            ''',
-        )
-        raise RuntimeError(msg)
-
     def _parse_log(self) -> str:
         if self.debug:
             log = ''
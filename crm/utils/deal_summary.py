@@ -0,0 +1,115 @@
+from django.db.models import Count
+from django.db.models import DecimalField
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models import Sum
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+
+from crm.models import Deal
+from crm.models import DealSummary
+from crm.models import Payment
+from quality.models import TransactionQualityEvent
+
+
+def update_paid_amounts(deal_ids) -> None:
+    """Recomputes the sums of received payments of the deals."""
+    create_missing_summaries(deal_ids)
+    set_paid_amounts(deal_ids)
+
+
+def set_paid_amounts(deal_ids) -> None:
+    paid = Payment.objects.filter(
+        deal=OuterRef('deal_id'),
+        status=Payment.RECEIVED
+    ).order_by().values('deal').annotate(s=Sum('amount')).values('s')
+    DealSummary.objects.filter(deal_id__in=deal_ids).update(
+        paid_amount=Coalesce(
+            Subquery(paid), Value(0), output_field=DecimalField()
+        )
+    )
+
+
+def update_quality_scores(deal_ids) -> None:
+    """Recomputes the transaction quality scores of the deals."""
+    create_missing_summaries(deal_ids)
+    set_quality_scores(deal_ids)
+
+
+def set_quality_scores(deal_ids) -> None:
+    score = TransactionQualityEvent.objects.filter(
+        deal=OuterRef('deal_id')
+    ).order_by().values('deal').annotate(s=Sum('weight')).values('s')
+    DealSummary.objects.filter(deal_id__in=deal_ids).update(
+        quality_score=Subquery(score)
+    )
+
+
+def update_counterparty_deals(company_ids=(), lead_ids=()) -> None:
+    """Recomputes the number of deals of the companies and leads.
+    The deals of a lead with a company are counted by the company."""
+    company_ids = {i for i in company_ids if i}
+    lead_ids = {i for i in lead_ids if i}
+    for field, ids, params in (
+            ('company', company_ids, {}),
+            ('lead', lead_ids, {'deal__company__isnull': True})
+    ):
+        if not ids:
+            continue
+        create_missing_summaries(
+            Deal.objects.filter(**{f'{field}_id__in': ids}).values_list('id', flat=True)
+        )
+        counts = dict(
+            Deal.objects.filter(**{f'{field}_id__in': ids}).order_by()
+            .values_list(field).annotate(c=Count('id'))
+        )
+        for counterparty_id in ids:
+            DealSummary.objects.filter(
+                **{f'deal__{field}_id': counterparty_id}, **params
+            ).update(counterparty_deals=counts.get(counterparty_id, 0))
+
+
+def rebuild_summaries(deal_ids) -> int:
+    """Creates the missing summaries of the deals and recomputes them."""
+    deals = list(
+        Deal.objects.filter(id__in=deal_ids).values_list(
+            'id', 'company_id', 'lead_id'
+        )
+    )
+    company_counts = dict(
+        Deal.objects.filter(
+            company_id__in={d[1] for d in deals if d[1]}
+        ).order_by().values_list('company').annotate(c=Count('id'))
+    )
+    lead_counts = dict(
+        Deal.objects.filter(
+            lead_id__in={d[2] for d in deals if d[2]}
+        ).order_by().values_list('lead').annotate(c=Count('id'))
+    )
+    summaries = [
+        DealSummary(
+            deal_id=deal_id,
+            counterparty_deals=company_counts.get(company_id) if company_id
+            else lead_counts.get(lead_id, 0)
+        )
+        for deal_id, company_id, lead_id in deals
+    ]
+    DealSummary.objects.bulk_create(summaries, ignore_conflicts=True)
+    DealSummary.objects.bulk_update(summaries, ['counterparty_deals'])
+    ids = [s.deal_id for s in summaries]
+    set_paid_amounts(ids)
+    set_quality_scores(ids)
+    return len(summaries)
+
+
+def create_missing_summaries(deal_ids) -> None:
+    """Builds the summaries of the deals that do not have them
+    (e.g. the deals created before DealSummary was added)."""
+    deal_ids = set(deal_ids)
+    missing = deal_ids - set(
+        DealSummary.objects.filter(
+            deal_id__in=deal_ids
+        ).values_list('deal_id', flat=True)
+    )
+    if missing:
+        rebuild_summaries(missing)
@@ -1,4 +1,5 @@
 import re
+from contextlib import contextmanager
 from datetime import datetime
 from datetime import timezone as tz
 from email.header import decode_header
@@ -12,9 +13,6 @@ from django import forms
 from django.apps import apps
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.handlers.wsgi import WSGIRequest
-from django.db.models import CharField
-from django.db.models import F
-from django.db.models import Value
 from django.utils import timezone
 from django.utils.html import strip_tags
 from django.utils.safestring import mark_safe, SafeString
@@ -24,9 +22,7 @@ from django.utils.translation import gettext_lazy
 from common.utils.helpers import USER_MODEL
 from crm.utils.crm_imap import CrmIMAP
 from massmail.models import EmailAccount
-from settings.models import BannedCompanyName
-from settings.models import PublicEmailDomain
-from settings.models import StopPhrase
+from settings.matchers import matchers
 
 NO_DEAL_AMOUNT_STR = gettext_lazy("No deal amount")
 PHONE_NUMBER_MSG = gettext_lazy("Unacceptable phone number value")
@@ -72,6 +68,24 @@ def get_crmimap(ea: EmailAccount, box: Optional[str] = None) -> Optional[CrmIMAP
     return app_config.mci.get_crmimap(ea, box)
 
 
+imap_busy_str = gettext_lazy(
+    "All connections to the mail server are busy. Please try again later."
+)
+
+
+@contextmanager
+def crmimap_connection(ea: EmailAccount, box: Optional[str] = None):
+    """Yields the connection of the email account (or None)
+    and releases it even if an exception is raised.
+    Raises TimeoutError if all connections of the account are busy."""
+    crmimap = get_crmimap(ea, box)
+    try:
+        yield crmimap
+    finally:
+        if crmimap:
+            crmimap.release()
+
+
 def get_email_date(msg: Message) -> datetime:
     if msg['Date']:
         eml_date = parsedate_to_datetime(msg['Date'])
@@ -91,7 +105,7 @@ def get_email_domain(email: str) -> str:
         domain = domain.lower()
     except IndexError:
         return ''
-    if PublicEmailDomain.objects.filter(domain=domain).exists():
+    if matchers.is_public_domain(domain):
         return ''
     return domain
 
@@ -160,19 +174,11 @@ def html2txt(html: str) -> str:
 
 
 def is_company_banned(data: dict) -> bool:
-    return BannedCompanyName.objects.annotate(
-        company=Value(data['company'], CharField())
-    ).filter(
-        company__icontains=F('name')
-    ).exists()
+    return matchers.find_banned_name(data['company']) is not None
 
 
 def is_text_relevant(txt: str) -> bool:
-    for sp in StopPhrase.objects.all():
-        if txt.find(sp.phrase) != -1:
-            sp.hit()
-            return False
-    return True
+    return matchers.find_stop_phrase(txt) is None
 
 
 def phone_number_check(phone: str) -> None:
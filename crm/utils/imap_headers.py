@@ -0,0 +1,170 @@
+import email
+import re
+from email.parser import BytesHeaderParser
+from typing import Optional
+from django.db.models import Max
+from django.db.models.query import QuerySet
+
+from crm.models import CrmEmail
+from crm.models import ImapHeader
+from crm.utils.crm_imap import CrmIMAP
+from crm.utils.helpers import ensure_decoding
+from crm.utils.helpers import get_email_date
+from massmail.models import EmailAccount
+
+HEADER_FIELDS = '(FLAGS BODY.PEEK[HEADER.FIELDS (SUBJECT FROM TO DATE DELIVERY-DATE)])'
+# Number of UIDs in one UID FETCH of the missing headers.
+FETCH_BATCH_SIZE = 500
+uid_re = re.compile(rb'UID (\d+)')
+
+
+def update_index(crmimap: CrmIMAP, box: str) -> Optional[str]:
+    """
+    Brings the header index of the box up to date using the box status:
+    the headers of the new UIDs are fetched, the headers of the removed
+    messages are deleted. Returns an error if any.
+    """
+    ea = crmimap.ea
+    status = crmimap.get_box_status(box, "(UIDVALIDITY UIDNEXT MESSAGES)")
+    if not status:
+        return str(crmimap.error or 'STATUS failed')
+    uidvalidity = int(status['UIDVALIDITY'])
+    headers = get_headers(ea, box)
+    # UIDs of the old UIDVALIDITY belong to other messages
+    headers.exclude(uidvalidity=uidvalidity).delete()
+
+    last_uid = headers.aggregate(Max('uid'))['uid__max'] or 0
+    if int(status['UIDNEXT']) > last_uid + 1:
+        # the whole box is new on the first visit
+        result, data, err = crmimap.search(f'UID {last_uid + 1}:*')
+        if result != 'OK':
+            return str(err or result)
+        # 'last_uid + 1:*' returns the last message even if its uid is lower
+        new_uids = [uid for uid in map(int, data[0].split()) if uid > last_uid]
+        err = fetch_uids(crmimap, box, uidvalidity, new_uids)
+        if err:
+            return err
+
+    if headers.count() != int(status['MESSAGES']):
+        # some messages have been removed (or not indexed)
+        result, data, err = crmimap.search('ALL')
+        if result != 'OK':
+            return str(err or result)
+        uids = set(map(int, data[0].split()))
+        indexed_uids = set(headers.values_list('uid', flat=True))
+        removed = list(indexed_uids - uids)
+        for i in range(0, len(removed), FETCH_BATCH_SIZE):
+            headers.filter(uid__in=removed[i:i + FETCH_BATCH_SIZE]).delete()
+        return fetch_uids(crmimap, box, uidvalidity, uids - indexed_uids)
+    return None
+
+
+def fetch_uids(crmimap: CrmIMAP, box: str, uidvalidity: int,
+               uids) -> Optional[str]:
+    """Adds the headers of the messages to the index
+    with one UID FETCH per FETCH_BATCH_SIZE uids."""
+    uids = sorted(uids)
+    for i in range(0, len(uids), FETCH_BATCH_SIZE):
+        err = fetch_headers(
+            crmimap, box, uidvalidity, get_uid_set(uids[i:i + FETCH_BATCH_SIZE])
+        )
+        if err:
+            return err
+    return None
+
+
+def fetch_headers(crmimap: CrmIMAP, box: str, uidvalidity: int,
+                  uid_set: bytes) -> Optional[str]:
+    """Adds the headers of the messages of the uid set to the index."""
+    result, data, err = crmimap.uid_fetch(uid_set, HEADER_FIELDS)
+    if result != 'OK':
+        return str(err or result)
+    parser = BytesHeaderParser(policy=email.policy.compat32)
+    headers = []
+    for i, item in enumerate(data or []):
+        if not isinstance(item, tuple):
+            continue
+        # FLAGS can follow the header literal
+        meta = item[0]
+        if i + 1 < len(data) and isinstance(data[i + 1], bytes):
+            meta += data[i + 1]
+        match = uid_re.search(meta)
+        if not match:
+            continue
+        msg = parser.parsebytes(item[1])
+        headers.append(ImapHeader(
+            email_account=crmimap.ea,
+            box=box,
+            uidvalidity=uidvalidity,
+            uid=int(match.group(1)),
+            seen=rb'\Seen' in meta,
+            date=get_date(msg),
+            subject=ensure_decoding(msg['Subject']) or '',
+            from_field=ensure_decoding(msg['From']) or '',
+            to=ensure_decoding(msg['To']) or '',
+        ))
+    ImapHeader.objects.bulk_create(headers, ignore_conflicts=True)
+    return None
+
+
+def update_flags(crmimap: CrmIMAP, headers: list) -> None:
+    """Refreshes the \\Seen flag of the displayed headers."""
+    if not headers:
+        return
+    result, data, _ = crmimap.uid_fetch(
+        get_uid_set([h.uid for h in headers]), '(FLAGS)'
+    )
+    if result != 'OK':
+        return
+    seen = {}
+    for item in data or []:
+        if isinstance(item, bytes):
+            match = uid_re.search(item)
+            if match:
+                seen[int(match.group(1))] = rb'\Seen' in item
+    changed = []
+    for header in headers:
+        if header.uid in seen and header.seen != seen[header.uid]:
+            header.seen = seen[header.uid]
+            changed.append(header)
+    ImapHeader.objects.bulk_update(changed, ['seen'])
+
+
+def get_headers(ea: EmailAccount, box: str) -> QuerySet:
+    return ImapHeader.objects.filter(email_account=ea, box=box)
+
+
+def get_imported_dates(ea: EmailAccount, headers: list) -> set:
+    """Returns the dates of the headers whose
+    incoming emails are already imported, in one query."""
+    dates = {h.date for h in headers if h.date}
+    if not dates:
+        return set()
+    return set(CrmEmail.objects.filter(
+        incoming=True,
+        email_host_user=ea.email_host_user,
+        creation_date__in=dates
+    ).values_list('creation_date', flat=True))
+
+
+def get_date(msg):
+    if msg['Date'] or msg['Delivery-date']:
+        try:
+            return get_email_date(msg)
+        except (TypeError, ValueError):
+            pass
+    return None
+
+
+def get_uid_set(uids: list) -> bytes:
+    """Returns the IMAP sequence set of the uids
+    with consecutive uids joined into ranges, e.g. b'100:200,205'."""
+    numbers = sorted(int(uid) for uid in uids)
+    ranges = []
+    start = prev = numbers[0]
+    for n in numbers[1:] + [None]:
+        if n != prev + 1:
+            ranges.append(f"{start}:{prev}" if prev != start else f"{start}")
+            start = n
+        prev = n
+    return ",".join(ranges).encode()
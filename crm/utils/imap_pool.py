@@ -0,0 +1,164 @@
+import threading
+from collections import deque
+from time import monotonic
+from typing import Optional
+from django.conf import settings
+
+
+class ImapPool:
+    """
+    Thread-safe pool of CrmIMAP connections of the email accounts.
+
+    At most IMAP_POOL_SIZE connections of an email account are in use
+    at a time. Customers waiting for a connection of an account
+    are served in order of arrival. A customer gets an idle connection
+    or the right to create a new one (see add and cancel methods).
+    """
+
+    def __init__(self, size: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.size = size or settings.IMAP_POOL_SIZE
+        self.timeout = timeout or settings.IMAP_POOL_TIMEOUT
+        self._cond = threading.Condition()
+        self._idle = {}         # email_host_user: [CrmIMAP, ...]
+        self._busy = {}         # email_host_user: {CrmIMAP, ...}
+        self._reserved = {}     # email_host_user: connections being created
+        self._waiters = {}      # email_host_user: deque of waiting customers
+        self.acquired_count = 0
+        self.wait_count = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+        self.timeout_count = 0
+        self.evicted_count = 0
+
+    def acquire(self, key: str):
+        """
+        Returns an idle connection of the email account or None
+        if a new connection may be created.
+        Raises TimeoutError if no connection is freed within the timeout.
+        """
+        ticket = object()
+        start = monotonic()
+        waited = False
+        with self._cond:
+            waiters = self._waiters.setdefault(key, deque())
+            waiters.append(ticket)
+            try:
+                while waiters[0] is not ticket or not self._is_available(key):
+                    remaining = self.timeout - (monotonic() - start)
+                    if remaining <= 0:
+                        self.timeout_count += 1
+                        raise TimeoutError(
+                            f"No IMAP connection of {key} was released "
+                            f"within {self.timeout} seconds"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+            finally:
+                waiters.remove(ticket)
+                self._cond.notify_all()
+
+            self.acquired_count += 1
+            if waited:
+                wait_time = monotonic() - start
+                self.wait_count += 1
+                self.wait_time += wait_time
+                self.max_wait_time = max(self.max_wait_time, wait_time)
+            idle = self._idle.get(key)
+            if idle:
+                crmimap = idle.pop()
+                crmimap.last_used = monotonic()
+                self._busy.setdefault(key, set()).add(crmimap)
+                return crmimap
+            self._reserved[key] = self._reserved.get(key, 0) + 1
+            return None
+
+    def add(self, crmimap) -> None:
+        """Adds the connection created in the reserved place as busy."""
+        key = crmimap.email_host_user
+        with self._cond:
+            self._reserved[key] -= 1
+            crmimap.last_used = monotonic()
+            self._busy.setdefault(key, set()).add(crmimap)
+
+    def cancel(self, key: str) -> None:
+        """Frees the place reserved for a connection that was not created."""
+        with self._cond:
+            self._reserved[key] -= 1
+            self._cond.notify_all()
+
+    def discard(self, crmimap) -> bool:
+        """Removes the busy connection from the pool.
+        Returns False if it was already released or discarded."""
+        with self._cond:
+            busy = self._busy.get(crmimap.email_host_user, set())
+            if crmimap not in busy:
+                return False
+            busy.remove(crmimap)
+            self._cond.notify_all()
+            return True
+
+    def evict_idle(self, max_idle: float) -> list:
+        """Removes the connections not used for max_idle seconds.
+        Returns them to be closed."""
+        now = monotonic()
+        evicted = []
+        with self._cond:
+            for idle in self._idle.values():
+                expired = [c for c in idle if now - c.last_used > max_idle]
+                for crmimap in expired:
+                    idle.remove(crmimap)
+                evicted.extend(expired)
+            self.evicted_count += len(evicted)
+            self._cond.notify_all()
+        return evicted
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            busy = sum(map(len, self._busy.values()))
+            busy += sum(self._reserved.values())
+            idle = sum(map(len, self._idle.values()))
+            return {
+                'busy': busy,
+                'idle': idle,
+                'waiting': sum(map(len, self._waiters.values())),
+                'utilization': busy / (busy + idle) if busy + idle else 0.0,
+                'acquired': self.acquired_count,
+                'waits': self.wait_count,
+                'wait_time': self.wait_time,
+                'max_wait_time': self.max_wait_time,
+                'timeouts': self.timeout_count,
+                'evicted': self.evicted_count,
+            }
+
+    def has_connections(self, key: str) -> bool:
+        with self._cond:
+            return bool(self._idle.get(key) or self._busy.get(key))
+
+    def release(self, crmimap) -> None:
+        """Returns the busy connection to the idle ones."""
+        key = crmimap.email_host_user
+        with self._cond:
+            busy = self._busy.get(key, set())
+            if crmimap in busy:
+                busy.remove(crmimap)
+                self._idle.setdefault(key, []).append(crmimap)
+                self._cond.notify_all()
+
+    def take_idle(self) -> list:
+        """Marks all idle connections as busy and returns them
+        (to keep them alive). The customers waiting for them
+        get them after they are released."""
+        with self._cond:
+            taken = []
+            for key, idle in self._idle.items():
+                self._busy.setdefault(key, set()).update(idle)
+                taken.extend(idle)
+                idle.clear()
+            return taken
+
+    def _is_available(self, key: str) -> bool:
+        if self._idle.get(key):
+            return True
+        in_use = len(self._busy.get(key, ())) + self._reserved.get(key, 0)
+        return in_use < self.size
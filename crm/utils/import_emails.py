@@ -1,9 +1,8 @@
 import email
+import re
 import time
 import threading
 from datetime import timedelta
-from email.parser import BytesHeaderParser
-from pathlib import Path
 from typing import Optional
 from django.apps import apps
 from django.conf import settings
@@ -13,57 +12,102 @@ from django.core.paginator import InvalidPage
 from django.core.paginator import Paginator
 from django.utils import timezone
 from django.utils.translation import gettext 
+from django.utils.html import escape
 from django.utils.safestring import mark_safe
 from django.urls import reverse
 
 from common.utils.helpers import popup_window
 from crm.models import CrmEmail
+from crm.utils import imap_headers
 from crm.utils.crm_imap import CrmIMAP
-from crm.utils.helpers import ensure_decoding
+from crm.utils.helpers import crmimap_connection
 from crm.utils.helpers import get_crmimap
+from crm.utils.helpers import imap_busy_str
 from crm.utils.helpers import get_email_date
 from crm.utils.helpers import get_uid_data
+from crm.utils.imap_headers import get_uid_set
 from massmail.models import EmailAccount
 
 app_config = apps.get_app_config('crm')
 control_period = timedelta(seconds=120)
+# The import lag of the accounts is mailed to the admins this often.
+LAG_REPORT_PERIOD = 24 * 60 * 60     # seconds
+uid_re = re.compile(rb'UID (\d+)')
 
 
 class ImportEmails(threading.Thread):
+    """Imports emails of the email accounts from the ea_queue.
+    Several instances share the queue (IMAP_IMPORT_WORKERS),
+    and an account is imported by one of them at a time."""
+
+    in_progress = set()
+    lag = {}
+    lock = threading.Lock()
+    report_time = time.monotonic()
 
     def __init__(self, ea_queue, eml_queue): 
         threading.Thread.__init__(self)
         self.daemon = True
         self.close = False
-        self.crmimap_storage = app_config.mci.crmimap_storage
+        self.imap_pool = app_config.mci.pool
         self.ea_queue = ea_queue
         self.eml_queue = eml_queue
 
+    @classmethod
+    def get_lag(cls) -> dict:
+        """Returns the highest UID seen on the server and the last
+        imported UID of every box of the email accounts."""
+        with cls.lock:
+            return {k: dict(v) for k, v in cls.lag.items()}
+
+    @classmethod
+    def report_lag(cls, force: bool = False) -> str:
+        """Mails the import lag of the accounts to the admins once
+        per LAG_REPORT_PERIOD. Returns the report or an empty string
+        if it is not due."""
+        with cls.lock:
+            if not force and \
+                    time.monotonic() - cls.report_time < LAG_REPORT_PERIOD:
+                return ''
+            cls.report_time = time.monotonic()
+        lag = cls.get_lag()
+        if not lag:
+            return ''
+        report_str = '\n'.join(
+            f"{account} {t}: highest UID {data['highest_uid']}, "
+            f"imported UID {data['imported_uid']}, lag {data['lag']}"
+            for account, boxes in sorted(lag.items())
+            for t, data in sorted(boxes.items())
+        )
+        mail_admins('ImportEmails lag', report_str, fail_silently=True)
+        return report_str
+
     def send(self, user):
         eas = EmailAccount.objects.filter(
             do_import=True, owner=user,
         )
         for ea in eas:
             if not settings.REUSE_IMAP_CONNECTION or \
-                    ea.email_host_user not in self.crmimap_storage:
+                    not self.imap_pool.has_connections(ea.email_host_user):
                 if ea not in list(self.ea_queue.queue):
                     self.ea_queue.put(ea)
 
     def run(self):
-        if not settings.TESTING:
-            path = Path(settings.MEDIA_ROOT / 'locks')
-            try:
-                path.mkdir(mode=0o775)
-            except FileExistsError:
-                for child in path.glob('*'):
-                    child.unlink()
         crmimap = ea = None
         while True:
             try:
                 if crmimap:
                     crmimap.release()
                     crmimap = None
+                if ea:
+                    with self.lock:
+                        self.in_progress.discard(ea.id)
                 ea = self.ea_queue.get()
+                with self.lock:
+                    if ea.id in self.in_progress:
+                        ea = None
+                        continue
+                    self.in_progress.add(ea.id)
                 if not settings.TESTING:
                     # To prevent hit the db until the apps.ready() is completed.
                     time.sleep(1)
@@ -100,23 +144,13 @@ class ImportEmails(threading.Thread):
                         # result <class 'list'>: [b'[CANNOT] Unsupported search criterion:
                         # SENTSINCE 08-MAY-2020 FLAGGED']
                         uids = data[0].split()
+                        self.set_lag(ea, t, uids)
                         if not uids:
                             continue
 
-                        for i, uid in enumerate(uids):
-                            result, data, e = crmimap.uid_fetch(uid)
-                            if result != 'OK' or not data[0]:
-                                continue
-
-                            b_msg = parse_message_bytes(uid, data)
-                            if not b_msg:
-                                result, data, err = crmimap.uid_fetch(uid)
-                                if result != 'OK' or not data[0]:
-                                    continue
-                                b_msg = parse_message_bytes(uid, data)
-                                if not b_msg:
-                                    continue
-
+                        # the emails are saved in uid order (see EmlQueue)
+                        uids = sorted(uids, key=int)[:settings.IMAP_IMPORT_LIMIT]
+                        for b_msg, uid in fetch_messages(crmimap, uids):
                             if not uid_validity:
                                 email_message = email.message_from_bytes(
                                     b_msg, policy=email.policy.default)
@@ -127,93 +161,105 @@ class ImportEmails(threading.Thread):
                                     continue
 
                             self.eml_queue.put((b_msg, ea, t, uid, '', None))
-                            if i == 50:
-                                break
 
                     ea.last_import_dt = timezone.now()
                     upd_fields.append('last_import_dt')
                     ea.save(update_fields=upd_fields)
+                    self.report_lag()
 
             except Exception as e:
+                lag = self.get_lag().get(getattr(ea, 'email_host_user', ''))
                 mail_admins(
                     'ImportEmails Exception',
-                    f'\nEmail account: {ea}\nException: {e}',
+                    f'\nEmail account: {ea}\nException: {e}'
+                    f'\nLag: {lag}',
                     fail_silently=True,
                 )
 
+    def set_lag(self, ea: EmailAccount, t: str, uids: list) -> None:
+        """Stores the highest UID found and the last imported UID."""
+        imported_uid = getattr(ea, f"start_{t}_uid") - 1
+        highest_uid = max(map(int, uids)) if uids else imported_uid
+        with self.lock:
+            self.lag.setdefault(ea.email_host_user, {})[t] = {
+                'highest_uid': highest_uid,
+                'imported_uid': imported_uid,
+                'lag': len(uids),
+            }
 
-def get_email_headers_page(ea: EmailAccount, page_num) -> tuple:
-    unseen_list, emails, uids_str, err = [], [], '', ''
-    page = paginator = None
-    per_page = 40
-    if not settings.TESTING:
-        crmimap = get_crmimap(ea, 'INBOX')
-        if crmimap.error:
-            crmimap.release()
-            return page, crmimap.error
 
-        # Unfortunately, the SORT command is not supported by all servers
-        # result, data = imap.uid('SORT', '(REVERSE ARRIVAL)', 'UTF-8', 'All')
-        result, data, err = crmimap.search('UNSEEN')
-        if result != 'OK':
-            crmimap.release()
-            return data, err
-        if data:
-            unseen_list = data[0].split()
-        result, data, err = crmimap.search('All')
+def fetch_messages(crmimap: CrmIMAP, uids: list):
+    """Yields (message bytes, uid) of the messages fetched
+    with one UID FETCH per IMAP_FETCH_BATCH_SIZE uids."""
+    size = settings.IMAP_FETCH_BATCH_SIZE
+    for i in range(0, len(uids), size):
+        batch = uids[i:i + size]
+        result, data, e = crmimap.uid_fetch(get_uid_set(batch))
+        messages = parse_messages(data) if result == 'OK' and data else {}
+        for uid in batch:
+            b_msg = messages.get(int(uid))
+            if not b_msg:
+                # fetch the message separately
+                result, data, err = crmimap.uid_fetch(uid)
+                if result != 'OK' or not data[0]:
+                    continue
+                b_msg = parse_message_bytes(uid, data)
+                if not b_msg:
+                    continue
+            yield b_msg, uid
 
-        if result != 'OK':
-            crmimap.release()
-            return data, err
-        if data:
-            if data != [b'']:
-                uid_list = data[0].split()
-                uid_list.sort(key=lambda x: int(x), reverse=True)
-            else:
-                uid_list = []
-            paginator = Paginator(uid_list, per_page)
-            try:
-                page = paginator.get_page(page_num + 1)  # uids
-            except (EmptyPage, InvalidPage):
-                page = paginator.page(paginator.num_pages)
-            uids_str = b','.join(page)
 
-        if uids_str:
-            result, data, err = crmimap.uid_fetch(uids_str, '(BODY.PEEK[HEADER])')
-            crmimap.release()
-            if result == 'OK' and data:
-                # emails = []
-                parser = BytesHeaderParser(policy=email.policy.compat32)
-                for item in data:
-                    if isinstance(item, tuple):
-                        uid = item[0].split(b'UID ')[1].split()[0]
-                        msg = parser.parsebytes(item[1])
-                        subject = ensure_decoding(msg["Subject"])
-                        subject = subject if subject else gettext('No subject')
-                        date = get_email_date(msg)
-                        url = reverse('view_original_email_uid', args=(ea.id, int(uid)))
-                        win_id = 'Window' + uid.decode()
-                        onclick = popup_window(url, win_id)
-                        subject_str = mark_safe(
-                            f'<a href="#" onClick="{onclick}">{subject}</a>'
-                        )
-                        is_exists = CrmEmail.objects.filter(
-                            incoming=True,
-                            creation_date=date,
-                            email_host_user=ea.email_host_user
-                        ).exists()
-                        emails.append({
-                            'subject': subject_str,
-                            'from': ensure_decoding(msg['From']),
-                            'to': ensure_decoding(msg['To']),
-                            'date': date,
-                            'uid': int(uid),
-                            'is_exists': is_exists,
-                            'unseen': uid in unseen_list
-                        })
-                    emails.sort(key=lambda x: x['uid'], reverse=True)
-            else:
-                crmimap.release()
+def parse_messages(data: list) -> dict:
+    """Returns {uid: message bytes} from the UID FETCH (RFC822) response."""
+    messages = {}
+    for item in data:
+        if type(item) is tuple and b'RFC822' in item[0]:
+            match = uid_re.search(item[0])
+            if match and isinstance(item[1], bytes):
+                messages[int(match.group(1))] = item[1]
+    return messages
+
+
+def get_email_headers_page(ea: EmailAccount, page_num) -> tuple:
+    """Returns the page of the INBOX headers from the header index
+    updated by the box status, and an error if any."""
+    emails, err = [], ''
+    per_page = 40
+    if not settings.TESTING:
+        try:
+            with crmimap_connection(ea, 'INBOX') as crmimap:
+                if crmimap.error:
+                    return None, crmimap.error
+                err = imap_headers.update_index(crmimap, 'INBOX')
+                if err:
+                    return None, err
+                paginator = Paginator(
+                    imap_headers.get_headers(ea, 'INBOX').order_by('-uid'), per_page
+                )
+                try:
+                    page = paginator.get_page(page_num + 1)
+                except (EmptyPage, InvalidPage):
+                    page = paginator.page(paginator.num_pages)
+                headers = list(page.object_list)
+                imap_headers.update_flags(crmimap, headers)
+        except TimeoutError:
+            return None, str(imap_busy_str)
+        imported_dates = imap_headers.get_imported_dates(ea, headers)
+        for header in headers:
+            url = reverse('view_original_email_uid', args=(ea.id, header.uid))
+            onclick = popup_window(url, f'Window{header.uid}')
+            subject = header.subject or gettext('No subject')
+            emails.append({
+                'subject': mark_safe(
+                    f'<a href="#" onClick="{onclick}">{escape(subject)}</a>'
+                ),
+                'from': header.from_field,
+                'to': header.to,
+                'date': header.date,
+                'uid': header.uid,
+                'is_exists': header.date in imported_dates,
+                'unseen': not header.seen
+            })
     else:
         paginator = Paginator([], per_page)
         page = paginator.get_page(page_num + 1)
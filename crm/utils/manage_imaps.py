@@ -5,6 +5,7 @@ from datetime import timedelta
 from random import random
 from time import sleep
 from typing import Optional
+from django.apps import apps
 from django.conf import settings
 from django.contrib.sites.models import Site
 from django.core.mail import mail_admins
@@ -12,14 +13,15 @@ from django.core.mail import mail_admins
 from crm.settings import IMAP_CONNECTION_IDLE
 from crm.settings import IMAP_NOOP_PERIOD
 from crm.utils.crm_imap import CrmIMAP
+from crm.utils.imap_pool import ImapPool
 from massmail.models import EmailAccount
 
 delta_period = timedelta(seconds=30)
-idle_period = timedelta(days=IMAP_CONNECTION_IDLE)
+idle_period = IMAP_CONNECTION_IDLE * 60     # seconds
 
 
 class CrmImapManager(threading.Thread):
-    """Create and manage CrmIMAP objects."""
+    """Create and manage CrmIMAP objects in the pool."""
 
     def __init__(self, ea_queue): 
         threading.Thread.__init__(self)
@@ -27,7 +29,7 @@ class CrmImapManager(threading.Thread):
         self.boxes_storage = {}
         self.close = False
         self.ea_queue = ea_queue
-        self.crmimap_storage = {}
+        self.pool = ImapPool()
 
     def get_crmimap(self, ea: EmailAccount, 
                     box: Optional[str] = None) -> Optional[CrmIMAP]:
@@ -41,63 +43,82 @@ class CrmImapManager(threading.Thread):
                 sleep(s)
                 self._keep_in_touch()
     
-    def _create_crmimap(self, ea: EmailAccount) -> Optional[CrmIMAP]:
+    def _create_crmimap(self, ea: EmailAccount, pooled: bool = True) -> Optional[CrmIMAP]:
+        """Creates a connection in the place reserved in the pool
+        or, if not pooled, a connection closed on release."""
         crmimap = CrmIMAP(ea.email_host_user)
-        if ea.email_host_user not in self.crmimap_storage:
-            if settings.REUSE_IMAP_CONNECTION:
-                self.crmimap_storage[ea.email_host_user] = crmimap
-            boxes = self.boxes_storage.get(ea.email_host_user)
+        if pooled:
+            crmimap.pool = self.pool
+        boxes = self.boxes_storage.get(ea.email_host_user)
+        try:
             crmimap.get_in(boxes, ea)
-            if not crmimap.error:
-                if not boxes:
-                    self.boxes_storage[ea.email_host_user] = crmimap.boxes
-        else:
-            crmimap = self.crmimap_storage.get(ea.email_host_user)
+        except Exception:
+            if pooled:
+                self.pool.cancel(ea.email_host_user)
+            raise
+        if not crmimap.error:
+            if not boxes:
+                self.boxes_storage[ea.email_host_user] = crmimap.boxes
+        if pooled:
+            self.pool.add(crmimap)
         crmimap.last_request_time = dt.now()
         return crmimap
 
     def _del_crmimap(self, crmimap: CrmIMAP) -> None:
-        del self.crmimap_storage[crmimap.email_host_user]
+        self.pool.discard(crmimap)
         crmimap.close_and_logout()
 
     def _get_crmimap(self, ea: EmailAccount) -> Optional[CrmIMAP]:
-        crmimap = None
-        if settings.REUSE_IMAP_CONNECTION:
-            crmimap = self.crmimap_storage.get(ea.email_host_user)
-            if crmimap:
-                crmimap.lock()
-                if not crmimap.error:
-                    crmimap.last_request_time = dt.now()
-                    result = crmimap.noop()
-                    if result != 'OK' or crmimap.error:
-                        self._del_crmimap(crmimap)
-                        crmimap = None
-                else:
-                    self._del_crmimap(crmimap)
-                    crmimap = None
-        return crmimap
+        """Returns a working idle connection or None if a new one
+        is to be created. Waits while all connections are busy."""
+        while crmimap := self.pool.acquire(ea.email_host_user):
+            if not crmimap.error:
+                crmimap.last_request_time = dt.now()
+                result = crmimap.noop()
+                if result == 'OK' and not crmimap.error:
+                    return crmimap
+            self._del_crmimap(crmimap)
+        return None
 
     def _get_or_create_crmimap(self, ea: EmailAccount, 
                                box: Optional[str]) -> Optional[CrmIMAP]:
-        crmimap = self._get_crmimap(ea) or self._create_crmimap(ea)
+        if not settings.REUSE_IMAP_CONNECTION:
+            # the connections are not kept, so they are not limited
+            crmimap = self._create_crmimap(ea, pooled=False)
+            if not crmimap.error and box:
+                crmimap.select_box(box)
+            return crmimap
+        try:
+            crmimap = self._get_crmimap(ea) or self._create_crmimap(ea)
+        except TimeoutError as err:
+            site = Site.objects.get_current()
+            mail_admins(
+                str(err),
+                f"""{err}\n
+                \nSite {site.domain}
+                \nEmail account: {ea}
+                \nPool: {self.pool.get_stats()}
+                \nImport lag: {get_import_lag(ea)}
+                \nException time: {dt.now()}
+                """,
+                fail_silently=True,
+            )
+            raise
         if crmimap and not crmimap.error and box:
             crmimap.select_box(box)
         return crmimap
 
     def _keep_in_touch(self) -> None:
         while True:
-            key_list = list(self.crmimap_storage.keys())
-            for key in key_list:
-                value = getattr(self.crmimap_storage.get(key, None), 'locked')
-                if value is False:
-                    self.crmimap_storage[key].locked = True
-                    self._serve_crmimap(key)
+            for crmimap in self.pool.evict_idle(idle_period):
+                crmimap.close_and_logout()
+            for crmimap in self.pool.take_idle():
+                self._serve_crmimap(crmimap)
 
             sleep(IMAP_NOOP_PERIOD)
 
-    def _serve_crmimap(self, key) -> None:
+    def _serve_crmimap(self, crmimap: CrmIMAP) -> None:
         try:
-            crmimap = self.crmimap_storage[key]
             now = dt.now()
             request_time_delta = now - crmimap.last_request_time
             if crmimap.noop_time:
@@ -112,11 +133,12 @@ class CrmImapManager(threading.Thread):
                 result = crmimap.noop()
                 if result != 'OK':
                     self._del_crmimap(crmimap)
-                    crmimap = self._create_crmimap(ea)
+                    crmimap = self._get_or_create_crmimap(ea, None)
 
             crmimap.release()
             self.ea_queue.put(ea)
         except Exception as err:  # FIXME: remove after a while
+            self.pool.discard(crmimap)
             site = Site.objects.get_current()
             mail_admins(
                 "Exception CrmImapManager._serve_crmimap()",
@@ -127,3 +149,7 @@ class CrmImapManager(threading.Thread):
                 \nProcess: {os.getpid()}\n
                 """
             )        
+
+
+def get_import_lag(ea: EmailAccount) -> Optional[dict]:
+    return apps.get_app_config('crm').get_import_lag().get(ea.email_host_user)
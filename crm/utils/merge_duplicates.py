@@ -0,0 +1,307 @@
+import re
+from collections import defaultdict
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import Min
+from django.db.models import Model
+
+from common.models import TheFile
+from crm.models import Company
+from crm.models import Contact
+from crm.models import Deal
+from crm.models import Lead
+from crm.models.country import City
+from crm.utils.deal_summary import update_counterparty_deals
+from massmail.models import MailingOutRecipient
+from massmail.models import MassContact
+
+# The empty fields of the original are filled in from the duplicates.
+MERGE_FIELDS = {
+    Company: {
+        'fields': [
+            'address',
+            'city_name',
+            'city',
+            'country',
+            'description',
+            'email',
+            'full_name',
+            'lead_source',
+            'phone',
+            'registration_number',
+            'type',
+            'was_in_touch',
+            'website',
+        ],
+        'm2m_fields': ['industry', 'tags']
+    },
+    Contact: {
+        'fields': [
+            'address',
+            'birth_date',
+            'city_name',
+            'city',
+            'company',
+            'country',
+            'description',
+            'email',
+            'first_name',
+            'last_name',
+            'lead_source',
+            'middle_name',
+            'mobile',
+            'other_phone',
+            'phone',
+            'secondary_email',
+            'sex',
+            'title',
+            'token',
+            'was_in_touch',
+        ],
+        'm2m_fields': ['tags']
+    },
+    Lead: {
+        'fields': [
+            'address',
+            'birth_date',
+            'city_name',
+            'city',
+            'company_address',
+            'company_email',
+            'company_name',
+            'company_phone',
+            'country',
+            'description',
+            'email',
+            'first_name',
+            'last_name',
+            'lead_source',
+            'middle_name',
+            'mobile',
+            'other_phone',
+            'phone',
+            'secondary_email',
+            'sex',
+            'title',
+            'type',
+            'was_in_touch',
+            'website'
+        ],
+        'm2m_fields': ['industry', 'tags']
+    },
+    City: {
+        'fields': [
+            'name',
+            'alternative_names',
+            'country'
+        ],
+        'm2m_fields': []
+    },
+}
+
+
+def merge_duplicates(original: Model, duplicates) -> int:
+    """
+    Merges the duplicates into the original object in one transaction.
+    The objects related to the duplicates are moved to the original
+    with one UPDATE per relation, then the duplicates are deleted
+    one by one so that their delete() removes their files (e.g. logo).
+    Returns the number of merged duplicates.
+    """
+    model = original.__class__
+    duplicates = [d for d in duplicates if d.id != original.id]
+    if not duplicates:
+        return 0
+    ids = [d.id for d in duplicates]
+    with transaction.atomic():
+        relate_to(model, original.id, ids)
+        update_fields(original, duplicates)
+        for duplicate in model.objects.filter(id__in=ids):
+            duplicate.delete()
+        MassContact.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            object_id__in=ids,
+        ).delete()
+    return len(ids)
+
+
+def relate_to(model, original_id: int, duplicate_ids: list) -> None:
+    """Moves the objects related to the duplicates to the original."""
+    content_type = ContentType.objects.get_for_model(model)
+    for related_model, field in get_relations(model):
+        related_model.objects.filter(
+            **{f'{field}__in': duplicate_ids}
+        ).update(**{field: original_id})
+        if related_model == Deal and field in ('company', 'lead'):
+            update_counterparty_deals(**{f'{field}_ids': (original_id,)})
+
+    recipients = MailingOutRecipient.objects.filter(
+        content_type=content_type
+    )
+    # the original is already a recipient of these mailing outs
+    recipients.filter(
+        object_id__in=duplicate_ids,
+        mailing_out__recipients__object_id=original_id
+    ).delete()
+    # several duplicates are recipients of the same mailing out
+    duplicate_recipients = recipients.filter(object_id__in=duplicate_ids)
+    kept_ids = list(
+        duplicate_recipients.values('mailing_out').annotate(
+            kept_id=Min('id')
+        ).values_list('kept_id', flat=True)
+    )
+    duplicate_recipients.exclude(id__in=kept_ids).delete()
+    duplicate_recipients.update(object_id=original_id)
+
+    TheFile.objects.filter(
+        content_type=content_type,
+        object_id__in=duplicate_ids
+    ).update(object_id=original_id)
+
+
+def get_relations(model) -> list:
+    """Returns (model, field name) of the foreign keys to the model."""
+    return [
+        (rel.related_model, rel.field.name)
+        for rel in model._meta.related_objects
+        if rel.one_to_many and rel.field.concrete
+    ]
+
+
+def update_fields(original: Model, duplicates: list) -> None:
+    """Fills in the empty fields of the original from the duplicates."""
+    model = original.__class__
+    data = MERGE_FIELDS[model]
+    for duplicate in duplicates:
+        for f in data['fields']:
+            if not getattr(original, f) and getattr(duplicate, f):
+                setattr(original, f, getattr(duplicate, f))
+
+    # Add the names of the duplicate cities to alternative_names
+    if model == City:
+        alt_names_str = original.alternative_names
+        current_names = [n.strip() for n in alt_names_str.split(',') if n.strip()]
+        for duplicate in duplicates:
+            # Check if duplicate name already exists (case-insensitive)
+            duplicate_name = duplicate.name.strip()
+            if duplicate_name.lower() == original.name.strip().lower():
+                continue
+            if not any(n.lower() == duplicate_name.lower() for n in current_names):
+                current_names.append(duplicate_name)
+        original.alternative_names = ", ".join(current_names)
+
+    original.save()
+    ids = [d.id for d in duplicates]
+    for f in data['m2m_fields']:
+        field = model._meta.get_field(f)
+        objects = field.related_model.objects.filter(
+            **{f'{field.related_query_name()}__in': ids}
+        ).distinct()
+        getattr(original, f).add(*objects)
+
+
+def find_duplicates(model) -> list:
+    """
+    Returns the groups of ids of likely duplicates of the model objects.
+    Objects are grouped if they share a normalized email, phone number
+    or name. Company, Contact and Lead objects are compared
+    within a department, cities within a country.
+    """
+    get_keys = KEY_FUNCTIONS[model]
+    parents = {}
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    first_ids = {}
+    queryset = model.objects.order_by('id').values(*KEY_FIELDS[model])
+    for values in queryset.iterator(chunk_size=2000):
+        obj_id = values['id']
+        parents[obj_id] = obj_id
+        for key in get_keys(values):
+            first_id = first_ids.setdefault(key, obj_id)
+            if first_id != obj_id:
+                root, other = find(first_id), find(obj_id)
+                if root != other:
+                    parents[max(root, other)] = min(root, other)
+
+    groups = defaultdict(list)
+    for obj_id in parents:
+        groups[find(obj_id)].append(obj_id)
+    return [ids for ids in groups.values() if len(ids) > 1]
+
+
+def normalize(value: str) -> str:
+    return re.sub(r'\W+', '', value or '').casefold()
+
+
+def get_email_keys(scope, *emails) -> list:
+    keys = []
+    for value in emails:
+        for email in (value or '').split(','):
+            email = email.strip().lower()
+            if email:
+                keys.append((scope, 'email', email))
+    return keys
+
+
+def get_phone_keys(scope, *phone_keys) -> list:
+    return [(scope, 'phone', key) for key in phone_keys if key]
+
+
+def get_company_keys(values: dict) -> list:
+    scope = values['department_id']
+    keys = get_email_keys(scope, values['email'])
+    keys.extend(get_phone_keys(scope, values['phone_key']))
+    name = normalize(values['full_name'])
+    if name:
+        keys.append((scope, 'name', name))
+    return keys
+
+
+def get_person_keys(values: dict, company: str) -> list:
+    scope = values['department_id']
+    keys = get_email_keys(scope, values['email'], values['secondary_email'])
+    keys.extend(get_phone_keys(
+        scope, values['phone_key'], values['other_phone_key'], values['mobile_key']
+    ))
+    # the first name alone is not enough to identify a person
+    last_name = normalize(values['last_name'])
+    if last_name:
+        name = (normalize(values['first_name']), last_name, company)
+        keys.append((scope, 'name', name))
+    return keys
+
+
+def get_contact_keys(values: dict) -> list:
+    return get_person_keys(values, values['company_id'])
+
+
+def get_lead_keys(values: dict) -> list:
+    return get_person_keys(values, normalize(values['company_name']))
+
+
+def get_city_keys(values: dict) -> list:
+    name = normalize(values['name'])
+    return [(values['country_id'], 'name', name)] if name else []
+
+
+PERSON_FIELDS = (
+    'id', 'department_id', 'email', 'secondary_email', 'first_name',
+    'last_name', 'phone_key', 'other_phone_key', 'mobile_key'
+)
+KEY_FIELDS = {
+    Company: ('id', 'department_id', 'email', 'phone_key', 'full_name'),
+    Contact: PERSON_FIELDS + ('company_id',),
+    Lead: PERSON_FIELDS + ('company_name',),
+    City: ('id', 'country_id', 'name'),
+}
+KEY_FUNCTIONS = {
+    Company: get_company_keys,
+    Contact: get_contact_keys,
+    Lead: get_lead_keys,
+    City: get_city_keys,
+}
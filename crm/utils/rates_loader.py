@@ -1,5 +1,7 @@
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from datetime import timedelta
 from tendo.singleton import SingleInstance
 from django.conf import settings
@@ -15,6 +17,13 @@ from crm.models import Payment
 from crm.models import Rate
 
 
+# Number of concurrent requests to the rates API.
+RATES_LOADER_WORKERS = 4
+# Rates fetched and saved at a time.
+RATES_BATCH_SIZE = 20
+# Pause of a worker after a request to avoid overloading the API.
+RATES_REQUEST_DELAY = 0 if settings.TESTING else 0.5     # seconds
+
 BACKEND = ""
 if settings.LOAD_RATE_BACKEND:
     BACKEND = import_string(settings.LOAD_RATE_BACKEND)
@@ -81,45 +90,89 @@ def get_rates(marketing_currency: Currency, backend=BACKEND) -> None:
             currency.rate_to_state_currency = rate_to_state_currency
             currency.rate_to_marketing_currency = rate_to_marketing_currency
             currency.save()
-        time.sleep(0.5)
+        time.sleep(RATES_REQUEST_DELAY)
+
+    load_missing_rates(marketing_currency, now.date(), backend)
+
 
+def load_missing_rates(marketing_currency: Currency, today: date, backend=BACKEND) -> int:
+    """
+    Loads the official rates of all received payments made before today
+    that do not have them. The (currency, date) pairs are found with one
+    query, fetched concurrently and saved in bulk.
+    Returns the number of the saved rates.
+    """
     rates = Rate.objects.filter(
         currency=OuterRef('currency'),
         payment_date=OuterRef('payment_date'),
         rate_type=Rate.OFFICIAL
     )
-    while True:
-        payment = Payment.objects.filter(
-            payment_date__lt=now.date(),
-            status=Payment.RECEIVED
-        ).annotate(
-            rate=Exists(rates)
-        ).filter(rate=False).first()
-        if not payment:
-            break
-        currency = payment.currency
-        payment_date = payment.payment_date
-        be = backend(
-            currency.name,
-            marketing_currency.name,
-            payment_date
-        )
-        rate_to_state_currency, rate_to_marketing_currency, error = be.get_rates()
-        if error:
-            break
-        try:
-            r = Rate.objects.get(
-                currency=currency,
-                payment_date=payment_date,
-            )
-        except Rate.DoesNotExist:
-            r = Rate(
-                currency=currency,
-                payment_date=payment_date,
-            )
-        r.rate_to_state_currency = rate_to_state_currency
-        r.rate_to_marketing_currency = rate_to_marketing_currency
-        r.rate_type = Rate.OFFICIAL
-        r.save()
+    pairs = list(Payment.objects.filter(
+        payment_date__lt=today,
+        status=Payment.RECEIVED
+    ).annotate(
+        rate=Exists(rates)
+    ).filter(rate=False).values_list(
+        'currency_id', 'currency__name', 'payment_date'
+    ).distinct().order_by('payment_date', 'currency_id'))
+
+    def fetch(pair: tuple) -> tuple:
+        _, currency_name, payment_date = pair
+        be = backend(currency_name, marketing_currency.name, payment_date)
+        result = be.get_rates()
+        time.sleep(RATES_REQUEST_DELAY)
+        return result
+
+    number = 0
+    with ThreadPoolExecutor(max_workers=RATES_LOADER_WORKERS) as executor:
+        for i in range(0, len(pairs), RATES_BATCH_SIZE):
+            batch = pairs[i:i + RATES_BATCH_SIZE]
+            loaded = {}
+            error = ''
+            for pair, (rate_to_state_currency, rate_to_marketing_currency, err) \
+                    in zip(batch, executor.map(fetch, batch)):
+                if err:
+                    error = err
+                    continue
+                loaded[(pair[0], pair[2])] = (
+                    rate_to_state_currency, rate_to_marketing_currency
+                )
+            number += save_rates(loaded)
+            if error:
+                # the API is not available, try next time
+                break
+    return number
 
-        time.sleep(0.5)
+
+def save_rates(loaded: dict) -> int:
+    """Updates the existing rates and creates the missing ones
+    from {(currency id, date): (rate to state, rate to marketing currency)}."""
+    if not loaded:
+        return 0
+    existing = Rate.objects.filter(
+        currency_id__in={currency_id for currency_id, _ in loaded},
+        payment_date__in={payment_date for _, payment_date in loaded},
+    )
+    to_update = []
+    for r in existing:
+        values = loaded.pop((r.currency_id, r.payment_date), None)
+        if values:
+            r.rate_to_state_currency, r.rate_to_marketing_currency = values
+            r.rate_type = Rate.OFFICIAL
+            to_update.append(r)
+    Rate.objects.bulk_update(
+        to_update,
+        ['rate_to_state_currency', 'rate_to_marketing_currency', 'rate_type']
+    )
+    Rate.objects.bulk_create([
+        Rate(
+            currency_id=currency_id,
+            payment_date=payment_date,
+            rate_to_state_currency=rate_to_state_currency,
+            rate_to_marketing_currency=rate_to_marketing_currency,
+            rate_type=Rate.OFFICIAL,
+        )
+        for (currency_id, payment_date), (rate_to_state_currency, rate_to_marketing_currency)
+        in loaded.items()
+    ])
+    return len(to_update) + len(loaded)
@@ -0,0 +1,159 @@
+import hashlib
+import hmac
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+from django.conf import settings
+from django.core.mail import mail_admins
+
+from massmail.models import EmailAccount
+
+# After the eviction the cache takes up this part of RAW_EMAIL_CACHE_SIZE.
+EVICTION_RATIO = 0.8
+
+lock = threading.Lock()
+# Approximate size of the cache directory, None - not counted yet.
+cache_size = None
+
+
+def get_cache_dir() -> Path:
+    return Path(settings.RAW_EMAIL_CACHE_DIR)
+
+
+def get_path(key: str) -> Path:
+    # the keys are guessable, so the file names are keyed by SECRET_KEY
+    digest = hmac.new(
+        settings.SECRET_KEY.encode('utf8'), key.encode('utf8'), hashlib.sha256
+    ).hexdigest()
+    return get_cache_dir() / digest[:2] / f'{digest}.eml'
+
+
+def get_uid_key(ea: EmailAccount, box: str, uid) -> str:
+    # UIDs are valid only with the same UIDVALIDITY of the box
+    uidvalidity = getattr(ea, f'{box.lower()}_uidvalidity', 0)
+    return f'uid:{ea.email_host_user}:{box}:{uidvalidity}:{int(uid)}'
+
+
+def get_message_id_key(ea: EmailAccount, message_id: str) -> str:
+    return f'message-id:{ea.email_host_user}:{message_id}'
+
+
+def save(b_msg: bytes, ea: EmailAccount, box: str, uid=None, message_id: str = '') -> None:
+    """Stores the raw message under its account, box and uid
+    and under its Message-ID (as a hard link to the same file)."""
+    if not settings.RAW_EMAIL_CACHE_SIZE:
+        return
+    paths = []
+    if uid:
+        paths.append(get_path(get_uid_key(ea, box, uid)))
+    if message_id:
+        paths.append(get_path(get_message_id_key(ea, message_id)))
+    try:
+        source = None
+        for path in paths:
+            if path.exists():
+                source = source or path
+                continue
+            if source:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.link(source, path)
+                    continue
+                except FileExistsError:
+                    continue
+                except OSError:
+                    pass    # the file system does not support hard links
+            write(path, b_msg)
+            source = source or path
+    except OSError as e:
+        # the emails are shown from the IMAP server without the cache
+        mail_admins(
+            'Raw email cache Exception',
+            f'\nEmail account: {ea}\nUID: {uid}\nException: {e}',
+            fail_silently=True,
+        )
+
+
+def write(path: Path, b_msg: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+    tmp_path.write_bytes(b_msg)
+    os.replace(tmp_path, path)
+    add_size(len(b_msg))
+
+
+def find(ea: EmailAccount, box: str = '', uid=None,
+         message_id: str = '') -> Optional[Path]:
+    """Returns the path of the cached message found by Message-ID
+    or by account, box and uid. The hit marks the file as recently used."""
+    if not settings.RAW_EMAIL_CACHE_SIZE:
+        return None
+    keys = []
+    if message_id:
+        keys.append(get_message_id_key(ea, message_id))
+    if box and uid:
+        keys.append(get_uid_key(ea, box, uid))
+    for key in keys:
+        path = get_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            continue
+        return path
+    return None
+
+
+def read(ea: EmailAccount, box: str = '', uid=None,
+         message_id: str = '') -> Optional[bytes]:
+    path = find(ea, box, uid, message_id)
+    if path:
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:   # evicted meanwhile
+            pass
+    return None
+
+
+def add_size(size: int) -> None:
+    global cache_size
+    with lock:
+        if cache_size is None:
+            cache_size = get_files_size()[0]
+        else:
+            cache_size += size
+        evict = cache_size > settings.RAW_EMAIL_CACHE_SIZE
+    if evict:
+        remove_least_recently_used()
+
+
+def get_files_size() -> tuple:
+    """Returns the size of the cached messages
+    and {inode: (mtime, size, paths)} of the files."""
+    files = {}
+    cache_dir = get_cache_dir()
+    if cache_dir.exists():
+        for path in cache_dir.glob('*/*.eml'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            item = files.setdefault(stat.st_ino, (stat.st_mtime, stat.st_size, []))
+            item[2].append(path)
+    return sum(item[1] for item in files.values()), files
+
+
+def remove_least_recently_used() -> None:
+    """Deletes the least recently used messages
+    until the cache takes up EVICTION_RATIO of its size limit."""
+    global cache_size
+    with lock:
+        size, files = get_files_size()
+        limit = settings.RAW_EMAIL_CACHE_SIZE * EVICTION_RATIO
+        for _, file_size, paths in sorted(files.values(), key=lambda x: x[0]):
+            if size <= limit:
+                break
+            for path in paths:
+                path.unlink(missing_ok=True)
+            size -= file_size
+        cache_size = size
@@ -1,8 +1,10 @@
 import io
 import email
 import threading
+from queue import Queue
 from email.utils import parseaddr
 from django.db.models import F
+from django.db.models.functions import Greatest
 from django.db.models import TextField
 from django.db.models import Value
 from django.db.models.functions import Concat
@@ -26,6 +28,7 @@ from common.models import TheFile
 from crm.models import CrmEmail
 from crm.models import Deal
 from crm.models import Request
+from crm.utils import raw_email_cache
 from crm.utils.counterparty_name import get_counterparty_name
 from crm.utils.helpers import ensure_decoding
 from crm.utils.helpers import delete3enters
@@ -40,7 +43,26 @@ EXCEPT_SUBJECT = 'RestoreImapEmails Exception'
 received_email_from_str = _('Received an email from "%s"')
 
 
+class EmlQueue:
+    """The queues of the RestoreImapEmails workers.
+    The emails of an account always go to the same queue, so they are
+    saved in the order of their uids and the start uids skip none of them."""
+
+    def __init__(self, workers: int, maxsize: int = 4):
+        self.queues = [Queue(maxsize) for _ in range(workers)]
+
+    def put(self, item: tuple) -> None:
+        ea = item[1]
+        self.queues[ea.id % len(self.queues)].put(item)
+
+    def join(self) -> None:
+        for q in self.queues:
+            q.join()
+
+
 class RestoreImapEmails(threading.Thread):
+    """Saves emails from one of the EmlQueue queues
+    (one worker per queue, IMAP_PARSE_WORKERS)."""
 
     def __init__(self, eml_queue, inq_eml_queue):
         threading.Thread.__init__(self)
@@ -55,6 +77,10 @@ class RestoreImapEmails(threading.Thread):
                 item, ea, t, uid, ticket, request = self.eml_queue.get()
                 email_message = email.message_from_bytes(
                     item, policy=email.policy.default)
+                raw_email_cache.save(
+                    item, ea, 'Sent' if t == 'sent' else 'INBOX', uid,
+                    email_message['Message-ID'] or ''
+                )
                 uid_data = get_uid_data(ea)
                 if received_from_crm(email_message):
                     if request:
@@ -196,10 +222,18 @@ def _notify_user(crm_eml: CrmEmail, msg: str) -> None:
 
 
 def update_ea(ea: EmailAccount, uid_data: dict, t: str, uid: str) -> None:
-    """ Update start_uid and last import datetime"""
-    setattr(ea, uid_data[t]['start_uid'], int(uid) + 1)
+    """ Update start_uid and last import datetime.
+    The start_uid only moves forward as an email selected by the user
+    can be older than the emails already imported."""
+    field = uid_data[t]['start_uid']
+    start_uid = int(uid) + 1
     ea.last_import_dt = timezone.now()
-    ea.save(update_fields=[uid_data[t]['start_uid'], 'last_import_dt'])
+    EmailAccount.objects.filter(id=ea.id).update(**{
+        field: Greatest(F(field), Value(start_uid)),
+        'last_import_dt': ea.last_import_dt
+    })
+    if getattr(ea, field) < start_uid:
+        setattr(ea, field, start_uid)
 
 
 def received_from_crm(email_message: email.message.Message) -> bool:
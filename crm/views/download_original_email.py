@@ -1,12 +1,19 @@
 import email
+from email.parser import BytesHeaderParser
+from pathlib import Path
+from typing import Optional
 from django.core.handlers.wsgi import WSGIRequest
+from django.http import FileResponse
 from django.http import HttpResponse
 from django.utils.encoding import escape_uri_path
 from django.utils.translation import gettext
 
 from crm.models import CrmEmail
+from crm.utils import raw_email_cache
+from crm.utils.crm_imap import CrmIMAP
 from crm.utils.helpers import ensure_decoding
-from crm.utils.helpers import get_crmimap
+from crm.utils.helpers import crmimap_connection
+from crm.utils.helpers import imap_busy_str
 from massmail.models import EmailAccount
 
 err_msg = gettext('Not enough data to identify the email or email has been deleted')
@@ -20,26 +27,53 @@ def download_original_email(request: WSGIRequest, object_id: int) -> HttpRespons
         imap_host=crm_email.imap_host,
         email_host_user=crm_email.email_host_user
     )
-    crmimap = get_crmimap(ea, 'INBOX')
-    if crmimap.error:
-        crmimap.release()
-        return HttpResponse(f"Error: {crmimap.error}")
+    box = 'INBOX' if crm_email.incoming else 'Sent'
+    path = raw_email_cache.find(ea, box, crm_email.uid, crm_email.message_id)
+    if path:
+        try:
+            return get_file_response(path)
+        except FileNotFoundError:   # evicted meanwhile
+            pass
+    try:
+        with crmimap_connection(ea, 'INBOX') as crmimap:
+            if crmimap.error:
+                return HttpResponse(f"Error: {crmimap.error}")
+            data = fetch_email(crmimap, crm_email)
+    except TimeoutError:
+        return HttpResponse(f"Error: {imap_busy_str}")
+    if not data:
+        return HttpResponse(err_msg)
 
-    result, data, _ = crmimap.uid_fetch(str(crm_email.uid).encode('utf8'))
-    if result != 'OK' or not data[0]:
-        if not crm_email.message_id:
-            crmimap.release()
-            return HttpResponse(err_msg)
-        result, data = crmimap.get_emails_by_message_id(crm_email.message_id)
-        if result != 'OK' or not data[0]:
-            crmimap.release()
-            return HttpResponse(err_msg)
-
-    crmimap.release()
     msg = email.message_from_bytes(
         data[0][1], policy=email.policy.default)
+    # the uid of the found message may differ
+    raw_email_cache.save(data[0][1], ea, 'INBOX', message_id=msg['Message-ID'] or '')
     filename = f"{ensure_decoding(msg['Subject'])}.eml"
 
     response = HttpResponse(data[0][1], content_type="message/rfc822")
     response['Content-Disposition'] = 'attachment; filename=%s' % escape_uri_path(filename)
     return response
+
+
+def fetch_email(crmimap: CrmIMAP, crm_email: CrmEmail) -> Optional[list]:
+    """Fetches the message by uid or, failing that, by Message-ID."""
+    result, data, _ = crmimap.uid_fetch(str(crm_email.uid).encode('utf8'))
+    if result != 'OK' or not data or not data[0]:
+        if not crm_email.message_id:
+            return None
+        result, data = crmimap.get_emails_by_message_id(crm_email.message_id)
+        if result != 'OK' or not data or not data[0]:
+            return None
+    return data
+
+
+def get_file_response(path: Path) -> FileResponse:
+    """Streams the cached message from disk.
+    Only the headers are parsed to get the file name."""
+    f = open(path, 'rb')
+    msg = BytesHeaderParser(policy=email.policy.default).parse(f)
+    f.seek(0)
+    filename = f"{ensure_decoding(msg['Subject'])}.eml"
+    response = FileResponse(f, content_type="message/rfc822")
+    response['Content-Disposition'] = 'attachment; filename=%s' % escape_uri_path(filename)
+    return response
@@ -5,6 +5,7 @@ from crm.models import Company
 from crm.models import Contact
 from crm.models import Lead
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 
 
 def got_company_massmails(request, object_id):
@@ -30,10 +31,10 @@ def got_leads_massmails(request, object_id):
 
 def got_massmails(object_id, CONTENT_TYPE):
     msgs = [0]
-    mcs = MailingOut.objects.filter(content_type=CONTENT_TYPE)
-    for mc in mcs:
-        successful_ids = mc.get_successful_ids()
-        if object_id in successful_ids:
-            msgs.append(mc.message_id)
+    msgs.extend(MailingOut.objects.filter(
+        recipients__content_type=CONTENT_TYPE,
+        recipients__object_id=object_id,
+        recipients__status=MailingOutRecipient.SUCCESSFUL
+    ).values_list('message_id', flat=True))
     url = reverse('site:massmail_emlmessage_changelist') + f'?id__in={",".join(map(str, msgs))}'
     return HttpResponseRedirect(url)            
\ No newline at end of file
@@ -14,9 +14,11 @@ from django.http import HttpResponse
 
 from common.utils.helpers import OBJ_DOESNT_EXIT_STR
 from crm.models import CrmEmail
+from crm.utils import raw_email_cache
 from crm.utils.crm_imap import CrmIMAP
 from crm.utils.helpers import ensure_decoding
-from crm.utils.helpers import get_crmimap
+from crm.utils.helpers import crmimap_connection
+from crm.utils.helpers import imap_busy_str
 from massmail.models import EmailAccount
 
 not_enough_data_str = _("Not enough data to identify the "
@@ -28,29 +30,57 @@ def view_original_email(request: WSGIRequest, object_id=None, ea_id=None, uid=No
     ea, eml, uid, err = get_ea_eml_uid(object_id, ea_id, uid)
     if not err:
         box = 'INBOX' if ea_id or eml.incoming else 'Sent'
-        crmimap = get_crmimap(ea, box)
-        err = something_wrong_str
-        if crmimap:
-            result, data, err = crmimap.uid_fetch(str(uid).encode('utf8'), '(BODY[])')
-            if result != 'OK' and not err or not data[0]:
-                err = not_enough_data_str
-            elif result == 'OK' and not err:
-                b_msg = parse_message_bytes(uid, data)
-                if b_msg:
-                    msg = email.message_from_bytes(b_msg, policy=policy.default)
-                    if object_id and eml.message_id != '':
-                        err = update_eml_uid(eml, msg, crmimap)     # run crmimap.release()
-                    else:
-                        crmimap.release()
-                    if not err:
-                        context, err = get_context(msg)
-                        if not err:
-                            return render(request, 'crm/email.html', context)
+        message_id = eml.message_id if eml else ''
+        msg = get_cached_message(ea, box, uid, message_id)
+        if msg:
+            context, err = get_context(msg)
+            if not err:
+                return render(request, 'crm/email.html', context)
+        try:
+            with crmimap_connection(ea, box) as crmimap:
                 err = something_wrong_str
-            crmimap.release()
+                if crmimap:
+                    err = show_email(request, crmimap, ea, eml, box, uid)
+                    if not isinstance(err, str):
+                        return err  # the response
+        except TimeoutError:
+            err = imap_busy_str
     return HttpResponse(f"Error: {err}")    
 
 
+def show_email(request: WSGIRequest, crmimap: CrmIMAP, ea: EmailAccount,
+               eml: Optional[CrmEmail], box: str, uid: int):
+    """Returns the response with the email fetched from the server or an error."""
+    result, data, err = crmimap.uid_fetch(str(uid).encode('utf8'), '(BODY[])')
+    if result != 'OK' and not err or not data or not data[0]:
+        return str(not_enough_data_str)
+    if result == 'OK' and not err:
+        b_msg = parse_message_bytes(uid, data)
+        if b_msg:
+            msg = email.message_from_bytes(b_msg, policy=policy.default)
+            raw_email_cache.save(b_msg, ea, box, uid, msg['Message-ID'] or '')
+            if eml and eml.message_id != '':
+                err = update_eml_uid(eml, msg, crmimap)
+            if not err:
+                context, err = get_context(msg)
+                if not err:
+                    return render(request, 'crm/email.html', context)
+    return str(err or something_wrong_str)
+
+
+def get_cached_message(ea: EmailAccount, box: str, uid: Optional[int],
+                       message_id: str) -> Optional[Message]:
+    """Parses the message from the raw email cache file."""
+    path = raw_email_cache.find(ea, box, uid, message_id)
+    if path:
+        try:
+            with open(path, 'rb') as f:
+                return email.message_from_binary_file(f, policy=policy.default)
+        except FileNotFoundError:   # evicted meanwhile
+            pass
+    return None
+
+
 def get_context(msg: Message):
     attachments = []
     body = err = ''
@@ -124,11 +154,10 @@ def parse_message_bytes(uid: int, data: list) -> Optional[bytes]:
 
 
 def update_eml_uid(eml: CrmEmail, msg: Message, crmimap: CrmIMAP) -> str:
-    """Update the uid value of the email message. Run crmimap.release()"""
+    """Update the uid value of the email message."""
     err = ''
     if eml.message_id != msg['Message-ID']:
         result, data, err = crmimap.search(f'(HEADER Message-ID "{eml.message_id}")')
-        crmimap.release()
         if result == 'OK':
             uids = data[0].split()
             if uids:
@@ -137,6 +166,4 @@ def update_eml_uid(eml: CrmEmail, msg: Message, crmimap: CrmIMAP) -> str:
         else:
             if not err:
                 err = not_enough_data_str
-    else:
-        crmimap.release()
     return err
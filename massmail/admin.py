@@ -72,7 +72,6 @@ class MailingOutAdmin(mailingoutadmin.MailingOutAdmin):
                 ('name', 'status'),
                 ('content_type', 'recipients_number'),
                 'message', 'report',
-                'recipient_ids', 'successful_ids', 'failed_ids',
                 ('owner', 'modified_by'),
             )
         }),
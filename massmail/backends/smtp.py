@@ -1,10 +1,17 @@
 import base64
 import json
 import requests
+import threading
+import time
 from smtplib import SMTP
 from django.conf import settings
 from django.core.mail.backends.smtp import EmailBackend
 
+# Access tokens are reused until shortly before they expire.
+TOKEN_EXPIRY_MARGIN = 60    # seconds
+_access_tokens = {}
+_tokens_lock = threading.Lock()
+
 
 class OAuth2EmailBackend(EmailBackend):
     def __init__(self, host=None, port=None, username=None, password=None,
@@ -18,6 +25,11 @@ class OAuth2EmailBackend(EmailBackend):
         self.refresh_token = refresh_token
         
     def get_access_token(self) -> str:
+        key = (self.host, self.refresh_token)
+        with _tokens_lock:
+            access_token, expires_at = _access_tokens.get(key, (None, 0))
+        if access_token and expires_at > time.monotonic():
+            return access_token
         params = {
             'client_id': settings.CLIENT_ID,
             'client_secret': settings.CLIENT_SECRET,
@@ -30,6 +42,12 @@ class OAuth2EmailBackend(EmailBackend):
         result = json.loads(response.text)
         if result.get('error', None):
             raise RuntimeError(response.text)
+        expires_in = int(result.get('expires_in', 3600))
+        with _tokens_lock:
+            _access_tokens[key] = (
+                result['access_token'],
+                time.monotonic() + expires_in - TOKEN_EXPIRY_MARGIN
+            )
         return result['access_token']
     
     def get_auth_string(self):
@@ -60,6 +78,8 @@ class OAuth2EmailBackend(EmailBackend):
             auth_string = self.get_auth_string()
             response = self.connection.docmd('AUTH', 'XOAUTH2 ' + auth_string)
             if response != (235, b'2.7.0 Accepted'):
+                with _tokens_lock:
+                    _access_tokens.pop((self.host, self.refresh_token), None)
                 raise RuntimeError("SMTP AUTH failed!")
             return True
         except OSError:
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.9 on 2026-10-18 18:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('massmail', '0003_alter_emlmessage_content_alter_signature_content'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailingOutRecipient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Recipient ID')),
+                ('status', models.CharField(choices=[('P', 'Pending'), ('S', 'Successful'), ('F', 'Failed')], default='P', max_length=1, verbose_name='Status')),
+                ('status_date', models.DateTimeField(blank=True, null=True, verbose_name='Status date')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Error')),
+                ('mailing_out', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipients', to='massmail.mailingout', verbose_name='Mailing Out')),
+            ],
+            options={
+                'verbose_name': 'Mailing Out recipient',
+                'verbose_name_plural': 'Mailing Out recipients',
+                'indexes': [models.Index(fields=['mailing_out', 'status'], name='massmail_ma_mailing_2e911a_idx'), models.Index(fields=['object_id', 'status'], name='massmail_ma_object__caf405_idx')],
+                'unique_together': {('mailing_out', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+BATCH_SIZE = 1000
+STATUS_FIELDS = (
+    ('P', 'recipient_ids'),
+    ('S', 'successful_ids'),
+    ('F', 'failed_ids'),
+)
+
+
+def get_ids(value: str) -> list:
+    return [int(x) for x in value.split(',') if x.strip().isdigit()]
+
+
+def move_ids_to_recipients(apps, schema_editor):
+    MailingOut = apps.get_model('massmail', 'MailingOut')
+    MailingOutRecipient = apps.get_model('massmail', 'MailingOutRecipient')
+    mailing_outs = MailingOut.objects.only(
+        'id', 'recipient_ids', 'successful_ids', 'failed_ids'
+    )
+    for mo in mailing_outs.iterator():
+        # A recipient can only have one status. The successful
+        # and failed statuses take precedence over the pending one.
+        statuses = {}
+        for status, field in STATUS_FIELDS:
+            for object_id in get_ids(getattr(mo, field)):
+                statuses[object_id] = status
+        MailingOutRecipient.objects.bulk_create(
+            (
+                MailingOutRecipient(
+                    mailing_out_id=mo.id,
+                    object_id=object_id,
+                    status=status
+                ) for object_id, status in statuses.items()
+            ),
+            batch_size=BATCH_SIZE
+        )
+
+
+def move_recipients_to_ids(apps, schema_editor):
+    MailingOut = apps.get_model('massmail', 'MailingOut')
+    MailingOutRecipient = apps.get_model('massmail', 'MailingOutRecipient')
+    for mo in MailingOut.objects.iterator():
+        for status, field in STATUS_FIELDS:
+            ids = MailingOutRecipient.objects.filter(
+                mailing_out_id=mo.id, status=status
+            ).values_list('object_id', flat=True)
+            setattr(mo, field, ",".join(map(str, ids)))
+        mo.save(update_fields=[field for _, field in STATUS_FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('massmail', '0004_mailingoutrecipient'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_ids_to_recipients, move_recipients_to_ids),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.9 on 2026-10-18 18:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('massmail', '0005_move_recipient_ids_to_mailingoutrecipient'),
+    ]
+
+    operations = [
+        # Lets the reverse migration restore the field in existing rows
+        migrations.AlterField(
+            model_name='mailingout',
+            name='recipient_ids',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.RemoveField(
+            model_name='mailingout',
+            name='failed_ids',
+        ),
+        migrations.RemoveField(
+            model_name='mailingout',
+            name='recipient_ids',
+        ),
+        migrations.RemoveField(
+            model_name='mailingout',
+            name='successful_ids',
+        ),
+    ]
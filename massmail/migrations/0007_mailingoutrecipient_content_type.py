@@ -0,0 +1,43 @@
+# Generated by Django 6.0.9 on 2026-10-18 19:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef
+from django.db.models import Subquery
+
+
+def copy_content_types(apps, schema_editor):
+    MailingOut = apps.get_model('massmail', 'MailingOut')
+    MailingOutRecipient = apps.get_model('massmail', 'MailingOutRecipient')
+    MailingOutRecipient.objects.update(
+        content_type=Subquery(
+            MailingOut.objects.filter(
+                id=OuterRef('mailing_out_id')
+            ).values('content_type')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('massmail', '0006_remove_mailingout_failed_ids_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='mailingoutrecipient',
+            name='massmail_ma_object__caf405_idx',
+        ),
+        migrations.AddField(
+            model_name='mailingoutrecipient',
+            name='content_type',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contenttypes.contenttype', verbose_name='Recipients type'),
+        ),
+        migrations.RunPython(copy_content_types, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='mailingoutrecipient',
+            index=models.Index(fields=['content_type', 'object_id', 'status'], name='massmail_ma_content_2a3bf3_idx'),
+        ),
+    ]
@@ -41,6 +41,18 @@ class EmlAccountsQueue(models.Model):
             account_id = None
         return account_id
 
+    def get_next_ids(self, number: int) -> list:
+        """Returns the next number of account ids
+        rotating the queue as many times as get_next() would."""
+        queue = self.get_queue()
+        if not queue or not number:
+            return []
+        account_ids = [queue[i % len(queue)] for i in range(number)]
+        shift = number % len(queue)
+        self.queue = json.dumps(queue[shift:] + queue[:shift])
+        self.save()
+        return account_ids
+
     def add_id(self, account_id):
         queue = self.get_queue()
         if account_id not in queue:
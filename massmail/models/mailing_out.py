@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.contenttypes.models import ContentType
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
 from common.models import Base1
 from massmail.models import EmlMessage
+from massmail.models.mailing_out_recipient import MailingOutRecipient
 
 
 class MailingOut(Base1):
@@ -44,9 +46,6 @@ class MailingOut(Base1):
         verbose_name=_("Recipients"),
         help_text=_("Number of recipients")
     )
-    recipient_ids = models.TextField()
-    successful_ids = models.TextField(blank=True, default='')
-    failed_ids = models.TextField(blank=True, default='')
 
     content_type = models.ForeignKey(
         ContentType, blank=True, null=True,
@@ -66,45 +65,65 @@ class MailingOut(Base1):
     sending_date = models.DateField(blank=True, null=True)
 
     def get_successful_ids(self):
-        return self.get_ids(self.successful_ids)
+        return self.get_ids(MailingOutRecipient.SUCCESSFUL)
 
     def get_failed_ids(self):
-        return self.get_ids(self.failed_ids)
+        return self.get_ids(MailingOutRecipient.FAILED)
 
     def get_recipient_ids(self):
-        return self.get_ids(self.recipient_ids)
-
-    @staticmethod
-    def get_ids(field):
-        if field:
-            return [int(r_id) for r_id in field.split(',')]
-        return []
-
-    def remove_recipient_ids(self, recipient_id):
-        recipient_ids = self.get_recipient_ids()
-        recipient_ids.remove(recipient_id)
-        self.recipient_ids = ",".join(map(str, recipient_ids))
-
-    def move_to_successful_ids(self, recipient_id):
-        self.remove_recipient_ids(recipient_id)
-        successful_ids = self.get_successful_ids()
-        successful_ids.append(recipient_id)
-        self.successful_ids = ",".join(map(str, successful_ids))
-        self.save()
-
-    def move_to_failed_ids(self, recipient_id):
-        self.remove_recipient_ids(recipient_id)
-        failed_ids = self.get_failed_ids()
-        failed_ids.append(recipient_id)
-        self.failed_ids = ",".join(map(str, failed_ids))
-        self.save()
+        return self.get_ids(MailingOutRecipient.PENDING)
+
+    def get_ids(self, status: str) -> list:
+        return list(
+            self.recipients.filter(status=status).values_list(
+                'object_id', flat=True
+            )
+        )
+
+    def has_successful_ids(self) -> bool:
+        return self.recipients.filter(
+            status=MailingOutRecipient.SUCCESSFUL
+        ).exists()
+
+    def has_failed_ids(self) -> bool:
+        return self.recipients.filter(
+            status=MailingOutRecipient.FAILED
+        ).exists()
+
+    def add_recipient_ids(self, recipient_ids, status: str = MailingOutRecipient.PENDING) -> None:
+        MailingOutRecipient.objects.bulk_create(
+            (
+                MailingOutRecipient(
+                    mailing_out=self,
+                    content_type_id=self.content_type_id,
+                    object_id=recipient_id,
+                    status=status
+                ) for recipient_id in recipient_ids
+            ),
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+    def remove_recipient_ids(self, *recipient_ids) -> None:
+        self.recipients.filter(object_id__in=recipient_ids).delete()
+
+    def set_recipient_status(self, recipient_ids, status: str, error: str = '') -> int:
+        """Bulk update of the delivery status of recipients."""
+        return self.recipients.filter(
+            object_id__in=recipient_ids
+        ).update(status=status, status_date=now(), error=error)
+
+    def move_to_successful_ids(self, *recipient_ids) -> None:
+        self.set_recipient_status(recipient_ids, MailingOutRecipient.SUCCESSFUL)
+
+    def move_to_failed_ids(self, *recipient_ids, error: str = '') -> None:
+        self.set_recipient_status(recipient_ids, MailingOutRecipient.FAILED, error)
 
     def move_to_recipient_ids(self):
-        recipient_ids = self.get_recipient_ids()
-        failed_ids = self.get_failed_ids()
-        recipient_ids.extend(failed_ids)
-        self.recipient_ids = ",".join(map(str, recipient_ids))
-        self.failed_ids = ''
+        """Return the failed recipients to the mailing out."""
+        self.recipients.filter(
+            status=MailingOutRecipient.FAILED
+        ).update(status=MailingOutRecipient.PENDING, status_date=None, error='')
         self.save()
 
     def __str__(self):
@@ -0,0 +1,57 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class MailingOutRecipient(models.Model):
+    """Delivery state of a mailing out to one recipient."""
+
+    class Meta:
+        verbose_name = _('Mailing Out recipient')
+        verbose_name_plural = _('Mailing Out recipients')
+        unique_together = (('mailing_out', 'object_id'),)
+        indexes = [
+            models.Index(fields=['mailing_out', 'status']),
+            # "has the object received a mailing" lookups
+            models.Index(fields=['content_type', 'object_id', 'status']),
+        ]
+
+    PENDING = 'P'
+    SUCCESSFUL = 'S'
+    FAILED = 'F'
+
+    STATUS_CHOICES = (
+        (PENDING, _('Pending')),
+        (SUCCESSFUL, _('Successful')),
+        (FAILED, _('Failed')),
+    )
+    mailing_out = models.ForeignKey(
+        'MailingOut', on_delete=models.CASCADE,
+        related_name="recipients",
+        verbose_name=_("Mailing Out"),
+    )
+    # copy of mailing_out.content_type to look up recipients without a join
+    content_type = models.ForeignKey(
+        ContentType, blank=True, null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name=_("Recipients type"),
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name=_("Recipient ID"),
+    )
+    status = models.CharField(
+        max_length=1, choices=STATUS_CHOICES, default=PENDING,
+        verbose_name=_("Status"),
+    )
+    status_date = models.DateTimeField(
+        blank=True, null=True,
+        verbose_name=_("Status date")
+    )
+    error = models.TextField(
+        blank=True, default='',
+        verbose_name=_("Error"),
+    )
+
+    def __str__(self):
+        return f'{self.mailing_out_id}: {self.object_id}'
@@ -1,5 +1,9 @@
 from django.contrib import admin
 from django.conf import settings
+from django.db.models import Count
+from django.db.models import OuterRef
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce
 from django.contrib import messages
 from django.template.defaultfilters import linebreaksbr
 from django.urls import reverse
@@ -14,6 +18,7 @@ from crm.site.crmmodeladmin import CrmModelAdmin
 from crm.utils.admfilters import ByOwnerFilter
 from massmail.admin_actions import merge_mailing_outs
 from massmail.models import EmailAccount
+from massmail.models import MailingOutRecipient
 from massmail.utils.adminfilters import StatusMailingFilter
 from massmail.utils.helpers import get_rendered_msg
 from settings.models import MassmailSettings
@@ -48,9 +53,7 @@ class MailingOutAdmin(CrmModelAdmin):
     )
     list_filter = (StatusMailingFilter, ByOwnerFilter)
     save_on_top = True
-    exclude = (
-        'recipient_ids', 'successful_ids', 'failed_ids', 'department',
-    )
+    exclude = ('department',)
     readonly_fields = (
         'recipients_number', 'owner', 'modified_by',
         'content_type', 'sent_today', 'display_preview',
@@ -95,6 +98,16 @@ class MailingOutAdmin(CrmModelAdmin):
         fieldsets = [(None, {'fields': fields})]
         return fieldsets
 
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        # counted with the rows of the page, the subquery does not
+        # join the recipients to the count and filter queries
+        pending = MailingOutRecipient.objects.filter(
+            mailing_out=OuterRef('pk'),
+            status=MailingOutRecipient.PENDING
+        ).order_by().values('mailing_out').annotate(c=Count('pk')).values('c')
+        return qs.annotate(pending_count=Coalesce(Subquery(pending), 0))
+
     def save_model(self, request, obj, form, change):
         if 'status' in form.changed_data and obj.status == obj.ACTIVE:
             eas = EmailAccount.objects.filter(
@@ -169,7 +182,7 @@ class MailingOutAdmin(CrmModelAdmin):
     def exclude_recipients(self, obj):
         from django.urls import reverse
         url = '#'
-        if obj.recipient_ids:
+        if get_pending_count(obj):
             url = reverse(
                 'exclude_recipients', args=(obj.id,)
             )
@@ -213,8 +226,7 @@ class MailingOutAdmin(CrmModelAdmin):
     @staticmethod
     @admin.display(description=progress_safe_str)
     def progress(instance):
-        rt_ids = instance.get_recipient_ids()
-        tn = len(rt_ids)
+        tn = get_pending_count(instance)
         rn = instance.recipients_number
         if rn == 0:
             return '0 %'
@@ -235,3 +247,14 @@ class MailingOutAdmin(CrmModelAdmin):
         if instance.sending_date == get_today():
             return instance.today_count
         return 0
+
+
+def get_pending_count(mailing_out) -> int:
+    """Returns the number of recipients yet to receive the message
+    (annotated by MailingOutAdmin.get_queryset)."""
+    count = getattr(mailing_out, 'pending_count', None)
+    if count is None:
+        count = mailing_out.recipients.filter(
+            status=MailingOutRecipient.PENDING
+        ).count()
+    return count
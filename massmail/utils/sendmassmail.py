@@ -1,6 +1,7 @@
 import random
 import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from datetime import timedelta
 from email.errors import HeaderParseError
@@ -15,11 +16,17 @@ from typing import Union
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.contenttypes.prefetch import GenericPrefetch
 from django.contrib.sites.models import Site
 from django.core.mail import mail_admins
 from django.core.mail.message import BadHeaderError
 from django.db import connection
+from django.db.models import Case
+from django.db.models import F
+from django.db.models import Value
+from django.db.models import When
+from django.db.models import Window
+from django.db.models.functions import RowNumber
 from django.db.utils import ProgrammingError
 from django.urls import reverse
 from django.utils import timezone
@@ -36,11 +43,34 @@ from crm.models import Lead
 from massmail.models import EmailAccount
 from massmail.models import EmlAccountsQueue
 from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
 from massmail.models import MassContact
 from massmail.utils.email_creators import email_creator
+from massmail.utils.smtp_pool import smtp_pool
 from settings.models import MassmailSettings
 
+EXTRA_CONTEXT_FIELDS = {
+    'contact': [
+        'email', 'first_name', 'first_middle_name',
+        'last_name', 'full_name',
+        'title', 'company'
+    ],
+    'company': [
+        'email', 'full_name'
+    ],
+    'lead': [
+        'email', 'first_name', 'first_middle_name',
+        'last_name', 'full_name',
+        'title', 'company_name'
+    ]
+}
+MASSMAIL_WORKERS = 8
+# The throughput of the accounts is mailed to the admins this often.
+STATS_REPORT_PERIOD = 24 * 60 * 60     # seconds
 USER_MODEL = get_user_model()
+# guards MailingOut objects shared by the accounts of one owner
+_mailing_out_lock = threading.Lock()
+
 
 class SendMassmail(threading.Thread, SingleInstance):
 
@@ -51,6 +81,7 @@ class SendMassmail(threading.Thread, SingleInstance):
             SingleInstance.__init__(self, flavor_id='Massmail_test')
         else:
             SingleInstance.__init__(self, flavor_id='Massmail')
+        self.dispatcher = MassmailDispatcher()
 
     def run(self):
         while not apps.ready:
@@ -72,14 +103,120 @@ class SendMassmail(threading.Thread, SingleInstance):
             if massmail_settings.use_business_time:
                 s = get_seconds_to_business_time(massmail_settings)
                 if s > 0:
+                    smtp_pool.close_all()
                     connection.close()
                     time.sleep(s + random.randint(120, 300))
 
-            send_massmail(massmail_settings)
+            send_massmail(massmail_settings, self.dispatcher)
             time.sleep(30)
 
 
-def send_massmail(massmail_settings: MassmailSettings) -> None:
+class MassmailDispatcher:
+    """Sends mass mail through all eligible email accounts in parallel.
+    Each account is paced separately and its throughput is counted
+    and reported to the admins every STATS_REPORT_PERIOD."""
+
+    def __init__(self, workers: Optional[int] = None):
+        # test transactions are not visible to other connections
+        self.workers = workers or (1 if settings.TESTING else MASSMAIL_WORKERS)
+        self._lock = threading.Lock()
+        self._next_time = {}
+        self._stats = {}
+        self._report_time = time.monotonic()
+
+    def dispatch(self, tasks: list, now: datetime) -> None:
+        """Sends one message for every (mailing_out, email_account,
+        masscontact) task."""
+        if self.workers == 1:
+            for task in tasks:
+                self.send(*task, now)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(self.send_in_thread, *task, now)
+                for task in tasks
+            ]
+        for future in futures:
+            future.result()     # re-raise worker exceptions
+
+    def get_stats(self) -> dict:
+        """Returns the number of sent and failed messages and the number
+        of messages per minute for each email account."""
+        stats = {}
+        with self._lock:
+            for ea_id, data in self._stats.items():
+                minutes = (data['last'] - data['first']) / 60
+                stats[ea_id] = {
+                    'account': data['account'],
+                    'sent': data['sent'],
+                    'failed': data['failed'],
+                    'per_minute': round(
+                        (data['sent'] - 1) / minutes, 2
+                    ) if minutes else 0,
+                }
+        return stats
+
+    def report_stats(self, force: bool = False) -> str:
+        """Mails the throughput of the accounts to the admins once
+        per STATS_REPORT_PERIOD and starts counting anew.
+        Returns the report or an empty string if it is not due."""
+        with self._lock:
+            if not force and \
+                    time.monotonic() - self._report_time < STATS_REPORT_PERIOD:
+                return ''
+            self._report_time = time.monotonic()
+        stats = self.get_stats()
+        with self._lock:
+            self._stats = {}
+        if not stats:
+            return ''
+        report_str = '\n'.join(
+            f"{data['account']}: sent {data['sent']}, failed {data['failed']}, "
+            f"{data['per_minute']} per minute"
+            for data in stats.values()
+        )
+        mail_admins('Massmail throughput', report_str, fail_silently=True)
+        return report_str
+
+    def send(self, mailing_out: MailingOut, ea: EmailAccount,
+             mc: MassContact, now: datetime) -> None:
+        self.wait_for_turn(ea)
+        sent = send_message(mailing_out, ea, mc, now)
+        if sent is not None:
+            self.count(ea, sent)
+
+    def send_in_thread(self, *args) -> None:
+        try:
+            self.send(*args)
+        finally:
+            connection.close()
+
+    def count(self, ea: EmailAccount, sent: bool) -> None:
+        t = time.monotonic()
+        with self._lock:
+            data = self._stats.setdefault(ea.id, {
+                'account': ea.email_host_user,
+                'sent': 0, 'failed': 0, 'first': t, 'last': t,
+            })
+            data['sent' if sent else 'failed'] += 1
+            data['last'] = t
+
+    def wait_for_turn(self, ea: EmailAccount) -> None:
+        """Keeps a random pause between messages of the account."""
+        if settings.TESTING:
+            return
+        with self._lock:
+            next_time = self._next_time.get(ea.id, 0)
+        pause = next_time - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+        with self._lock:
+            self._next_time[ea.id] = time.monotonic() + random.randint(15, 35)
+
+
+def send_massmail(massmail_settings: MassmailSettings,
+                  dispatcher: Optional[MassmailDispatcher] = None) -> None:
+    dispatcher = dispatcher or MassmailDispatcher()
     try:
         mailing_outs = MailingOut.objects.filter(
             status__in=['A', 'E']
@@ -90,66 +227,29 @@ def send_massmail(massmail_settings: MassmailSettings) -> None:
         now = get_now()
         today = now.date()
         mailing_outs = check_owners(mailing_outs)
-
+        tasks = []
         while mailing_outs:
             mailing_out = mailing_outs.pop(0)
-            if mailing_out.sending_date != today:
-                mailing_out.today_count = 0
-            recipient_ids = get_recipient_ids(mailing_out)
-            if not recipient_ids:
+            if not has_recipients(mailing_out):
                 continue
-            fix_masscontacts(mailing_out, recipient_ids)
-            email_accounts = EmailAccount.objects.filter(
+            fix_masscontacts(mailing_out)
+            email_accounts = []
+            for ea in EmailAccount.objects.filter(
                 owner=mailing_out.owner,
                 massmail=True
-            )
-            for ea in email_accounts:
+            ):
                 if ea.today_date == today:
                     if ea.today_count > massmail_settings.emails_per_day:
                         continue
                 else:
                     ea.today_count = 0
-                mc = _get_masscontact(
-                    mailing_out, recipient_ids, ea)
-                if not mc:
-                    continue
-
-                recipient = get_recipient(mailing_out, mc)
-                if not recipient:
-                    continue
-
-                extra_context = get_extra_context(mc)
-                to = extra_context['to'].split(',')
-                try:
-                    msg = email_creator(
-                        mailing_out.message, ea, to=to,
-                        extra_context=extra_context,
-                        force_multipart=True, inline_images=True
-                    )
-                    if settings.MAILING or not settings.MAILING and settings.TESTING:
-                        msg.send(fail_silently=False)
-                    mailing_out.move_to_successful_ids(mc.object_id)
-                except (SMTPAuthenticationError, SMTPSenderRefused) as e:
-                    off = True
-                    report(ea, mailing_out, mc, now, e, off)
-                    continue
-
-                except (
-                        SMTPDataError, BadHeaderError, SMTPRecipientsRefused,
-                        SMTPServerDisconnected, IndexError, HeaderParseError,
-                        FileNotFoundError
-                ) as e:
-                    report(ea, mailing_out, mc, now, e)
-                    continue
-
-                except Exception as e:
-                    report(ea, mailing_out, mc, now, e)
-                    continue
-
-                counter_increment(ea, mailing_out, today)
-
-                if not settings.TESTING:
-                    time.sleep(random.randint(15, 35))
+                email_accounts.append(ea)
+            masscontacts = get_masscontacts(mailing_out, email_accounts)
+            for ea in email_accounts:
+                if ea.id in masscontacts:
+                    tasks.append((mailing_out, ea, masscontacts[ea.id]))
+        dispatcher.dispatch(tasks, now)
+        dispatcher.report_stats()
     except Exception as err:
         msg = f"Exception at send_massmail"
         mail_admins(
@@ -160,6 +260,47 @@ def send_massmail(massmail_settings: MassmailSettings) -> None:
         )
 
 
+def send_message(mailing_out: MailingOut, ea: EmailAccount,
+                 mc: MassContact, now: datetime) -> Optional[bool]:
+    """Sends the message of the mailing out to the masscontact
+    through the email account. Returns whether the message was sent
+    or None if the recipient no longer exists."""
+    recipient = get_recipient(mailing_out, mc)
+    if not recipient:
+        return None
+
+    extra_context = get_extra_context(mc)
+    to = extra_context['to'].split(',')
+    try:
+        msg = email_creator(
+            mailing_out.message, ea, to=to,
+            extra_context=extra_context,
+            force_multipart=True, inline_images=True
+        )
+        if settings.MAILING or not settings.MAILING and settings.TESTING:
+            smtp_pool.send(msg, ea)
+        mailing_out.move_to_successful_ids(mc.object_id)
+    except (SMTPAuthenticationError, SMTPSenderRefused) as e:
+        off = True
+        report(ea, mailing_out, mc, now, e, off)
+        return False
+
+    except (
+            SMTPDataError, BadHeaderError, SMTPRecipientsRefused,
+            SMTPServerDisconnected, IndexError, HeaderParseError,
+            FileNotFoundError
+    ) as e:
+        report(ea, mailing_out, mc, now, e)
+        return False
+
+    except Exception as e:
+        report(ea, mailing_out, mc, now, e)
+        return False
+
+    counter_increment(ea, mailing_out, now.date())
+    return True
+
+
 def check_owners(mailing_outs) -> list:
     owner_list = []
     new_mailing_outs = []
@@ -180,10 +321,14 @@ def counter_increment(
 ) -> None:
     email_account.today_count += 1
     email_account.today_date = today
-    email_account.save()
-    mailing_out.today_count += 1
-    mailing_out.sending_date = today
-    mailing_out.save()
+    email_account.save(update_fields=['today_count', 'today_date'])
+    MailingOut.objects.filter(id=mailing_out.id).update(
+        today_count=Case(
+            When(sending_date=today, then=F('today_count') + 1),
+            default=Value(1)
+        ),
+        sending_date=today
+    )
 
 
 def get_recipient(
@@ -192,48 +337,90 @@ def get_recipient(
     recipient = mc.content_object
     if not recipient:
         mailing_out.remove_recipient_ids(mc.object_id)
-        mailing_out.recipients_number -= 1
-        mailing_out.save()
+        MailingOut.objects.filter(id=mailing_out.id).update(
+            recipients_number=F('recipients_number') - 1
+        )
         mc.delete()
     return recipient
 
 
-def get_recipient_ids(mailing_out: MailingOut) -> list:
-    recipient_ids = mailing_out.get_recipient_ids()
-    if not recipient_ids:
+def has_recipients(mailing_out: MailingOut) -> bool:
+    exists = mailing_out.recipients.filter(
+        status=MailingOutRecipient.PENDING
+    ).exists()
+    if not exists:
         _success_report(mailing_out)
 
-    return recipient_ids
+    return exists
 
 
-def fix_masscontacts(mailing_out: MailingOut, recipient_ids: list) -> None:
-    wrong_masscontacts = MassContact.objects.filter(
+def fix_masscontacts(mailing_out: MailingOut) -> None:
+    """Assigns email accounts of the mailing out owner to the masscontacts
+    of pending recipients and creates the missing masscontacts."""
+    pending = mailing_out.recipients.filter(
+        status=MailingOutRecipient.PENDING
+    )
+    masscontacts = MassContact.objects.filter(
         content_type=mailing_out.content_type,
-        object_id__in=recipient_ids,
-    ).exclude(email_account__owner=mailing_out.owner)
-    if wrong_masscontacts:
-        queue_obj = EmlAccountsQueue.objects.get(owner=mailing_out.owner)
-        for masscontact in wrong_masscontacts:
-            email_account_id = queue_obj.get_next()
-            if email_account_id:
-                masscontact.email_account_id = email_account_id
-                masscontact.save(update_fields=["email_account_id"])
+        object_id__in=pending.values('object_id'),
+    )
+    wrong_masscontacts = list(
+        masscontacts.exclude(email_account__owner=mailing_out.owner)
+    )
+    recipient_ids_without = list(pending.exclude(
+        object_id__in=masscontacts.values('object_id')
+    ).values_list('object_id', flat=True))
+    if not wrong_masscontacts and not recipient_ids_without:
+        return
+    queue_obj = EmlAccountsQueue.objects.get(owner=mailing_out.owner)
+    account_ids = queue_obj.get_next_ids(
+        len(wrong_masscontacts) + len(recipient_ids_without)
+    )
+    if not account_ids:
+        return
+    for masscontact, email_account_id in zip(wrong_masscontacts, account_ids):
+        masscontact.email_account_id = email_account_id
+    MassContact.objects.bulk_update(
+        wrong_masscontacts, ['email_account'], batch_size=1000
+    )
     # set masscontact
-    recipient_ids_with = MassContact.objects.filter(
+    MassContact.objects.bulk_create([
+        MassContact(
+            content_type=mailing_out.content_type,
+            object_id=recipient_id,
+            email_account_id=email_account_id
+        )
+        for recipient_id, email_account_id in zip(
+            recipient_ids_without, account_ids[len(wrong_masscontacts):]
+        )
+    ], batch_size=1000)
+
+
+def get_masscontacts(mailing_out: MailingOut, email_accounts: list) -> dict:
+    """Returns the next masscontact of every email account
+    with its recipient object loaded."""
+    if not email_accounts:
+        return {}
+    masscontacts = MassContact.objects.annotate(
+        row_number=Window(
+            RowNumber(),
+            partition_by=F('email_account'),
+            order_by=F('id').asc()
+        )
+    ).filter(
         content_type=mailing_out.content_type,
-        object_id__in=recipient_ids
-    ).values_list('object_id', flat=True)
-    recipient_ids_without = list(set(recipient_ids) - set(recipient_ids_with))
-    if recipient_ids_without:
-        queue_obj = EmlAccountsQueue.objects.get(owner=mailing_out.owner)
-        for recipient_id in recipient_ids_without:
-            email_account_id = queue_obj.get_next()
-            if email_account_id:
-                MassContact.objects.create(
-                    content_type=mailing_out.content_type,
-                    object_id=recipient_id,
-                    email_account_id=email_account_id
-                )
+        object_id__in=mailing_out.recipients.filter(
+            status=MailingOutRecipient.PENDING
+        ).values('object_id'),
+        email_account__in=email_accounts,
+        massmail=True,
+        row_number=1
+    ).prefetch_related(GenericPrefetch('content_object', [
+        Company.objects.all(),
+        Contact.objects.select_related('company'),
+        Lead.objects.all(),
+    ]))
+    return {mc.email_account_id: mc for mc in masscontacts}
 
 
 def get_seconds_to_business_time(massmail_settings: MassmailSettings) -> float:
@@ -283,41 +470,26 @@ def report(
         report_str = '\nAccount OFF!\n' + report_str
         email_account.report = report_str + email_account.report
         email_account.save()
-    mailing_out.report = report_str + mailing_out.report
-    mailing_out.status = 'E'
+    with _mailing_out_lock:
+        mailing_out.report = report_str + mailing_out.report
+        mailing_out.status = 'E'
+        mailing_out.save(update_fields=['report', 'status'])
     if off:
-        mailing_out.save()
         subj = 'Massmail error: ' + f'{mc.content_object}'
         mail_admins(subj, mailing_out.report, fail_silently=True)
     else:
-        mailing_out.move_to_failed_ids(mc.object_id)
+        mailing_out.move_to_failed_ids(mc.object_id, error=str(error))
 
 
 def get_extra_context(mc: MassContact) -> dict:
-    data = {
-        ContentType.objects.get_for_model(Contact): [
-            'email', 'first_name', 'first_middle_name',
-            'last_name', 'full_name',
-            'title', 'company'
-        ],
-        ContentType.objects.get_for_model(Company): [
-            'email', 'full_name'
-        ],
-        ContentType.objects.get_for_model(Lead): [
-            'email', 'first_name', 'first_middle_name',
-            'last_name', 'full_name',
-            'title', 'company_name'
-        ]
-    }
     url = reverse(
             'unsubscribe', args=[mc.uuid]
     )
     extra_context = {
-        'unsubscribe_url': Site.objects.get(
-            pk=settings.SITE_ID
-        ).domain + url
+        # the current site is cached
+        'unsubscribe_url': Site.objects.get_current().domain + url
     }
-    fields = data[mc.content_type].copy()
+    fields = EXTRA_CONTEXT_FIELDS[mc.content_object._meta.model_name].copy()  # NOQA
     field = fields.pop(0)
     extra_context['to'] = getattr(mc.content_object, field)
     for field in fields:
@@ -325,19 +497,6 @@ def get_extra_context(mc: MassContact) -> dict:
     return extra_context
 
 
-def _get_masscontact(
-        mailing_out: MailingOut,
-        recipient_ids: list,
-        email_account: EmailAccount) -> Optional[MassContact]:
-
-    return MassContact.objects.filter(
-        content_type=mailing_out.content_type,
-        object_id__in=recipient_ids,
-        email_account=email_account,
-        massmail=True
-    ).first()
-
-
 def _success_report(mailing_out: MailingOut) -> None:
     """Adds a "Done successfully" message to the report."""
     date = get_formatted_short_date()
@@ -345,4 +504,4 @@ def _success_report(mailing_out: MailingOut) -> None:
     report_msg = f"{date} {msg}\n"
     mailing_out.report = report_msg + mailing_out.report
     mailing_out.status = mailing_out.DONE
-    mailing_out.save()
+    mailing_out.save(update_fields=['report', 'status'])
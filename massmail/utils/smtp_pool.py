@@ -0,0 +1,103 @@
+import threading
+from smtplib import SMTPException
+from smtplib import SMTPServerDisconnected
+from django.core.mail import EmailMessage
+
+from massmail.models import EmailAccount
+from massmail.utils.email_creators import email_connection
+
+
+class SMTPConnectionPool:
+    """Keeps one open SMTP connection per EmailAccount
+    so that mass mail messages reuse the session."""
+
+    def __init__(self):
+        self._connections = {}
+        self._lock = threading.Lock()
+        self.new_count = 0
+        self.reused_count = 0
+
+    def get_connection(self, email_account: EmailAccount):
+        """Returns an open backend of the email account.
+        The connection is checked with NOOP before it is reused."""
+        key = get_account_key(email_account)
+        with self._lock:
+            account_key, backend = self._connections.get(
+                email_account.id, (None, None)
+            )
+        if backend and account_key == key and is_alive(backend):
+            with self._lock:
+                self.reused_count += 1
+            return backend
+        if backend:
+            backend.close()
+        backend = email_connection(email_account)
+        backend.open()
+        with self._lock:
+            self._connections[email_account.id] = (key, backend)
+            self.new_count += 1
+        return backend
+
+    def send(self, msg: EmailMessage, email_account: EmailAccount) -> None:
+        """Sends the message through the pooled connection.
+        A dropped connection is reopened and the sending is repeated once."""
+        msg.connection = self.get_connection(email_account)
+        try:
+            msg.send(fail_silently=False)
+        except SMTPServerDisconnected:
+            self.release(email_account)
+            msg.connection = self.get_connection(email_account)
+            msg.send(fail_silently=False)
+
+    def release(self, email_account: EmailAccount) -> None:
+        """Closes the connection of the email account."""
+        with self._lock:
+            _, backend = self._connections.pop(
+                email_account.id, (None, None)
+            )
+        if backend:
+            backend.close()
+
+    def close_all(self) -> None:
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+        for _, backend in connections:
+            backend.close()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                'open': len(self._connections),
+                'new': self.new_count,
+                'reused': self.reused_count,
+            }
+
+
+def get_account_key(email_account: EmailAccount) -> tuple:
+    """Connection settings of the account.
+    A connection is replaced if they are changed."""
+    return (
+        email_account.email_host,
+        email_account.email_port,
+        email_account.email_host_user,
+        email_account.email_host_password,
+        email_account.email_app_password,
+        email_account.email_use_tls,
+        email_account.email_use_ssl,
+        email_account.refresh_token,
+    )
+
+
+def is_alive(backend) -> bool:
+    connection = getattr(backend, 'connection', None)
+    if connection is None:
+        # backends without SMTP sessions (e.g. locmem)
+        return not hasattr(backend, 'connection')
+    try:
+        return connection.noop()[0] == 250
+    except (SMTPException, OSError):
+        return False
+
+
+smtp_pool = SMTPConnectionPool()
@@ -1,4 +1,6 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
 from django.utils.translation import gettext_lazy as _
 
 
@@ -7,3 +9,16 @@ class SettingsConfig(AppConfig):
     label = 'settings'
     verbose_name = _('Settings')
     default_auto_field = 'django.db.models.AutoField'
+
+    def ready(self):
+        from settings.matchers import matchers
+        for model_name in ('BannedCompanyName', 'PublicEmailDomain', 'StopPhrase'):
+            model = self.get_model(model_name)
+            post_save.connect(
+                matchers.invalidate, sender=model,
+                dispatch_uid=f'invalidate_matchers_{model_name}'
+            )
+            post_delete.connect(
+                matchers.invalidate, sender=model,
+                dispatch_uid=f'invalidate_matchers_{model_name}_delete'
+            )
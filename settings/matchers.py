@@ -0,0 +1,146 @@
+import atexit
+import re
+import threading
+import time
+from typing import Optional
+from django.conf import settings
+from django.core.mail import mail_admins
+from django.db import connection
+from django.utils import timezone
+
+from settings.models import BannedCompanyName
+from settings.models import PublicEmailDomain
+from settings.models import StopPhrase
+
+# Stop phrase hits are saved together once one of the limits is reached.
+HITS_FLUSH_INTERVAL = 60    # seconds
+HITS_FLUSH_SIZE = 50
+# The matchers are rebuilt after this time even without signals
+# (e.g. when the settings are changed by another process).
+MATCHERS_TTL = 5 * 60       # seconds
+
+
+class Matchers:
+    """
+    In-process cache of the spam filter settings.
+
+    The matchers are built from the database on first use and
+    dropped by the post_save and post_delete signals of
+    BannedCompanyName, PublicEmailDomain and StopPhrase models
+    (see SettingsConfig.ready) or after MATCHERS_TTL.
+    The stop phrase hits are saved by a timer at most HITS_FLUSH_INTERVAL
+    after the first of them and at exit (no timer when testing).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._banned_names = None
+        self._public_domains = None
+        self._stop_phrases = None
+        self._expires = 0
+        self._hits = set()
+        self._timer = None
+        self.ttl = MATCHERS_TTL
+        if not settings.TESTING:
+            atexit.register(self._flush_safely)
+
+    def invalidate(self, **kwargs) -> None:
+        with self._lock:
+            self._drop()
+
+    def _drop(self) -> None:
+        self._banned_names = None
+        self._public_domains = None
+        self._stop_phrases = None
+        self._expires = time.monotonic() + self.ttl
+
+    def _check_expiry(self) -> None:
+        # must be called with the lock held
+        if self._expires <= time.monotonic():
+            self._drop()
+
+    def find_banned_name(self, company: str) -> Optional[str]:
+        """Returns a banned name contained in the company name."""
+        with self._lock:
+            self._check_expiry()
+            if self._banned_names is None:
+                self._banned_names = compile_phrases(
+                    BannedCompanyName.objects.values_list('name', flat=True),
+                    re.IGNORECASE
+                )
+            matcher = self._banned_names
+        match = matcher.search(company) if matcher else None
+        return match.group() if match else None
+
+    def is_public_domain(self, domain: str) -> bool:
+        with self._lock:
+            self._check_expiry()
+            if self._public_domains is None:
+                self._public_domains = frozenset(
+                    PublicEmailDomain.objects.values_list('domain', flat=True)
+                )
+            return domain in self._public_domains
+
+    def find_stop_phrase(self, txt: str) -> Optional[str]:
+        """Returns a stop phrase found in the text and records the hit."""
+        with self._lock:
+            self._check_expiry()
+            if self._stop_phrases is None:
+                self._stop_phrases = compile_phrases(
+                    StopPhrase.objects.values_list('phrase', flat=True)
+                )
+            matcher = self._stop_phrases
+        match = matcher.search(txt) if matcher else None
+        if match:
+            self.hit(match.group())
+            return match.group()
+        return None
+
+    def hit(self, phrase: str) -> None:
+        with self._lock:
+            self._hits.add(phrase)
+            due = len(self._hits) >= HITS_FLUSH_SIZE
+            if not due and not self._timer and not settings.TESTING:
+                self._timer = threading.Timer(
+                    HITS_FLUSH_INTERVAL, self._flush_safely
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush_hits()
+
+    def flush_hits(self) -> None:
+        """Saves the last occurrence date of the stop phrases hit."""
+        with self._lock:
+            phrases, self._hits = self._hits, set()
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+        if phrases:
+            StopPhrase.objects.filter(phrase__in=phrases).update(
+                last_occurrence_date=timezone.localdate()
+            )
+
+    def _flush_safely(self) -> None:
+        try:
+            self.flush_hits()
+        except Exception as e:
+            mail_admins(
+                'Matchers Exception',
+                f'\nException: {e}',
+                fail_silently=True,
+            )
+        finally:
+            connection.close()
+
+
+def compile_phrases(phrases, flags: int = 0) -> Optional[re.Pattern]:
+    """Compiles the phrases into one pattern that finds
+    any of them in a single pass over the text."""
+    phrases = sorted(filter(None, phrases), key=len, reverse=True)
+    if not phrases:
+        return None
+    return re.compile('|'.join(map(re.escape, phrases)), flags)
+
+
+matchers = Matchers()
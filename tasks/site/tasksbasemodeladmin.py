@@ -21,8 +21,6 @@ from common.admin import FileInline
 from common.models import TheFile
 from common.site.basemodeladmin import BaseModelAdmin
 from common.utils.chat_link import get_chat_link
-from common.utils.email_to_participants import email_to_participants
-from common.utils.helpers import compose_message
 from common.utils.helpers import get_trans_for_user
 from common.utils.helpers import USER_MODEL
 from common.utils.helpers import get_active_users
@@ -30,8 +28,8 @@ from common.utils.helpers import get_department_id
 from common.utils.helpers import get_today
 from common.utils.helpers import get_formatted_short_date
 from common.utils.helpers import LEADERS
-from common.utils.helpers import notify_admins_no_email
 from common.utils.notify_user import notify_user
+from common.utils.notify_users import notify_users
 from common.utils.helpers import save_message
 from common.utils.remind_me import remind_me
 from tasks.models import Memo
@@ -619,25 +617,13 @@ def notify_participants(obj: Union[Task, Project], field: str) -> bool:
         notified_field.remove(*removed)
         obj_modified = True
     if difference:
-        difference = exclude_some_users(obj, difference)
-        recipient_list, notified = [], []
-        for user in difference:
-            if field == "responsible":
-                notify_user(obj, user, globals()[
-                            field + '_subject'], responsible=user)
-                notified.append(user)
-            else:
-                msg = get_trans_for_user(globals()[field + '_subject'], user)
-                composed_msg = compose_message(obj, msg)
-                save_message(user, composed_msg, "INFO")
-                if getattr(user, "email"):
-                    recipient_list.append(user)
-                    notified.append(user)
-                else:
-                    notify_admins_no_email(user)
-        if recipient_list and not field == "responsible":
-            email_to_participants(
-                obj, globals()[field + '_subject'], recipient_list)
+        difference = list(exclude_some_users(obj, difference))
+        subject = globals()[field + '_subject']
+        if field == "responsible":
+            notify_users(obj, difference, subject, each_responsible=True)
+            notified = difference
+        else:
+            notified = notify_users(obj, difference, subject, subject)
         if notified:
             notified_field.add(*notified)
             obj_modified = True
@@ -646,7 +632,6 @@ def notify_participants(obj: Union[Task, Project], field: str) -> bool:
 
 def notify_task_or_project_closed(request: WSGIRequest, obj: Union[Task, Project]) -> None:
     """Notify participants about the task or project closure."""
-    recipient_list = []
     responsible = None
     if obj.__class__ == Task:
         if obj.task:
@@ -664,15 +649,6 @@ def notify_task_or_project_closed(request: WSGIRequest, obj: Union[Task, Project
         users.append(obj.owner)
     if obj.co_owner and obj.co_owner != request.user:
         users.append(obj.co_owner)
-
-    for u in users:
-        trans_msg = get_trans_for_user(task_is_closed, u)
-        msg = compose_message(obj, trans_msg)
-        save_message(u, msg, "INFO")
-        if getattr(u, "email"):
-            recipient_list.append(u)
-        else:
-            notify_admins_no_email(u)
-    if recipient_list:
-        email_to_participants(obj, task_is_closed,
-                              recipient_list, responsible=responsible)
+    notify_users(
+        obj, users, task_is_closed, task_is_closed, responsible=responsible
+    )
@@ -299,34 +299,40 @@ class TestSaveSnapshotFunctionality(BaseTestCase):
         snapshots = IncomeStatSnapshot.objects.all()
         self.assertGreater(snapshots.count(), 0)
 
-    def test_snapshot_uses_correct_url(self):
-        """Test that snapshot is generated from IncomeStatAdmin URL."""
-
-        # Mock the Client class to verify the correct URL is called
-        with patch('analytics.utils.monthly_snapshot_saving.Client') as mock_client_class:
-            mock_client_instance = MagicMock()
-            mock_response = MagicMock()
-            mock_response.context_data = {'snapshot': '<html>test</html>'}
-            mock_client_instance.get.return_value = mock_response
-            mock_client_class.return_value = mock_client_instance
-
-            snapshot_service = SaveSnapshot()
-
-            # We need to patch get_manager_departments to avoid department issues
-            with patch('analytics.utils.monthly_snapshot_saving.get_manager_departments') as mock_depts:
-                from django.contrib.auth.models import Group
-                dept = Group.objects.filter(
-                    department__isnull=False).first()
-                if dept:
-                    mock_depts.return_value = [dept]
-                    snapshot_service.save_snapshots()
-
-                    # Verify the correct URL was called
-                    mock_client_instance.get.assert_called()
-                    call_args = mock_client_instance.get.call_args
-                    url = call_args[0][0] if call_args[0] else ''
-                    # Should contain incomestat in the URL
-                    self.assertIn('incomestat', url)
+    def test_snapshot_created_for_each_department(self):
+        """Test that the snapshot engine is called once per department."""
+        from django.contrib.auth.models import Group
+        dept_ids = list(Group.objects.filter(
+            department__isnull=False).values_list('id', flat=True))
+        with patch(
+            'analytics.utils.monthly_snapshot_saving.get_manager_departments'
+        ) as mock_depts, patch(
+            'analytics.utils.monthly_snapshot_saving.create_snapshot'
+        ) as mock_create:
+            mock_depts.return_value = Group.objects.filter(id__in=dept_ids)
+            SaveSnapshot().save_snapshots()
+
+        called_ids = [c.args[1] for c in mock_create.call_args_list]
+        self.assertCountEqual(called_ids, dept_ids)
+
+    def test_changelist_context_computed_once(self):
+        """Test that the income stat page computes its data only once
+        while also providing the snapshot of the page."""
+        from django.contrib.auth.models import User
+        from django.urls import reverse
+        from analytics.site.incomestatadmin import IncomeStatAdmin
+
+        user = User.objects.filter(is_superuser=True).first()
+        self.client.force_login(user)
+        url = reverse("site:analytics_incomestat_changelist")
+        with patch.object(
+            IncomeStatAdmin, 'create_context_data',
+            autospec=True, side_effect=IncomeStatAdmin.create_context_data
+        ) as mock_create_context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_create_context.call_count, 1)
+        self.assertIn('<', response.context_data['snapshot'])
 
     @override_settings(
         SECURE_HSTS_SECONDS=0,
@@ -0,0 +1,151 @@
+import os
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.test import tag
+from django.urls import reverse
+from django.utils import timezone
+
+from common.models import ExportJob
+from common.models import UserMessage
+from common.utils import export_jobs
+from common.utils.export_jobs import remove_old_files
+from common.utils.export_jobs import run_export_job
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_department_id
+from common.views.export_objects import get_exported_dir
+from crm.models import Company
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.common.utils.test_export_jobs --keepdb
+
+
+@tag('TestCase')
+class TestExportJobs(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        department_id = get_department_id(cls.owner)
+        for i in range(3):
+            Company.objects.create(
+                full_name=f"Company {i}",
+                owner=cls.owner,
+                department_id=department_id
+            )
+        cls.content_type = ContentType.objects.get_for_model(Company)
+        cls.export_url = reverse('export_objects') + \
+            f"?content_type={cls.content_type.id}"
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.client.force_login(self.owner)
+        self.file_paths = []
+
+    def tearDown(self):
+        for file_path in self.file_paths:
+            file_path.unlink(missing_ok=True)
+
+    def create_job(self) -> ExportJob:
+        return ExportJob.objects.create(
+            owner=self.owner,
+            content_type=self.content_type,
+            total=Company.objects.count()
+        )
+
+    def test_run_export_job(self):
+        job = self.create_job()
+        run_export_job(job.id, Company.objects.all())
+        job.refresh_from_db()
+        file_path = get_exported_dir() / job.file_name
+        self.file_paths.append(file_path)
+        self.assertEqual(job.status, ExportJob.DONE)
+        self.assertEqual(job.processed, job.total)
+        self.assertTrue(file_path.exists())
+        msg = UserMessage.objects.filter(user=self.owner).last()
+        self.assertIn(job.get_download_url(), msg.text)
+
+        response = self.client.get(job.get_status_url())
+        self.assertEqual(response.json()['download_url'], job.get_download_url())
+        response = self.client.get(job.get_download_url())
+        self.assertEqual(response.status_code, 200, response.reason_phrase)
+        response.close()
+
+        other_user = USER_MODEL.objects.get(username="Garry.Chief")
+        self.client.force_login(other_user)
+        response = self.client.get(job.get_download_url())
+        self.assertEqual(response.status_code, 404)
+
+    def test_large_export_is_run_in_background(self):
+        runner = apps.get_app_config('common').export_runner
+        with patch('common.views.export_objects.EXPORT_SYNC_LIMIT', 2), \
+                patch.object(runner.job_queue, 'put') as put:
+            response = self.client.get(
+                self.export_url, HTTP_REFERER='/admin/crm/company/'
+            )
+        self.assertRedirects(
+            response, '/admin/crm/company/', fetch_redirect_response=False
+        )
+        job = ExportJob.objects.get(owner=self.owner)
+        self.assertEqual(job.status, ExportJob.PENDING)
+        self.assertEqual(job.total, Company.objects.count())
+        put.assert_called_once()
+        self.assertEqual(put.call_args.args[0][0], job.id)
+
+    def test_runner_survives_failed_job(self):
+        job = self.create_job()
+        queryset = Company.objects.all()
+        runner = export_jobs.ExportJobRunner()
+        with patch.object(runner.job_queue, 'get',
+                          side_effect=[(job.id, queryset), KeyboardInterrupt]), \
+                patch.object(export_jobs, 'run_export_job',
+                             side_effect=RuntimeError('Disk is full')) as run_job, \
+                patch.object(export_jobs, 'close_old_connections'), \
+                patch.object(export_jobs, 'mail_admins') as mail_admins:
+            # the loop gets the next job after the failure
+            with self.assertRaises(KeyboardInterrupt):
+                runner.run()
+        run_job.assert_called_once_with(job.id, queryset)
+        mail_admins.assert_called_once()
+        job.refresh_from_db()
+        self.assertEqual(job.status, ExportJob.FAILED)
+        self.assertEqual(job.error, 'Disk is full')
+        self.assertIsNotNone(job.completion_date)
+
+    def test_lost_jobs_are_failed(self):
+        lost_job = self.create_job()
+        running_job = self.create_job()
+        old_time = timezone.now() - timedelta(seconds=export_jobs.LOST_JOB_TIME + 60)
+        ExportJob.objects.filter(
+            id__in=(lost_job.id, running_job.id)
+        ).update(heartbeat=old_time)
+        # this runner still has the running job (e.g. a sibling process)
+        runner = export_jobs.ExportJobRunner()
+        runner.job_ids.add(running_job.id)
+        runner.beat()
+        lost_job.refresh_from_db()
+        running_job.refresh_from_db()
+        self.assertEqual(lost_job.status, ExportJob.FAILED)
+        self.assertTrue(lost_job.error)
+        self.assertIsNotNone(lost_job.completion_date)
+        self.assertEqual(running_job.status, ExportJob.PENDING)
+        self.assertGreater(running_job.heartbeat, old_time)
+        msg = UserMessage.objects.get(user=self.owner)
+        self.assertIn(f'#{lost_job.id}', msg.text)
+
+    def test_remove_old_files(self):
+        exported_dir = get_exported_dir()
+        exported_dir.mkdir(parents=True, exist_ok=True)
+        old_file = exported_dir / "Company_db_old_export.xlsx"
+        new_file = exported_dir / "Company_db_new_export.xlsx"
+        self.file_paths.extend((old_file, new_file))
+        for file_path in self.file_paths:
+            file_path.touch()
+        old_time = time.time() - export_jobs.EXPORTED_FILES_TTL - 60
+        os.utime(old_file, (old_time, old_time))
+        remove_old_files()
+        self.assertFalse(old_file.exists())
+        self.assertTrue(new_file.exists())
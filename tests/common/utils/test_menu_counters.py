@@ -0,0 +1,87 @@
+from datetime import timedelta
+from django.test import RequestFactory
+from django.test import tag
+from django.urls import reverse
+from django.utils import timezone
+
+from common.utils.helpers import USER_MODEL
+from common.utils.menu_counters import menu_counters
+from common.utils.user_context import get_group_data
+from common.utils.usermiddleware import set_user_department
+from common.utils.usermiddleware import set_user_roles
+from crm.models import CrmEmail
+from tasks.models import Memo
+from tasks.models import Task
+from tasks.models import TaskStage
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.common.utils.test_menu_counters --keepdb
+
+
+@tag('TestCase')
+class TestMenuCounters(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.chief = USER_MODEL.objects.get(username="Garry.Chief")
+        stage = TaskStage.objects.get(default=True)
+        overdue_task = Task.objects.create(
+            name="Overdue task", stage=stage, owner=cls.chief,
+            next_step="call", next_step_date=timezone.now().date() - timedelta(days=1)
+        )
+        task = Task.objects.create(
+            name="Task", stage=stage, owner=cls.chief, next_step="call",
+        )
+        for t in (overdue_task, task):
+            t.responsible.add(cls.user)
+        Memo.objects.create(name="Memo", to=cls.user, owner=cls.chief)
+        CrmEmail.objects.create(
+            to="Michael <michael@example.com>", subject="Offer",
+            owner=cls.user, sent=False, incoming=False
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.ttl = menu_counters.ttl
+        menu_counters.ttl = 60
+        menu_counters.invalidate()
+
+    def tearDown(self):
+        menu_counters.ttl = self.ttl
+        menu_counters.invalidate()
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.user
+        group_names, department_ids = get_group_data(self.user.groups.all())
+        set_user_roles(request, group_names, department_ids)
+        set_user_department(request, department_ids)
+        return request
+
+    def test_counters_computed_with_one_query(self):
+        request = self.get_request()
+        with self.assertNumQueries(1):
+            counters = menu_counters.get(request)
+            menu_counters.get(request)
+        self.assertEqual(counters['task'], {'regular': 1, 'urgent': 1})
+        self.assertEqual(counters['memo']['regular'], 1)
+        self.assertEqual(counters['outbox']['regular'], 1)
+        self.assertEqual(counters['request'], {'regular': 0, 'urgent': 0})
+
+    def test_counters_cached_and_invalidated(self):
+        menu_counters.get(self.get_request())
+        request = self.get_request()
+        with self.assertNumQueries(0):
+            menu_counters.get(request)
+
+        Memo.objects.create(name="Memo 2", to=self.user, owner=self.chief)
+        counters = menu_counters.get(self.get_request())
+        self.assertEqual(counters['memo']['regular'], 2)
+
+    def test_menu_shows_counters(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('site:index'), follow=True)
+        self.assertEqual(response.status_code, 200, response.reason_phrase)
+        self.assertContains(response, "outbox (1)")
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+from django.db import connection
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+
+from common.models import UserMessage
+from common.models import UserProfile
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_trans_for_lang
+from common.utils.notify_users import notify_users
+from tasks.models import Task
+from tasks.models import TaskStage
+from tasks.site.tasksbasemodeladmin import subscribers_subject
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.common.utils.test_notify_users --keepdb
+
+
+@tag('TestCase')
+class TestNotifyUsers(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chief = USER_MODEL.objects.get(username="Garry.Chief")
+        cls.task = Task.objects.create(
+            name="Task for many subscribers", owner=cls.chief,
+            stage=TaskStage.objects.get(default=True), next_step="call"
+        )
+        cls.users = []
+        for i in range(20):
+            user = USER_MODEL.objects.create_user(
+                f'subscriber{i}', f'subscriber{i}@example.com'
+            )
+            UserProfile.objects.filter(user=user).update(
+                language_code='uk' if i % 2 else 'en'
+            )
+            cls.users.append(user)
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    def notify(self, users: list) -> tuple:
+        """Returns the number of queries and the sent email batch."""
+        users = USER_MODEL.objects.filter(id__in=[u.id for u in users])
+        with patch('common.utils.notify_users.send_crm_emails') as send, \
+                CaptureQueriesContext(connection) as context:
+            notify_users(self.task, users, subscribers_subject, subscribers_subject)
+        send.assert_called_once()
+        return len(context.captured_queries), send.call_args.args[0]
+
+    def test_notify_users_in_bulk(self):
+        number, emails = self.notify(self.users)
+        self.assertEqual(len(emails), 2)
+        en_subject, _, en_to = emails[0]
+        uk_subject, _, uk_to = emails[1]
+        self.assertEqual(en_to, [u.email for u in self.users[::2]])
+        self.assertEqual(uk_to, [u.email for u in self.users[1::2]])
+        self.assertIn(get_trans_for_lang(subscribers_subject, 'uk'), uk_subject)
+        self.assertIn(get_trans_for_lang(subscribers_subject, 'en'), en_subject)
+
+        msg, level = UserMessage.objects.filter(
+            user=self.users[1]
+        ).values_list('text', 'level').last()
+        self.assertIn(get_trans_for_lang(subscribers_subject, 'uk'), msg)
+        self.assertIn(self.task.get_absolute_url(), msg)
+        self.assertEqual(level, 'INFO')
+
+    def test_query_count_does_not_depend_on_users(self):
+        few_number, _ = self.notify(self.users[:4])
+        number, _ = self.notify(self.users)
+        self.assertEqual(few_number, number)
@@ -0,0 +1,133 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import tag
+from django.urls import reverse
+
+from common.models import SearchDocument
+from common.models import SearchIndexState
+from common.utils import search_index
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_department_id
+from crm.models import Company
+from crm.models import Contact
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.common.utils.test_search_index --keepdb
+
+
+@tag('TestCase')
+class TestSearchIndex(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.chief = USER_MODEL.objects.get(username="Garry.Chief")
+        cls.department_id = get_department_id(
+            USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        )
+        cls.company_changelist_url = reverse("site:crm_company_changelist")
+        cls.contact_changelist_url = reverse("site:crm_contact_changelist")
+        for model in (Company, Contact):
+            search_index.rebuild(model)
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.client.force_login(self.chief)
+
+    def create_company(self, full_name: str, **kwargs) -> Company:
+        return Company.objects.create(
+            full_name=full_name,
+            owner=self.chief,
+            department_id=self.department_id,
+            **kwargs
+        )
+
+    def search(self, url: str, term: str) -> list:
+        response = self.client.get(url, {'q': term})
+        self.assertEqual(response.status_code, 200, response.reason_phrase)
+        return list(response.context['cl'].result_list)
+
+    def test_search_by_word_prefixes(self):
+        company = self.create_company(
+            "Northwind Machinery", email="office@northwind.example.com"
+        )
+        self.create_company("Southwind Retail")
+        self.assertTrue(
+            SearchDocument.objects.filter(object_id=company.id).exists()
+        )
+        self.assertEqual(
+            self.search(self.company_changelist_url, "north mach"), [company]
+        )
+        self.assertEqual(
+            self.search(self.company_changelist_url, "office@northwind"), [company]
+        )
+        self.assertEqual(
+            self.search(self.company_changelist_url, "wind retail machinery"), []
+        )
+
+    def test_id_shortcut(self):
+        company = self.create_company("Northwind Machinery")
+        self.assertEqual(
+            self.search(self.company_changelist_url, f"ID {company.id}"), [company]
+        )
+
+    def test_best_matches_first(self):
+        once = self.create_company("Blue Lagoon", description="boats")
+        many = self.create_company(
+            "Boats and Yachts", description="boats, boat engines and boat parts"
+        )
+        self.assertEqual(
+            self.search(self.company_changelist_url, "boat"), [many, once]
+        )
+
+    def test_document_updated_on_related_object_save(self):
+        company = self.create_company("Northwind Machinery")
+        contact = Contact.objects.create(
+            first_name="Ethan", last_name="Hunt", company=company,
+            owner=self.chief, department_id=self.department_id
+        )
+        self.assertEqual(
+            self.search(self.contact_changelist_url, "northwind"), [contact]
+        )
+        company.full_name = "Eastwind Machinery"
+        company.save()
+        self.assertEqual(self.search(self.contact_changelist_url, "northwind"), [])
+        self.assertEqual(
+            self.search(self.contact_changelist_url, "eastwind hunt"), [contact]
+        )
+        contact.delete()
+        self.assertFalse(
+            SearchDocument.objects.filter(object_id=contact.id).exclude(
+                content_type__model='company'
+            ).exists()
+        )
+
+    def test_document_cleared_with_fields(self):
+        company = self.create_company("Northwind Machinery")
+        self.assertEqual(
+            self.search(self.company_changelist_url, "northwind"), [company]
+        )
+        company.full_name = ''
+        company.save()
+        self.assertEqual(self.search(self.company_changelist_url, "northwind"), [])
+        document = SearchDocument.objects.get(
+            content_type__model='company', object_id=company.id
+        )
+        self.assertEqual(document.document, '')
+
+    def test_rebuild_search_index(self):
+        SearchIndexState.objects.all().delete()
+        self.create_company("Eastwind Machinery")
+        # the objects saved before the rebuild are not all indexed
+        self.assertFalse(search_index.is_available(Company, "north"))
+        company = self.create_company("Northwind Machinery")
+        SearchDocument.objects.filter(object_id=company.id).delete()
+        # not indexed objects are searched without the index
+        self.assertEqual(
+            self.search(self.company_changelist_url, "Northwind"), [company]
+        )
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertTrue(search_index.is_available(Company, "north"))
+        self.assertEqual(
+            self.search(self.company_changelist_url, "north"), [company]
+        )
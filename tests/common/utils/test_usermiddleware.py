@@ -0,0 +1,103 @@
+from unittest.mock import patch
+from django.apps import apps
+from django.contrib.auth.models import Group
+from django.contrib.messages import get_messages
+from django.contrib.messages.storage.fallback import FallbackStorage
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test import tag
+
+from common.models import UserMessage
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import save_message
+from common.utils.user_context import user_contexts
+from common.utils.usermiddleware import UserMiddleware
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.common.utils.test_usermiddleware --keepdb
+
+
+@tag('TestCase')
+class TestUserMiddleware(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.user = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.middleware = UserMiddleware(lambda request: HttpResponse())
+        self.ttl = user_contexts.ttl
+        user_contexts.ttl = 60
+        user_contexts.invalidate()
+
+    def tearDown(self):
+        user_contexts.ttl = self.ttl
+        user_contexts.invalidate()
+
+    def get_request(self):
+        request = RequestFactory().get('/')
+        request.user = USER_MODEL.objects.get(id=self.user.id)
+        request.session = SessionStore()
+        request._messages = FallbackStorage(request)
+        return request
+
+    def test_cached_context_costs_no_queries(self):
+        self.middleware(self.get_request())
+        request = self.get_request()
+        with self.assertNumQueries(0):
+            self.middleware(request)
+        self.assertTrue(request.user.is_manager)
+        self.assertFalse(request.user.is_chief)
+        self.assertIsNotNone(request.user.department_id)
+
+    def test_context_invalidated_on_group_change(self):
+        self.middleware(self.get_request())
+        self.user.groups.add(Group.objects.get(name='chiefs'))
+        request = self.get_request()
+        self.middleware(request)
+        self.assertTrue(request.user.is_chief)
+
+    def test_stored_messages_shown(self):
+        self.middleware(self.get_request())
+        with self.captureOnCommitCallbacks(execute=True):
+            save_message(self.user, "Report is ready")
+            # not flagged until the message is committed
+            self.assertFalse(user_contexts.get(self.user).has_messages)
+        request = self.get_request()
+        self.middleware(request)
+        self.assertEqual(
+            [str(m) for m in get_messages(request)], ["Report is ready"]
+        )
+        self.assertFalse(
+            UserMessage.objects.filter(user=self.user, delivered=False).exists()
+        )
+        # the delivered messages are not shown again
+        request = self.get_request()
+        with self.assertNumQueries(0):
+            self.middleware(request)
+        self.assertEqual(list(get_messages(request)), [])
+
+    def test_messages_of_concurrent_senders_kept(self):
+        user_profile = self.user.profile
+        save_message(self.user, "Task is closed")
+        # a stale profile saved by another thread does not drop the message
+        user_profile.save()
+        save_message(self.user, "Export is ready", 'SUCCESS')
+        request = self.get_request()
+        with self.assertNumQueries(4):
+            self.middleware(request)
+        self.assertEqual(
+            [str(m) for m in get_messages(request)],
+            ["Task is closed", "Export is ready"]
+        )
+
+    def test_import_emails_throttled(self):
+        crm_config = apps.get_app_config('crm')
+        with patch.object(crm_config, 'import_emails') as mock_import, \
+                patch('common.utils.user_context.monotonic', return_value=10**9):
+            self.middleware(self.get_request())
+            self.middleware(self.get_request())
+        mock_import.assert_called_once()
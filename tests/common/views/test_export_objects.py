@@ -0,0 +1,79 @@
+import openpyxl
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_department_id
+from common.views.export_objects import get_file_path
+from crm.models import Company
+from crm.models import Industry
+from tests.base_test_classes import BaseTestCase
+
+# python manage.py test tests.common.views.test_export_objects --keepdb
+
+
+@tag('TestCase')
+class TestExportObjects(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.department_id = get_department_id(cls.owner)
+        cls.industries = [
+            Industry.objects.create(name=name, department_id=cls.department_id)
+            for name in ("Machinery", "Retail")
+        ]
+        cls.export_url = reverse('export_objects') + \
+            f"?content_type={ContentType.objects.get_for_model(Company).id}"
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.client.force_login(self.owner)
+        self.file_path = get_file_path(self.owner.username, model=Company)
+
+    def tearDown(self):
+        self.file_path.unlink(missing_ok=True)
+
+    def create_companies(self, number: int) -> None:
+        for i in range(number):
+            company = Company.objects.create(
+                full_name=f"Company {i}",
+                email=f"office{i}@example.com",
+                owner=self.owner,
+                department_id=self.department_id
+            )
+            company.industry.add(*self.industries)
+
+    def export(self) -> int:
+        """Returns the number of queries of the export."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.export_url)
+            self.assertEqual(response.status_code, 200, response.reason_phrase)
+            b''.join(response.streaming_content)
+            response.close()
+        return len(context.captured_queries)
+
+    def test_export_companies(self):
+        self.create_companies(2)
+        self.export()
+        sheet = openpyxl.load_workbook(self.file_path).active
+        rows = list(sheet.values)
+        self.assertEqual(list(rows[0]), settings.COMPANY_COLUMNS)
+        self.assertEqual(len(rows), 3)
+        row = dict(zip(rows[0], rows[1]))
+        self.assertEqual(row['full_name'], "Company 0")
+        self.assertEqual(row['industry'], "Machinery,Retail")
+        self.assertEqual(row['owner'], str(self.owner))
+        self.assertIs(row['massmail'], True)
+
+    def test_export_query_count(self):
+        """The number of queries does not depend on the number of objects."""
+        self.create_companies(1)
+        query_count = self.export()
+        self.create_companies(5)
+        self.assertEqual(self.export(), query_count)
@@ -0,0 +1,33 @@
+from io import StringIO
+from django.core.management import call_command
+from django.db import connection
+from django.test import tag
+
+from crm.models import CrmEmail
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.test_benchmark_indexes --keepdb
+
+
+@tag('TestCase')
+class TestBenchmarkIndexes(BaseTestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    def test_benchmark_indexes(self):
+        out = StringIO()
+        call_command('benchmark_indexes', rows=50, repeat=1, stdout=out)
+        output = out.getvalue()
+        self.assertIn("Without indexes:", output)
+        self.assertIn("CrmEmail by message_id", output)
+        # the generated data is rolled back and the indexes are restored
+        self.assertFalse(CrmEmail.objects.filter(
+            subject__startswith="Benchmark email"
+        ).exists())
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, CrmEmail._meta.db_table
+            )
+        for index in CrmEmail._meta.indexes:
+            self.assertIn(index.name, constraints)
@@ -1,10 +1,16 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from crm.models import Company
 from crm.models import Contact
+from crm.site.crmmodeladmin import did_not_receive_title
+from crm.site.crmmodeladmin import subscribed_title
 from common.utils.helpers import get_department_id
 from common.utils.helpers import USER_MODEL
+from massmail.models import MailingOut
 from tests.base_test_classes import BaseTestCase
 from tests.utils.helpers import get_adminform_initials
 
@@ -94,3 +100,38 @@ class TestContact(BaseTestCase):
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         changelist_url = reverse("admin:crm_contact_changelist")
         self.assertEqual(response.redirect_chain[0][0], changelist_url)
+
+    def test_newsletters_subscriptions_in_changelist(self):
+        """The mailing reach of the contacts is annotated with one query."""
+        def get_response():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.changelist_url)
+            self.assertEqual(response.status_code, 200, response.reason_phrase)
+            queries = [
+                q for q in context.captured_queries
+                if 'massmail_mailingoutrecipient' in q['sql']
+            ]
+            return response, len(queries)
+
+        contact_data = self.contact_data.copy()
+        contact_data['company'] = self.company
+        contact = Contact.objects.create(**contact_data)
+        mailing_out = MailingOut.objects.create(
+            name="Test MO",
+            recipients_number=1,
+            content_type=ContentType.objects.get_for_model(Contact),
+            owner=self.user,
+            department_id=self.contact_data['department_id']
+        )
+        mailing_out.add_recipient_ids([contact.id])
+        mailing_out.move_to_successful_ids(contact.id)
+        response, query_count = get_response()
+        self.assertEqual(query_count, 1)
+        self.assertContains(response, subscribed_title)
+        self.assertNotContains(response, did_not_receive_title)
+
+        for _ in range(3):
+            Contact.objects.create(**contact_data)
+        response, query_count = get_response()
+        self.assertContains(response, did_not_receive_title)
+        self.assertEqual(query_count, 1)
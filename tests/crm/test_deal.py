@@ -3,7 +3,9 @@ from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
 from django.core import mail
+from django.db import connection
 from django.test import tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.formats import date_format
 
@@ -21,6 +23,7 @@ from crm.models import Product
 from crm.models import Request
 from crm.models import Stage
 from crm.models.others import ClosingReason
+from crm.utils.ticketproc import new_ticket
 from tests.crm.test_request_methods import populate_db
 from tests.base_test_classes import BaseTestCase
 from tests.utils.helpers import get_adminform_initials
@@ -130,6 +133,23 @@ class TestDeal(BaseTestCase):
         response = self.client.get(self.deal_change_url, follow=True)
         self.assertEqual(response.status_code, 200, response.reason_phrase)
 
+    def test_deal_changelist_query_count(self):
+        """The number of queries does not depend on the number of deals."""
+        def get_query_count():
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.get(self.deal_changelist_url)
+            self.assertEqual(response.status_code, 200, response.reason_phrase)
+            return len(context.captured_queries)
+
+        self.client.get(self.deal_changelist_url)   # warm up the caches
+        query_count = get_query_count()
+        for _ in range(5):
+            deal = Deal.objects.get(id=self.deal.id)
+            deal.pk = None
+            deal.ticket = new_ticket()
+            deal.save()
+        self.assertEqual(get_query_count(), query_count)
+
     def test_for_chief(self):
         """
         Test the availability of the fields 'important' and 'translation' for the chief.
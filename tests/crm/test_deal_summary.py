@@ -0,0 +1,166 @@
+from importlib import import_module
+from io import StringIO
+from django.apps import apps
+from django.conf import settings
+from django.core.management import call_command
+from django.db.models import F
+from django.test import tag
+
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_delta_date
+from common.utils.helpers import get_department_id
+from crm.models import Company
+from crm.models import Currency
+from crm.models import Deal
+from crm.models import DealSummary
+from crm.models import Lead
+from crm.models import Payment
+from crm.site.dealadmin import DealAdmin
+from crm.utils.ticketproc import new_ticket
+from quality.models import TransactionQualityEvent
+from quality.models import TransactionQualitySignal
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.test_deal_summary --keepdb
+
+
+@tag('TestCase')
+class TestDealSummary(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.company = Company.objects.create(
+            full_name='Test Company LLC',
+            email='office@testcompany.com',
+        )
+        cls.lead = Lead.objects.create(
+            first_name='Michael',
+            email='Michael@example.com',
+        )
+        cls.currency = Currency.objects.first()
+        cls.signal = TransactionQualitySignal.objects.create(
+            name='Late response', weight=-5,
+            department_id=get_department_id(cls.owner)
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.deal = self.create_deal(company=self.company)
+
+    def create_deal(self, **kwargs):
+        return Deal.objects.create(
+            name="Test deal",
+            department_id=get_department_id(self.owner),
+            ticket=new_ticket(),
+            next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1),
+            owner=self.owner,
+            **kwargs
+        )
+
+    def get_summary(self, deal=None):
+        return DealSummary.objects.get(deal=deal or self.deal)
+
+    def test_paid_amount(self):
+        payment = Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=100, currency=self.currency
+        )
+        Payment.objects.create(
+            deal=self.deal, status=Payment.GUARANTEED,
+            amount=500, currency=self.currency
+        )
+        self.assertEqual(self.get_summary().paid_amount, 100)
+        payment.delete()
+        self.assertEqual(self.get_summary().paid_amount, 0)
+
+    def test_payment_moved_to_other_deal(self):
+        other_deal = self.create_deal(company=self.company)
+        payment = Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=100, currency=self.currency
+        )
+        payment.deal = other_deal
+        payment.save()
+        self.assertEqual(self.get_summary().paid_amount, 0)
+        self.assertEqual(self.get_summary(other_deal).paid_amount, 100)
+
+    def test_quality_score(self):
+        self.assertIsNone(self.get_summary().quality_score)
+        for weight in (-5, 2):
+            TransactionQualityEvent.objects.create(
+                signal=self.signal, weight=weight, deal=self.deal
+            )
+        self.assertEqual(self.get_summary().quality_score, -3)
+
+    def test_counterparty_deals(self):
+        self.assertEqual(self.get_summary().counterparty_deals, 1)
+        lead_deal = self.create_deal(lead=self.lead)
+        self.assertEqual(self.get_summary(lead_deal).counterparty_deals, 1)
+
+        lead_deal.company = self.company
+        lead_deal.save()
+        self.assertEqual(self.get_summary().counterparty_deals, 2)
+        self.assertEqual(self.get_summary(lead_deal).counterparty_deals, 2)
+
+        lead_deal.delete()
+        self.assertEqual(self.get_summary().counterparty_deals, 1)
+
+    def test_rebuild_deal_summaries_command(self):
+        Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=100, currency=self.currency
+        )
+        other_deal = self.create_deal(company=self.company)
+        DealSummary.objects.all().delete()
+        call_command('rebuild_deal_summaries', batch_size=1, stdout=StringIO())
+        summary = self.get_summary()
+        self.assertEqual(summary.paid_amount, 100)
+        self.assertEqual(summary.counterparty_deals, 2)
+        self.assertEqual(self.get_summary(other_deal).paid_amount, 0)
+
+    def test_missing_summary_is_built_on_change(self):
+        Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=100, currency=self.currency
+        )
+        other_deal = self.create_deal(company=self.company)
+        # deals created before DealSummary was added
+        DealSummary.objects.all().delete()
+        Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=50, currency=self.currency
+        )
+        summary = self.get_summary()
+        self.assertEqual(summary.paid_amount, 150)
+        self.assertEqual(summary.counterparty_deals, 2)
+
+        self.create_deal(company=self.company)
+        self.assertEqual(self.get_summary(other_deal).counterparty_deals, 3)
+
+    def test_deal_counter_without_summary(self):
+        self.create_deal(company=self.company)
+        # e.g. the deals are loaded by loaddata
+        DealSummary.objects.all().delete()
+        deal = Deal.objects.annotate(
+            deal_count=F('summary__counterparty_deals')
+        ).get(id=self.deal.id)
+        self.assertIn('(2)', DealAdmin.deal_counter(deal))
+
+    def test_migration_builds_summaries(self):
+        Payment.objects.create(
+            deal=self.deal, status=Payment.RECEIVED,
+            amount=100, currency=self.currency
+        )
+        TransactionQualityEvent.objects.create(
+            signal=self.signal, weight=-5, deal=self.deal
+        )
+        DealSummary.objects.all().delete()
+        migration = import_module('crm.migrations.0013_dealsummary')
+        migration.build_summaries(apps, None)
+        summary = self.get_summary()
+        self.assertEqual(summary.paid_amount, 100)
+        self.assertEqual(summary.quality_score, -5)
+        self.assertEqual(summary.counterparty_deals, 1)
@@ -0,0 +1,130 @@
+from importlib import import_module
+from io import StringIO
+from django.apps import apps
+from django.core.management import call_command
+from django.test import tag
+
+from common.utils.helpers import get_phone_key
+from crm.models import Company
+from crm.models import Contact
+from crm.models import Lead
+from crm.models import Request
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.test_update_phone_keys --keepdb
+
+
+@tag('TestCase')
+class TestPhoneKeys(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.company = Company.objects.create(
+            full_name='Test Company LLC',
+            email='office@testcompany.com',
+            phone='+1 (432) 456-78-90'
+        )
+        cls.contact = Contact.objects.create(
+            first_name='Tom',
+            email='Tom@testcompany.com',
+            mobile='8(43)123-45-67',
+            company=cls.company
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    def test_get_phone_key(self):
+        self.assertEqual(get_phone_key('+1 (432) 456-78-90'), '0987654234')
+        self.assertEqual(get_phone_key('432/456-7890'), '0987654234')
+        self.assertEqual(get_phone_key('12-34'), '')
+        self.assertEqual(get_phone_key('unknown'), '')
+
+    def test_keys_are_set_on_save(self):
+        self.assertEqual(self.company.phone_key, '0987654234')
+        self.assertEqual(self.contact.mobile_key, '7654321348')
+        self.assertEqual(self.contact.phone_key, '')
+        self.contact.mobile = ''
+        self.contact.phone = '+38 (043) 123-45-67'
+        self.contact.save(update_fields=['phone', 'mobile'])
+        self.contact.refresh_from_db()
+        self.assertEqual(self.contact.phone_key, '7654321340')
+        self.assertEqual(self.contact.mobile_key, '')
+
+    def test_find_contact_by_phone(self):
+        request = Request(
+            request_for='test inquiry',
+            first_name='Tom',
+            phone='+8 (431) 234-567',
+        )
+        request.find_contact_or_lead()
+        self.assertEqual(request.contact, self.contact)
+
+    def test_find_contact_by_short_phone(self):
+        # the number is written without its code
+        request = Request(
+            request_for='test inquiry',
+            first_name='Tom',
+            phone='123-45-67',
+        )
+        request.find_contact_or_lead()
+        self.assertEqual(request.contact, self.contact)
+
+        # the number of the contact is written without its code
+        Contact.objects.filter(id=self.contact.id).update(
+            mobile='123-45-67', mobile_key='7654321'
+        )
+        request = Request(
+            request_for='test inquiry',
+            first_name='Tom',
+            phone='+38 (043) 123-45-67',
+        )
+        request.find_contact_or_lead()
+        self.assertEqual(request.contact, self.contact)
+
+    def test_short_numbers_are_not_matched_by_end(self):
+        # an extension is not a local number
+        Contact.objects.filter(id=self.contact.id).update(
+            mobile='34567', mobile_key='76543'
+        )
+        request = Request(
+            request_for='test inquiry',
+            first_name='Tom',
+            phone='+38 (043) 123-45-67',
+        )
+        request.find_contact_or_lead()
+        self.assertIsNone(request.contact)
+        request = Request(
+            request_for='test inquiry',
+            first_name='Tom',
+            phone='345-67',
+        )
+        request.find_contact_or_lead()
+        self.assertEqual(request.contact, self.contact)
+
+    def test_update_phone_keys_command(self):
+        lead = Lead.objects.create(
+            first_name='Michael',
+            email='Michael@testcompany.com',
+            phone='843/123-4567'
+        )
+        Lead.objects.filter(id=lead.id).update(phone_key='')
+        Contact.objects.filter(id=self.contact.id).update(mobile_key='')
+        call_command('update_phone_keys', batch_size=1, stdout=StringIO())
+        lead.refresh_from_db()
+        self.contact.refresh_from_db()
+        self.assertEqual(lead.phone_key, '7654321348')
+        self.assertEqual(self.contact.mobile_key, '7654321348')
+
+    def test_migration_fills_in_keys(self):
+        migration = import_module(
+            'crm.migrations.0012_company_phone_key_contact_mobile_key_and_more'
+        )
+        Company.objects.filter(id=self.company.id).update(phone_key='')
+        Contact.objects.filter(id=self.contact.id).update(mobile_key='')
+        migration.set_phone_keys(apps, None)
+        self.company.refresh_from_db()
+        self.contact.refresh_from_db()
+        self.assertEqual(self.company.phone_key, '0987654234')
+        self.assertEqual(self.contact.mobile_key, '7654321348')
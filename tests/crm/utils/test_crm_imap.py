@@ -5,7 +5,6 @@ Tests IMAP connection management, mailbox operations, and email
 manipulation functionality.
 """
 import imaplib
-from datetime import datetime as dt
 from time import sleep
 from unittest.mock import MagicMock, patch
 
@@ -32,7 +31,7 @@ class TestCrmImapInitialization(BaseTestCase):
         crmimap = CrmIMAP(email_user)
 
         self.assertEqual(crmimap.email_host_user, email_user)
-        self.assertTrue(crmimap.locked)
+        self.assertIsNone(crmimap.pool)
 
     def test_initialization_sets_email_host_user(self):
         """Test email_host_user is set correctly."""
@@ -87,13 +86,6 @@ class TestCrmImapCompleteInit(BaseTestCase):
         self.assertIsNotNone(self.crmimap.create_time)
         self.assertIsNotNone(self.crmimap.last_request_time)
 
-    def test_complete_init_sets_lockfile_path(self):
-        """Test _complete_init sets lockfile path."""
-        self.crmimap._complete_init({}, self.email_account)
-
-        self.assertIsNotNone(self.crmimap.lockfile)
-        self.assertIn(self.email_account.imap_host, str(self.crmimap.lockfile))
-
 
 @tag('TestCase')
 class TestCrmImapConnect(BaseTestCase):
@@ -233,43 +225,6 @@ class TestCrmImapCloseAndLogout(BaseTestCase):
         self.crmimap.close_and_logout()
 
 
-@tag('TestCase')
-class TestCrmImapLock(BaseTestCase):
-    """Test CrmIMAP lock mechanism."""
-
-    def setUp(self):
-        print(" Run Test Method:", self._testMethodName)
-
-        self.crmimap = CrmIMAP('test@example.com')
-        self.crmimap.create_time = dt.now()
-        self.crmimap.noop_time = None
-        self.crmimap.last_request_time = dt.now()
-        self.crmimap.debug = 0
-
-    def test_lock_when_unlocked(self):
-        """Test lock when instance is unlocked."""
-        self.crmimap.locked = False
-
-        self.crmimap.lock()
-
-        self.assertTrue(self.crmimap.locked)
-
-    @patch('crm.utils.crm_imap.mail_admins')
-    @patch('crm.utils.crm_imap.Site')
-    @patch('crm.utils.crm_imap.release_limit', 1)
-    @patch('crm.utils.crm_imap.sleep')
-    def test_lock_timeout_raises_error(self, mock_sleep, mock_site, mock_mail_admins):
-        """Test lock raises RuntimeError on timeout."""
-        self.crmimap.locked = True
-        self.crmimap.ea = MagicMock()
-        mock_site.objects.get_current.return_value.domain = 'example.com'
-
-        with self.assertRaises(RuntimeError):
-            self.crmimap.lock()
-
-        mock_mail_admins.assert_called_once()
-
-
 @tag('TestCase')
 class TestCrmImapRelease(BaseTestCase):
     """Test CrmIMAP release mechanism."""
@@ -282,20 +237,32 @@ class TestCrmImapRelease(BaseTestCase):
 
     @override_settings(REUSE_IMAP_CONNECTION=True)
     def test_release_with_reuse_connection(self):
-        """Test release unlocks when REUSE_IMAP_CONNECTION is True."""
-        self.crmimap.locked = True
+        """Test release returns the instance to the pool when REUSE_IMAP_CONNECTION is True."""
+        self.crmimap.pool = MagicMock()
 
-        self.crmimap.release()
+        with patch.object(self.crmimap, 'close_and_logout') as mock_close:
+            self.crmimap.release()
 
-        self.assertFalse(self.crmimap.locked)
+            mock_close.assert_not_called()
+        self.crmimap.pool.release.assert_called_once_with(self.crmimap)
 
     @override_settings(REUSE_IMAP_CONNECTION=False)
     def test_release_without_reuse_connection(self):
         """Test release closes connection when REUSE_IMAP_CONNECTION is False."""
-        self.crmimap.locked = True
+        with patch.object(self.crmimap, 'close_and_logout') as mock_close:
+            self.crmimap.release()
+
+            mock_close.assert_called_once()
+
+    @override_settings(REUSE_IMAP_CONNECTION=False)
+    def test_release_twice_closes_once(self):
+        """Test the second release of a pooled instance does nothing."""
+        self.crmimap.pool = MagicMock()
+        self.crmimap.pool.discard.side_effect = [True, False]
 
         with patch.object(self.crmimap, 'close_and_logout') as mock_close:
             self.crmimap.release()
+            self.crmimap.release()
 
             mock_close.assert_called_once()
 
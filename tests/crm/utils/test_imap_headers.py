@@ -0,0 +1,158 @@
+from email.utils import format_datetime
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from django.db import connection
+from django.test import tag
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from common.utils.helpers import USER_MODEL
+from crm.models import CrmEmail
+from crm.models import ImapHeader
+from crm.utils import imap_headers
+from massmail.models.email_account import EmailAccount
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.utils.test_imap_headers --keepdb
+
+
+class FakeBox:
+    """Answers the STATUS, UID SEARCH and UID FETCH commands."""
+
+    def __init__(self, ea, messages: dict, uidvalidity: int = 1):
+        self.messages = messages    # uid -> (date, seen)
+        self.uidvalidity = uidvalidity
+        self.fetched = []
+        self.crmimap = MagicMock(ea=ea, error=None)
+        self.crmimap.get_box_status.side_effect = self.status
+        self.crmimap.search.side_effect = self.search
+        self.crmimap.uid_fetch.side_effect = self.uid_fetch
+
+    def status(self, box, names):
+        return {
+            'UIDVALIDITY': str(self.uidvalidity),
+            'UIDNEXT': str(max(self.messages, default=0) + 1),
+            'MESSAGES': str(len(self.messages)),
+        }
+
+    def search(self, params):
+        uids = sorted(self.messages)
+        if params.startswith('UID '):
+            start = int(params[4:].split(':')[0])
+            # 'n:*' includes the last message even if its uid is lower
+            uids = [u for u in uids if u >= start] or uids[-1:]
+        return 'OK', [' '.join(map(str, uids)).encode()], None
+
+    def uid_fetch(self, uid_set: bytes, param):
+        uids = []
+        for part in uid_set.decode().split(','):
+            start, _, end = part.partition(':')
+            last = max(self.messages) if end == '*' else int(end or start)
+            uids.extend(u for u in self.messages if int(start) <= u <= last)
+        if uid_set.endswith(b'*') and not uids:
+            uids = [max(self.messages)]
+        data = []
+        for n, uid in enumerate(sorted(uids), start=1):
+            date, seen = self.messages[uid]
+            flags = r'\Seen' if seen else ''
+            if param == '(FLAGS)':
+                data.append(f'{n} (UID {uid} FLAGS ({flags}))'.encode())
+                continue
+            self.fetched.append(uid)
+            header = f'Subject: Email {uid}\r\nFrom: a@example.com\r\n' \
+                     f'Date: {format_datetime(date)}\r\n\r\n'.encode()
+            data.append((
+                f'{n} (UID {uid} FLAGS ({flags}) BODY[HEADER.FIELDS '
+                f'(SUBJECT FROM TO DATE DELIVERY-DATE)] {{{len(header)}}}'.encode(),
+                header
+            ))
+            data.append(b')')
+        return 'OK', data, None
+
+
+@tag('TestCase')
+class TestImapHeaders(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.ea = EmailAccount.objects.create(
+            name='Email Account',
+            email_host='smtp.example.com',
+            email_port=587,
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            owner=cls.owner,
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        now = timezone.now().replace(microsecond=0)
+        self.box = FakeBox(self.ea, {
+            uid: (now - timezone.timedelta(hours=uid), uid % 2 == 0)
+            for uid in range(1, 11)
+        })
+
+    def get_uids(self) -> list:
+        return list(imap_headers.get_headers(self.ea, 'INBOX').order_by(
+            'uid').values_list('uid', flat=True))
+
+    def test_index_is_updated_by_delta(self):
+        self.assertIsNone(imap_headers.update_index(self.box.crmimap, 'INBOX'))
+        self.assertEqual(self.get_uids(), list(range(1, 11)))
+        header = ImapHeader.objects.get(email_account=self.ea, uid=4)
+        self.assertTrue(header.seen)
+        self.assertEqual(header.subject, "Email 4")
+        self.assertEqual(header.date, self.box.messages[4][0])
+
+        # nothing is fetched without changes
+        self.box.fetched.clear()
+        imap_headers.update_index(self.box.crmimap, 'INBOX')
+        self.assertEqual(self.box.fetched, [])
+        self.assertEqual(self.box.crmimap.search.call_count, 1)
+
+        # new and removed messages
+        self.box.messages[11] = self.box.messages.pop(3)
+        del self.box.messages[7]
+        imap_headers.update_index(self.box.crmimap, 'INBOX')
+        self.assertEqual(self.box.fetched, [11])
+        self.assertEqual(self.get_uids(), [1, 2, 4, 5, 6, 8, 9, 10, 11])
+
+    def test_first_visit_is_fetched_in_batches(self):
+        with patch.object(imap_headers, 'FETCH_BATCH_SIZE', 4):
+            imap_headers.update_index(self.box.crmimap, 'INBOX')
+        self.assertEqual(self.get_uids(), list(range(1, 11)))
+        requested = [
+            c.args[0] for c in self.box.crmimap.uid_fetch.call_args_list
+        ]
+        self.assertEqual(requested, [b'1:4', b'5:8', b'9:10'])
+
+    def test_uidvalidity_change_rebuilds_index(self):
+        imap_headers.update_index(self.box.crmimap, 'INBOX')
+        self.box.uidvalidity = 2
+        self.box.fetched.clear()
+        imap_headers.update_index(self.box.crmimap, 'INBOX')
+        self.assertEqual(self.box.fetched, list(range(1, 11)))
+        self.assertFalse(imap_headers.get_headers(self.ea, 'INBOX').exclude(
+            uidvalidity=2).exists())
+
+    def test_flags_and_imported_emails_of_page(self):
+        imap_headers.update_index(self.box.crmimap, 'INBOX')
+        headers = list(imap_headers.get_headers(self.ea, 'INBOX').order_by('uid'))
+        self.box.messages[1] = (self.box.messages[1][0], True)
+        imap_headers.update_flags(self.box.crmimap, headers)
+        self.assertTrue(ImapHeader.objects.get(email_account=self.ea, uid=1).seen)
+
+        CrmEmail.objects.create(
+            subject="Email 5", incoming=True, owner=self.owner,
+            email_host_user=self.ea.email_host_user,
+            creation_date=self.box.messages[5][0],
+        )
+        with CaptureQueriesContext(connection) as context:
+            dates = imap_headers.get_imported_dates(self.ea, headers)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(
+            [h.uid for h in headers if h.date in dates], [5]
+        )
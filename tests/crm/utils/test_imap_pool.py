@@ -0,0 +1,99 @@
+import threading
+from time import sleep
+from unittest.mock import MagicMock
+from django.test import tag
+
+from crm.utils.imap_pool import ImapPool
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.utils.test_imap_pool --keepdb
+
+
+def get_crmimap(email_host_user='test@example.com'):
+    crmimap = MagicMock()
+    crmimap.email_host_user = email_host_user
+    return crmimap
+
+
+@tag('TestCase')
+class TestImapPool(BaseTestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.pool = ImapPool(size=1, timeout=1)
+
+    def test_idle_connection_reused(self):
+        self.assertIsNone(self.pool.acquire('test@example.com'))
+        crmimap = get_crmimap()
+        self.pool.add(crmimap)
+        self.pool.release(crmimap)
+        self.assertIs(self.pool.acquire('test@example.com'), crmimap)
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['busy'], 1)
+        self.assertEqual(stats['idle'], 0)
+        self.assertEqual(stats['acquired'], 2)
+        self.assertEqual(stats['utilization'], 1.0)
+
+    def test_acquire_timeout(self):
+        self.pool.timeout = 0.05
+        self.pool.acquire('test@example.com')
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire('test@example.com')
+        self.assertEqual(self.pool.get_stats()['timeouts'], 1)
+        self.assertEqual(self.pool.get_stats()['waiting'], 0)
+        # other accounts are not blocked
+        self.assertIsNone(self.pool.acquire('other@example.com'))
+
+    def test_waiting_customer_gets_released_connection(self):
+        self.pool.acquire('test@example.com')
+        crmimap = get_crmimap()
+        self.pool.add(crmimap)
+        result = []
+        waiter = threading.Thread(
+            target=lambda: result.append(self.pool.acquire('test@example.com'))
+        )
+        waiter.start()
+        while not self.pool.get_stats()['waiting']:
+            sleep(0.001)
+        self.pool.release(crmimap)
+        waiter.join(1)
+        self.assertEqual(result, [crmimap])
+        stats = self.pool.get_stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+
+    def test_release_and_discard_are_idempotent(self):
+        self.pool.acquire('test@example.com')
+        crmimap = get_crmimap()
+        self.pool.add(crmimap)
+        self.assertTrue(self.pool.discard(crmimap))
+        self.assertFalse(self.pool.discard(crmimap))
+        self.pool.release(crmimap)
+        self.assertFalse(self.pool.has_connections('test@example.com'))
+        # the place is free for a new connection
+        self.assertIsNone(self.pool.acquire('test@example.com'))
+
+    def test_cancel_frees_place(self):
+        self.pool.acquire('test@example.com')
+        self.pool.cancel('test@example.com')
+        self.assertEqual(self.pool.get_stats()['busy'], 0)
+
+    def test_evict_idle(self):
+        old, new = get_crmimap(), get_crmimap('new@example.com')
+        for crmimap in (old, new):
+            self.pool.acquire(crmimap.email_host_user)
+            self.pool.add(crmimap)
+            self.pool.release(crmimap)
+        old.last_used -= 120
+        self.assertEqual(self.pool.evict_idle(60), [old])
+        self.assertEqual(self.pool.get_stats()['idle'], 1)
+        self.assertEqual(self.pool.get_stats()['evicted'], 1)
+
+    def test_take_idle(self):
+        self.pool.acquire('test@example.com')
+        crmimap = get_crmimap()
+        self.pool.add(crmimap)
+        self.pool.release(crmimap)
+        self.assertEqual(self.pool.take_idle(), [crmimap])
+        self.assertEqual(self.pool.get_stats()['busy'], 1)
+        self.assertEqual(self.pool.take_idle(), [])
@@ -0,0 +1,110 @@
+from queue import Queue
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from django.apps import apps
+from django.core import mail
+from django.test import override_settings
+from django.test import tag
+
+from common.utils.helpers import USER_MODEL
+from crm.utils.helpers import get_uid_data
+from crm.utils.import_emails import ImportEmails
+from crm.utils.import_emails import fetch_messages
+from crm.utils.import_emails import get_uid_set
+from crm.utils.import_emails import parse_messages
+from crm.utils.restore_imap_emails import EmlQueue
+from crm.utils.restore_imap_emails import update_ea
+from massmail.models.email_account import EmailAccount
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.utils.test_import_emails --keepdb
+
+
+def get_fetch_data(*uids) -> list:
+    data = []
+    for n, uid in enumerate(uids, start=1):
+        data.append((f'{n} (UID {uid} RFC822 {{5}}'.encode(), f'msg{uid}'.encode()))
+        data.append(b')')
+    return data
+
+
+@tag('TestCase')
+class TestImportEmails(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.ea = EmailAccount.objects.create(
+            name='Email Account',
+            email_host='smtp.example.com',
+            email_port=587,
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            owner=cls.owner,
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    def test_get_uid_set(self):
+        uids = [b'100', b'101', b'102', b'105', b'107', b'108']
+        self.assertEqual(get_uid_set(uids), b'100:102,105,107:108')
+        self.assertEqual(get_uid_set([b'7']), b'7')
+
+    def test_parse_messages(self):
+        data = get_fetch_data(5, 6)
+        self.assertEqual(parse_messages(data), {5: b'msg5', 6: b'msg6'})
+
+    @override_settings(IMAP_FETCH_BATCH_SIZE=2)
+    def test_fetch_messages_in_batches(self):
+        crmimap = MagicMock()
+        crmimap.uid_fetch.side_effect = [
+            ('OK', get_fetch_data(1, 2), None),
+            ('OK', get_fetch_data(3), None),   # uid 4 is missing
+            ('OK', get_fetch_data(4), None),
+        ]
+        uids = [b'1', b'2', b'3', b'4']
+        result = list(fetch_messages(crmimap, uids))
+        self.assertEqual(
+            result,
+            [(b'msg1', b'1'), (b'msg2', b'2'), (b'msg3', b'3'), (b'msg4', b'4')]
+        )
+        requested = [c.args[0] for c in crmimap.uid_fetch.call_args_list]
+        self.assertEqual(requested, [b'1:2', b'3:4', b'4'])
+
+    def test_update_ea_moves_start_uid_forward(self):
+        uid_data = get_uid_data(self.ea)
+        update_ea(self.ea, uid_data, 'incoming', '20')
+        update_ea(self.ea, uid_data, 'incoming', '10')
+        self.ea.refresh_from_db()
+        self.assertEqual(self.ea.start_incoming_uid, 21)
+
+    def test_eml_queue_keeps_account_emails_in_order(self):
+        eml_queue = EmlQueue(2, maxsize=0)
+        ea2 = MagicMock(id=self.ea.id + 1)
+        for uid in (b'1', b'2', b'3'):
+            eml_queue.put((b'msg', self.ea, 'incoming', uid, '', None))
+            eml_queue.put((b'msg', ea2, 'incoming', uid, '', None))
+        for ea in (self.ea, ea2):
+            q = eml_queue.queues[ea.id % 2]
+            items = list(q.queue)
+            self.assertEqual([item[1] for item in items], [ea] * 3)
+            self.assertEqual([item[3] for item in items], [b'1', b'2', b'3'])
+
+    def test_lag_is_reported(self):
+        with patch.object(ImportEmails, 'lag', {}):
+            ImportEmails(Queue(), None).set_lag(
+                self.ea, 'incoming', [b'25', b'30']
+            )
+            self.assertEqual(ImportEmails.report_lag(), '')     # not due
+            report_str = ImportEmails.report_lag(force=True)
+            lag = apps.get_app_config('crm').get_import_lag()
+        self.assertEqual(lag[self.ea.email_host_user]['incoming']['highest_uid'], 30)
+        self.assertIn(
+            f'{self.ea.email_host_user} incoming: highest UID 30, '
+            f'imported UID {self.ea.start_incoming_uid - 1}, lag 2',
+            report_str
+        )
+        self.assertEqual(mail.outbox[-1].body, report_str)
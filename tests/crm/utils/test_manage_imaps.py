@@ -13,6 +13,8 @@ from unittest.mock import MagicMock, patch, PropertyMock
 
 from django.test import override_settings, tag
 
+from crm.utils.helpers import crmimap_connection
+from crm.utils.imap_pool import ImapPool
 from crm.utils.manage_imaps import CrmImapManager, delta_period
 from crm.settings import IMAP_NOOP_PERIOD
 from massmail.models import EmailAccount
@@ -22,6 +24,14 @@ from tests.base_test_classes import BaseTestCase
 # manage.py test tests.crm.utils.test_manage_imaps --keepdb
 
 
+def add_to_pool(pool, crmimap, idle=True):
+    """Puts the crmimap into the pool as a busy or idle connection."""
+    pool.acquire(crmimap.email_host_user)
+    pool.add(crmimap)
+    if idle:
+        pool.release(crmimap)
+
+
 @tag('TestCase')
 class TestCrmImapManagerInitialization(BaseTestCase):
     """Test CrmImapManager initialization."""
@@ -35,7 +45,7 @@ class TestCrmImapManagerInitialization(BaseTestCase):
         manager = CrmImapManager(ea_queue)
 
         self.assertEqual(manager.boxes_storage, {})
-        self.assertEqual(manager.crmimap_storage, {})
+        self.assertIsInstance(manager.pool, ImapPool)
         self.assertEqual(manager.close, False)
         self.assertIs(manager.ea_queue, ea_queue)
         self.assertTrue(manager.daemon)
@@ -89,16 +99,15 @@ class TestCrmImapManagerCreateCrmImap(BaseTestCase):
         mock_crmimap.boxes = {'INBOX': {'name on server': 'INBOX'}}
         mock_crmimap.last_request_time = dt.now()
         mock_crmimap_class.return_value = mock_crmimap
+        self.manager.pool.acquire(self.email_account.email_host_user)
 
         result = self.manager._create_crmimap(self.email_account)
 
         self.assertIs(result, mock_crmimap)
-        self.assertIn(self.email_account.email_host_user, 
-                      self.manager.crmimap_storage)
-        self.assertEqual(
-            self.manager.crmimap_storage[self.email_account.email_host_user],
-            mock_crmimap
-        )
+        self.assertIs(result.pool, self.manager.pool)
+        self.assertTrue(self.manager.pool.has_connections(
+            self.email_account.email_host_user
+        ))
 
     @patch('crm.utils.manage_imaps.CrmIMAP')
     @override_settings(REUSE_IMAP_CONNECTION=True)
@@ -109,6 +118,7 @@ class TestCrmImapManagerCreateCrmImap(BaseTestCase):
         mock_crmimap.error = False
         mock_crmimap.boxes = {'INBOX': {'name on server': 'INBOX'}}
         mock_crmimap_class.return_value = mock_crmimap
+        self.manager.pool.acquire(self.email_account.email_host_user)
 
         self.manager._create_crmimap(self.email_account)
 
@@ -123,6 +133,7 @@ class TestCrmImapManagerCreateCrmImap(BaseTestCase):
         mock_crmimap.error = False
         mock_crmimap.boxes = {'INBOX': {}, 'SENT': {}}
         mock_crmimap_class.return_value = mock_crmimap
+        self.manager.pool.acquire(self.email_account.email_host_user)
 
         self.manager._create_crmimap(self.email_account)
 
@@ -132,20 +143,18 @@ class TestCrmImapManagerCreateCrmImap(BaseTestCase):
                          mock_crmimap.boxes)
 
     @patch('crm.utils.manage_imaps.CrmIMAP')
-    @override_settings(REUSE_IMAP_CONNECTION=False)
-    def test_create_crmimap_without_reuse_connection(self, mock_crmimap_class):
-        """Test _create_crmimap when REUSE_IMAP_CONNECTION is False."""
+    def test_create_crmimap_exception_frees_place(self, mock_crmimap_class):
+        """Test _create_crmimap frees the reserved place if get_in fails."""
         mock_crmimap = MagicMock()
         mock_crmimap.email_host_user = self.email_account.email_host_user
-        mock_crmimap.error = False
+        mock_crmimap.get_in.side_effect = OSError("Network is unreachable")
         mock_crmimap_class.return_value = mock_crmimap
+        self.manager.pool.acquire(self.email_account.email_host_user)
 
-        result = self.manager._create_crmimap(self.email_account)
+        with self.assertRaises(OSError):
+            self.manager._create_crmimap(self.email_account)
 
-        # Should not store in storage when REUSE_IMAP_CONNECTION is False
-        self.assertNotIn(self.email_account.email_host_user, 
-                         self.manager.crmimap_storage)
-        self.assertIsNotNone(result)
+        self.assertEqual(self.manager.pool.get_stats()['busy'], 0)
 
     @patch('crm.utils.manage_imaps.CrmIMAP')
     @override_settings(REUSE_IMAP_CONNECTION=True)
@@ -155,6 +164,7 @@ class TestCrmImapManagerCreateCrmImap(BaseTestCase):
         mock_crmimap.email_host_user = self.email_account.email_host_user
         mock_crmimap.error = True
         mock_crmimap_class.return_value = mock_crmimap
+        self.manager.pool.acquire(self.email_account.email_host_user)
 
         result = self.manager._create_crmimap(self.email_account)
 
@@ -172,21 +182,21 @@ class TestCrmImapManagerDelCrmImap(BaseTestCase):
         self.ea_queue = queue.Queue()
         self.manager = CrmImapManager(self.ea_queue)
 
-    def test_del_crmimap_removes_from_storage(self):
-        """Test that _del_crmimap removes object from storage."""
+    def test_del_crmimap_removes_from_pool(self):
+        """Test that _del_crmimap removes object from the pool."""
         mock_crmimap = MagicMock()
         mock_crmimap.email_host_user = 'test@example.com'
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
+        add_to_pool(self.manager.pool, mock_crmimap, idle=False)
 
         self.manager._del_crmimap(mock_crmimap)
 
-        self.assertNotIn('test@example.com', self.manager.crmimap_storage)
+        self.assertFalse(self.manager.pool.has_connections('test@example.com'))
 
     def test_del_crmimap_closes_connection(self):
         """Test that _del_crmimap calls close_and_logout."""
         mock_crmimap = MagicMock()
         mock_crmimap.email_host_user = 'test@example.com'
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
+        add_to_pool(self.manager.pool, mock_crmimap, idle=False)
 
         self.manager._del_crmimap(mock_crmimap)
 
@@ -224,37 +234,27 @@ class TestCrmImapManagerGetCrmImap(BaseTestCase):
             owner=self.owner,
         )
 
-    @override_settings(REUSE_IMAP_CONNECTION=False)
-    def test_get_crmimap_returns_none_without_reuse(self):
-        """Test _get_crmimap returns None when REUSE_IMAP_CONNECTION is False."""
+    def test_get_crmimap_returns_none_when_not_in_pool(self):
+        """Test _get_crmimap returns None when there is no idle object."""
         result = self.manager._get_crmimap(self.email_account)
 
         self.assertIsNone(result)
+        self.assertEqual(self.manager.pool.get_stats()['busy'], 1)
 
-    @override_settings(REUSE_IMAP_CONNECTION=True)
-    def test_get_crmimap_returns_none_when_not_in_storage(self):
-        """Test _get_crmimap returns None when object not in storage."""
-        result = self.manager._get_crmimap(self.email_account)
-
-        self.assertIsNone(result)
-
-    @override_settings(REUSE_IMAP_CONNECTION=True)
-    def test_get_crmimap_locks_and_validates(self):
-        """Test _get_crmimap locks object and validates connection."""
+    def test_get_crmimap_acquires_and_validates(self):
+        """Test _get_crmimap acquires object and validates connection."""
         mock_crmimap = MagicMock()
         mock_crmimap.email_host_user = self.email_account.email_host_user
         mock_crmimap.error = False
         mock_crmimap.noop.return_value = 'OK'
         mock_crmimap.last_request_time = dt.now()
-        self.manager.crmimap_storage[self.email_account.email_host_user] = mock_crmimap
+        add_to_pool(self.manager.pool, mock_crmimap)
 
         result = self.manager._get_crmimap(self.email_account)
 
-        mock_crmimap.lock.assert_called_once()
         mock_crmimap.noop.assert_called_once()
         self.assertIs(result, mock_crmimap)
 
-    @override_settings(REUSE_IMAP_CONNECTION=True)
     def test_get_crmimap_deletes_on_noop_failure(self):
         """Test _get_crmimap deletes object when noop fails."""
         mock_crmimap = MagicMock()
@@ -262,7 +262,7 @@ class TestCrmImapManagerGetCrmImap(BaseTestCase):
         mock_crmimap.error = False
         mock_crmimap.noop.return_value = 'NO'
         mock_crmimap.last_request_time = dt.now()
-        self.manager.crmimap_storage[self.email_account.email_host_user] = mock_crmimap
+        add_to_pool(self.manager.pool, mock_crmimap)
 
         with patch.object(self.manager, '_del_crmimap') as mock_del:
             result = self.manager._get_crmimap(self.email_account)
@@ -270,14 +270,13 @@ class TestCrmImapManagerGetCrmImap(BaseTestCase):
             mock_del.assert_called_once_with(mock_crmimap)
             self.assertIsNone(result)
 
-    @override_settings(REUSE_IMAP_CONNECTION=True)
     def test_get_crmimap_deletes_on_error(self):
         """Test _get_crmimap deletes object when error flag is set."""
         mock_crmimap = MagicMock()
         mock_crmimap.email_host_user = self.email_account.email_host_user
         mock_crmimap.error = True
         mock_crmimap.last_request_time = dt.now()
-        self.manager.crmimap_storage[self.email_account.email_host_user] = mock_crmimap
+        add_to_pool(self.manager.pool, mock_crmimap)
 
         with patch.object(self.manager, '_del_crmimap') as mock_del:
             result = self.manager._get_crmimap(self.email_account)
@@ -287,6 +286,7 @@ class TestCrmImapManagerGetCrmImap(BaseTestCase):
 
 
 @tag('TestCase')
+@override_settings(REUSE_IMAP_CONNECTION=True)
 class TestCrmImapManagerGetOrCreateCrmImap(BaseTestCase):
     """Test CrmImapManager._get_or_create_crmimap method."""
 
@@ -371,6 +371,37 @@ class TestCrmImapManagerGetOrCreateCrmImap(BaseTestCase):
 
                 self.assertIsNone(result)
 
+    @override_settings(REUSE_IMAP_CONNECTION=False)
+    def test_get_or_create_crmimap_without_reuse_is_not_pooled(self):
+        """Test connections that are not reused bypass the pool limit."""
+        mock_crmimap = MagicMock()
+        mock_crmimap.error = False
+
+        with patch.object(self.manager, '_get_crmimap') as mock_get, \
+                patch.object(self.manager, '_create_crmimap',
+                             return_value=mock_crmimap) as mock_create:
+            result = self.manager._get_or_create_crmimap(self.email_account, 'INBOX')
+
+        self.assertIs(result, mock_crmimap)
+        mock_get.assert_not_called()
+        mock_create.assert_called_once_with(self.email_account, pooled=False)
+        mock_crmimap.select_box.assert_called_once_with('INBOX')
+
+    @override_settings(REUSE_IMAP_CONNECTION=False)
+    @patch('crm.utils.manage_imaps.CrmIMAP')
+    def test_create_crmimap_not_pooled(self, mock_crmimap_class):
+        """Test an unpooled connection takes no place in the pool."""
+        mock_crmimap = MagicMock()
+        mock_crmimap.error = False
+        mock_crmimap_class.return_value = mock_crmimap
+
+        self.manager._create_crmimap(self.email_account, pooled=False)
+
+        self.assertEqual(self.manager.pool.get_stats()['busy'], 0)
+        self.assertFalse(
+            self.manager.pool.has_connections(self.email_account.email_host_user)
+        )
+
 
 @tag('TestCase')
 class TestCrmImapManagerGetCrmImapPublic(BaseTestCase):
@@ -425,6 +456,35 @@ class TestCrmImapManagerGetCrmImapPublic(BaseTestCase):
             )
 
 
+@tag('TestCase')
+class TestCrmImapConnection(BaseTestCase):
+    """Test the crmimap_connection context manager."""
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.ea = MagicMock()
+
+    @patch('crm.utils.helpers.get_crmimap')
+    def test_releases_on_exception(self, mock_get_crmimap):
+        """Test the connection is released if the block raises."""
+        mock_crmimap = MagicMock()
+        mock_get_crmimap.return_value = mock_crmimap
+
+        with self.assertRaises(TypeError):
+            with crmimap_connection(self.ea, 'INBOX') as crmimap:
+                self.assertIs(crmimap, mock_crmimap)
+                raise TypeError("'NoneType' object is not subscriptable")
+
+        mock_get_crmimap.assert_called_once_with(self.ea, 'INBOX')
+        mock_crmimap.release.assert_called_once()
+
+    @patch('crm.utils.helpers.get_crmimap', return_value=None)
+    def test_no_connection(self, mock_get_crmimap):
+        """Test None is yielded when there is no connection (testing mode)."""
+        with crmimap_connection(self.ea) as crmimap:
+            self.assertIsNone(crmimap)
+
+
 @tag('TestCase')
 class TestCrmImapManagerSaveCrmImap(BaseTestCase):
     """Test CrmImapManager._serve_crmimap method."""
@@ -465,9 +525,7 @@ class TestCrmImapManagerSaveCrmImap(BaseTestCase):
         mock_crmimap.noop.return_value = 'OK'
         mock_crmimap.ea = self.email_account
 
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
-
-        self.manager._serve_crmimap('test@example.com')
+        self.manager._serve_crmimap(mock_crmimap)
 
         mock_crmimap.noop.assert_called_once()
         mock_crmimap.release.assert_called_once()
@@ -482,13 +540,11 @@ class TestCrmImapManagerSaveCrmImap(BaseTestCase):
         mock_crmimap.noop.return_value = 'NO'
         mock_crmimap.ea = self.email_account
 
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
-
         mock_new_crmimap = MagicMock()
         with patch.object(self.manager, '_del_crmimap'):
             with patch.object(self.manager, '_create_crmimap', 
                             return_value=mock_new_crmimap):
-                self.manager._serve_crmimap('test@example.com')
+                self.manager._serve_crmimap(mock_crmimap)
 
                 self.manager._del_crmimap.assert_called_once()
                 self.manager._create_crmimap.assert_called_once()
@@ -501,9 +557,7 @@ class TestCrmImapManagerSaveCrmImap(BaseTestCase):
         mock_crmimap.noop_time = None
         mock_crmimap.ea = self.email_account
 
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
-
-        self.manager._serve_crmimap('test@example.com')
+        self.manager._serve_crmimap(mock_crmimap)
 
         # noop should not be called since not enough time has passed
         mock_crmimap.noop.assert_not_called()
@@ -521,11 +575,10 @@ class TestCrmImapManagerSaveCrmImap(BaseTestCase):
             side_effect=Exception("Test exception")
         )
         
-        self.manager.crmimap_storage['test@example.com'] = mock_crmimap
         mock_site.objects.get_current.return_value.domain = 'example.com'
 
         # The method should catch the exception and send admin mail
-        self.manager._serve_crmimap('test@example.com')
+        self.manager._serve_crmimap(mock_crmimap)
         
         # Verify that mail_admins was called
         mock_mail_admins.assert_called_once()
@@ -586,17 +639,14 @@ class TestCrmImapManagerKeepInTouch(BaseTestCase):
 
     @patch('crm.utils.manage_imaps.sleep')
     def test_keep_in_touch_loop_iteration(self, mock_sleep):
-        """Test _keep_in_touch iterates through storage."""
+        """Test _keep_in_touch iterates through idle connections."""
         mock_crmimap1 = MagicMock()
-        mock_crmimap1.locked = False
+        mock_crmimap1.email_host_user = 'test1@example.com'
+        add_to_pool(self.manager.pool, mock_crmimap1)
 
         mock_crmimap2 = MagicMock()
-        mock_crmimap2.locked = True
-
-        self.manager.crmimap_storage = {
-            'test1@example.com': mock_crmimap1,
-            'test2@example.com': mock_crmimap2,
-        }
+        mock_crmimap2.email_host_user = 'test2@example.com'
+        add_to_pool(self.manager.pool, mock_crmimap2, idle=False)
 
         # Mock sleep to break the loop after first iteration
         mock_sleep.side_effect = [None, KeyboardInterrupt()]
@@ -607,5 +657,23 @@ class TestCrmImapManagerKeepInTouch(BaseTestCase):
             except KeyboardInterrupt:
                 pass
 
-            # _serve_crmimap should be called for unlocked item
-            self.manager._serve_crmimap.assert_called_with('test1@example.com')
+            # _serve_crmimap should be called for idle item only
+            self.manager._serve_crmimap.assert_called_once_with(mock_crmimap1)
+
+    @patch('crm.utils.manage_imaps.idle_period', 60)
+    @patch('crm.utils.manage_imaps.sleep')
+    def test_keep_in_touch_evicts_idle(self, mock_sleep):
+        """Test _keep_in_touch closes connections idle for too long."""
+        mock_crmimap = MagicMock()
+        mock_crmimap.email_host_user = 'test1@example.com'
+        add_to_pool(self.manager.pool, mock_crmimap)
+        mock_crmimap.last_used -= 61
+        mock_sleep.side_effect = KeyboardInterrupt()
+
+        with patch.object(self.manager, '_serve_crmimap'):
+            with self.assertRaises(KeyboardInterrupt):
+                self.manager._keep_in_touch()
+
+            self.manager._serve_crmimap.assert_not_called()
+        mock_crmimap.close_and_logout.assert_called_once()
+        self.assertFalse(self.manager.pool.has_connections('test1@example.com'))
@@ -0,0 +1,126 @@
+from io import StringIO
+from pathlib import Path
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import tag
+
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_department_id
+from crm.models import Company
+from crm.models import Contact
+from crm.models import CrmEmail
+from crm.models import Request
+from crm.models import Tag
+from crm.utils.merge_duplicates import find_duplicates
+from crm.utils.merge_duplicates import merge_duplicates
+from massmail.models import MailingOut
+from massmail.models import MailingOutRecipient
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.crm.utils.test_merge_duplicates --keepdb
+
+
+@tag('TestCase')
+class TestMergeDuplicates(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.department_id = get_department_id(cls.owner)
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.original = self.create_company(
+            full_name="Acme Ltd.", email="office@acme.com"
+        )
+        self.duplicates = [
+            self.create_company(
+                full_name="ACME ltd", email="sales@acme.com", phone="+1 234 567-89-01"
+            ),
+            self.create_company(
+                full_name="Acme International", email="Office@Acme.com, info@acme.com",
+                website="acme.com"
+            ),
+        ]
+
+    def create_company(self, **kwargs):
+        return Company.objects.create(
+            owner=self.owner, department_id=self.department_id, **kwargs
+        )
+
+    def test_find_duplicates(self):
+        self.create_company(full_name="Other company", phone="(234) 567 8901")
+        unique = self.create_company(full_name="Unique", email="unique@acme.com")
+        groups = find_duplicates(Company)
+        group = next(ids for ids in groups if self.original.id in ids)
+        self.assertEqual(len(group), 4)
+        self.assertEqual(group[0], self.original.id)
+        self.assertNotIn(unique.id, sum(groups, []))
+
+    def test_merge_duplicates(self):
+        contacts = [
+            Contact.objects.create(
+                first_name="Tom", company=company, owner=self.owner,
+                department_id=self.department_id
+            ) for company in self.duplicates
+        ]
+        Request.objects.create(
+            company=self.duplicates[0], owner=self.owner,
+            department_id=self.department_id
+        )
+        CrmEmail.objects.create(
+            company=self.duplicates[1], owner=self.owner,
+            department_id=self.department_id
+        )
+        tag = Tag.objects.create(name="vip", department_id=self.department_id)
+        self.duplicates[1].tags.add(tag)
+        mailing_out = MailingOut.objects.create(
+            name="Test MO",
+            recipients_number=2,
+            content_type=ContentType.objects.get_for_model(Company),
+            owner=self.owner,
+            department_id=self.department_id
+        )
+        mailing_out.add_recipient_ids([d.id for d in self.duplicates])
+
+        merged = merge_duplicates(self.original, self.duplicates)
+
+        self.assertEqual(merged, 2)
+        self.assertFalse(
+            Company.objects.filter(id__in=[d.id for d in self.duplicates]).exists()
+        )
+        self.assertEqual(
+            set(self.original.contacts.values_list('id', flat=True)),
+            {c.id for c in contacts}
+        )
+        self.assertEqual(Request.objects.filter(company=self.original).count(), 1)
+        self.assertEqual(CrmEmail.objects.filter(company=self.original).count(), 1)
+        self.assertIn(tag, self.original.tags.all())
+        self.assertEqual(
+            list(mailing_out.recipients.values_list('object_id', flat=True)),
+            [self.original.id]
+        )
+        self.assertEqual(
+            MailingOutRecipient.objects.filter(object_id=self.original.id).count(), 1
+        )
+        self.original.refresh_from_db()
+        self.assertEqual(self.original.phone, "+1 234 567-89-01")
+        self.assertEqual(self.original.website, "acme.com")
+
+    def test_duplicate_logo_is_deleted(self):
+        duplicate = self.duplicates[0]
+        duplicate.logo.save('acme.png', ContentFile(b'logo'))
+        logo_path = Path(duplicate.logo.path)
+        self.addCleanup(logo_path.unlink, missing_ok=True)
+        self.assertTrue(logo_path.exists())
+        merge_duplicates(self.original, self.duplicates)
+        self.assertFalse(logo_path.exists())
+
+    def test_find_duplicates_command_merges_groups(self):
+        call_command('find_duplicates', 'company', merge=True, stdout=StringIO())
+        self.assertTrue(Company.objects.filter(id=self.original.id).exists())
+        self.assertFalse(
+            Company.objects.filter(id__in=[d.id for d in self.duplicates]).exists()
+        )
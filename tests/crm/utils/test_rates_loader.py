@@ -1,17 +1,24 @@
 from datetime import datetime as dt
 from datetime import timedelta
 from django.conf import settings
+from decimal import Decimal
+from django.db import connection
 from django.test import tag
 from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 
 from crm.models import Country
 from crm.models import Currency
 from crm.models import Deal
 from crm.models import Rate
 from crm.models import Payment
+from common.utils.helpers import USER_MODEL
 from common.utils.helpers import get_delta_date
 from common.utils.helpers import get_department_id
+from crm.backends.basebackend import RatesCache
 from crm.utils.rates_loader import RatesLoader
+from crm.utils.rates_loader import load_missing_rates
+from tests.base_test_classes import BaseTestCase
 from tests.utils.helpers import get_user
 
 # test tests.crm.utils.test_rates_loader --noinput
@@ -173,3 +180,86 @@ class TestGetRates(TransactionTestCase):
         self.assertEqual(Rate.APPROXIMATE, rate4.rate_type)
         self.assertEqual(0.0, rate4.rate_to_state_currency)
         self.assertEqual(0.0, rate4.rate_to_marketing_currency)
+
+
+class FakeBackend:
+    """Returns the day of the month as the rate and records the requests."""
+    requests = []
+
+    def __init__(self, currency: str, marketing_currency: str, rate_date):
+        self.currency = currency
+        self.rate_date = rate_date
+        self.requests.append((currency, rate_date))
+
+    def get_rates(self) -> tuple:
+        return self.rate_date.day, 1, ''
+
+
+@tag('TestCase')
+class TestLoadMissingRates(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.usd = Currency.objects.create(name="TUS", is_marketing_currency=True)
+        cls.eur = Currency.objects.create(name="TEU")
+        deal = Deal.objects.create(
+            name="Test deal", department_id=get_department_id(owner),
+            ticket="rates123", next_step=settings.FIRST_STEP,
+            next_step_date=get_delta_date(1), owner=owner,
+        )
+        cls.today = dt.now().date()
+        for days in (1, 1, 2, 3, 3):
+            for currency in (cls.usd, cls.eur):
+                Payment.objects.create(
+                    deal=deal, amount=100, currency=currency,
+                    payment_date=cls.today - timedelta(days=days),
+                    status=Payment.RECEIVED,
+                )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        FakeBackend.requests = []
+
+    def test_load_missing_rates(self):
+        Rate.objects.all().delete()
+        approximate = Rate.objects.create(
+            currency=self.eur, payment_date=self.today - timedelta(days=2),
+            rate_to_state_currency=0, rate_to_marketing_currency=0,
+        )
+        Rate.objects.create(
+            currency=self.usd, payment_date=self.today - timedelta(days=3),
+            rate_to_state_currency=0, rate_to_marketing_currency=0,
+            rate_type=Rate.OFFICIAL,
+        )
+        with CaptureQueriesContext(connection) as context:
+            number = load_missing_rates(self.usd, self.today, FakeBackend)
+        # each missing (currency, date) pair is requested once
+        self.assertEqual(number, 5)
+        self.assertEqual(len(FakeBackend.requests), 5)
+        self.assertLessEqual(len(context.captured_queries), 4)
+        self.assertFalse(Rate.objects.exclude(rate_type=Rate.OFFICIAL).exists())
+        approximate.refresh_from_db()
+        self.assertEqual(
+            approximate.rate_to_state_currency,
+            Decimal((self.today - timedelta(days=2)).day)
+        )
+        self.assertEqual(load_missing_rates(self.usd, self.today, FakeBackend), 0)
+
+
+@tag('TestCase')
+class TestRatesCache(BaseTestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+
+    def test_least_recently_used_are_evicted(self):
+        cache = RatesCache(maxsize=2)
+        cache.set('a', [1])
+        cache.set('b', [2])
+        self.assertEqual(cache.get('a'), [1])
+        cache.set('c', [3])
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), [1])
+        self.assertEqual(cache.get('c'), [3])
@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+from django.conf import settings
+from django.test import override_settings
+from django.test import tag
+from django.urls import reverse
+
+from common.utils.helpers import USER_MODEL
+from crm.models import CrmEmail
+from crm.utils import raw_email_cache
+from massmail.models.email_account import EmailAccount
+from tests.base_test_classes import BaseTestCase
+from tests.utils.helpers import get_email_message
+
+# manage.py test tests.crm.utils.test_raw_email_cache --keepdb
+
+
+@tag('TestCase')
+class TestRawEmailCache(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.ea = EmailAccount.objects.create(
+            name='CRM Email Account',
+            email_host='smtp.example.com',
+            imap_host='imap.example.com',
+            email_port=587,
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            owner=cls.owner,
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        settings_override = override_settings(
+            RAW_EMAIL_CACHE_DIR=Path(cache_dir), RAW_EMAIL_CACHE_SIZE=10 ** 6
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patcher = patch.object(raw_email_cache, 'cache_size', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.msg, self.content, self.subject_str = get_email_message()
+        self.b_msg = self.msg.as_bytes()
+
+    def test_find_by_uid_and_message_id(self):
+        raw_email_cache.save(self.b_msg, self.ea, 'INBOX', 7, self.msg['Message-ID'])
+        self.assertEqual(raw_email_cache.read(self.ea, 'INBOX', 7), self.b_msg)
+        self.assertEqual(
+            raw_email_cache.read(self.ea, message_id=self.msg['Message-ID']),
+            self.b_msg
+        )
+        self.assertIsNone(raw_email_cache.read(self.ea, 'Sent', 7))
+        # UIDs of the box are changed
+        self.ea.inbox_uidvalidity += 1
+        self.assertIsNone(raw_email_cache.read(self.ea, 'INBOX', 7))
+
+    def test_file_names_depend_on_secret_key(self):
+        key = raw_email_cache.get_uid_key(self.ea, 'INBOX', 7)
+        path = raw_email_cache.get_path(key)
+        self.assertEqual(path.parent.parent, Path(settings.RAW_EMAIL_CACHE_DIR))
+        with override_settings(SECRET_KEY='another-secret-key'):
+            self.assertNotEqual(raw_email_cache.get_path(key), path)
+
+    def test_least_recently_used_are_evicted(self):
+        size = len(self.b_msg)
+        with override_settings(RAW_EMAIL_CACHE_SIZE=size * 3):
+            for uid in range(1, 4):
+                raw_email_cache.save(self.b_msg, self.ea, 'INBOX', uid)
+                path = raw_email_cache.find(self.ea, 'INBOX', uid)
+                os.utime(path, (uid, uid))
+            raw_email_cache.find(self.ea, 'INBOX', 1)   # recently used
+            raw_email_cache.save(self.b_msg, self.ea, 'INBOX', 4)
+            self.assertIsNotNone(raw_email_cache.find(self.ea, 'INBOX', 1))
+            self.assertIsNone(raw_email_cache.find(self.ea, 'INBOX', 2))
+            self.assertIsNotNone(raw_email_cache.find(self.ea, 'INBOX', 4))
+            self.assertLessEqual(raw_email_cache.cache_size, size * 3)
+
+    def test_original_email_is_served_from_cache(self):
+        eml = CrmEmail.objects.create(
+            subject=self.subject_str, content=self.content, incoming=True,
+            uid=5, message_id=self.msg['Message-ID'], owner=self.owner,
+            imap_host=self.ea.imap_host, email_host_user=self.ea.email_host_user,
+        )
+        raw_email_cache.save(self.b_msg, self.ea, 'INBOX', 5, self.msg['Message-ID'])
+        self.client.force_login(self.owner)
+        with patch('crm.utils.helpers.get_crmimap') as get_crmimap:
+            response = self.client.get(reverse('view_original_email', args=(eml.id,)))
+            self.assertEqual(response.status_code, 200, response.reason_phrase)
+            self.assertContains(response, self.content)
+            response = self.client.get(reverse('download_original_email', args=(eml.id,)))
+            self.assertEqual(b''.join(response.streaming_content), self.b_msg)
+        get_crmimap.assert_not_called()
@@ -0,0 +1,93 @@
+from datetime import date
+from unittest.mock import patch
+from django.test import override_settings
+from django.test import tag
+from django.test import TestCase
+
+from crm.utils.helpers import get_email_domain
+from crm.utils.helpers import is_company_banned
+from crm.utils.helpers import is_text_relevant
+from settings import matchers as matchers_module
+from settings.matchers import matchers
+from settings.models import BannedCompanyName
+from settings.models import PublicEmailDomain
+from settings.models import StopPhrase
+
+# manage.py test tests.crm.utils.test_spam_matchers --keepdb
+
+
+@tag('TestCase')
+class TestSpamMatchers(TestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        matchers.invalidate()
+
+    def tearDown(self):
+        matchers.flush_hits()
+        matchers.invalidate()
+
+    def test_is_text_relevant(self):
+        StopPhrase.objects.create(phrase="SEO services")
+        self.assertTrue(is_text_relevant("We need 100 pumps"))
+        self.assertFalse(is_text_relevant("Cheap SEO services for you"))
+
+    def test_stop_phrases_cached(self):
+        StopPhrase.objects.create(phrase="casino")
+        is_text_relevant("casino")
+        with self.assertNumQueries(0):
+            self.assertFalse(is_text_relevant("online casino"))
+            self.assertTrue(is_text_relevant("quotation request"))
+
+    def test_cache_invalidated_by_signals(self):
+        self.assertTrue(is_text_relevant("crypto offer"))
+        sp = StopPhrase.objects.create(phrase="crypto")
+        self.assertFalse(is_text_relevant("crypto offer"))
+        sp.delete()
+        self.assertTrue(is_text_relevant("crypto offer"))
+
+    def test_stop_phrase_hits_flushed(self):
+        sp = StopPhrase.objects.create(phrase="lottery")
+        StopPhrase.objects.filter(id=sp.id).update(
+            last_occurrence_date=date(2020, 1, 1)
+        )
+        matchers.invalidate()
+        is_text_relevant("You won the lottery")
+        matchers.flush_hits()
+        sp.refresh_from_db()
+        self.assertNotEqual(sp.last_occurrence_date, date(2020, 1, 1))
+
+    def test_cache_expires(self):
+        StopPhrase.objects.create(phrase="bitcoin")
+        self.assertFalse(is_text_relevant("bitcoin"))
+        # changed by another process
+        StopPhrase.objects.filter(phrase="bitcoin").update(phrase="ethereum")
+        self.assertFalse(is_text_relevant("bitcoin"))
+        with patch.object(matchers_module.time, 'monotonic',
+                          return_value=matchers_module.time.monotonic()
+                          + matchers.ttl + 1):
+            self.assertTrue(is_text_relevant("bitcoin"))
+            self.assertFalse(is_text_relevant("ethereum"))
+
+    @override_settings(TESTING=False)
+    def test_stop_phrase_hits_flushed_by_timer(self):
+        StopPhrase.objects.create(phrase="jackpot")
+        with patch.object(matchers_module.threading, 'Timer') as timer:
+            is_text_relevant("Win the jackpot")
+            is_text_relevant("Jackpot! Win the jackpot")
+        timer.assert_called_once_with(
+            matchers_module.HITS_FLUSH_INTERVAL, matchers._flush_safely
+        )
+        timer.return_value.start.assert_called_once()
+        matchers.flush_hits()
+        timer.return_value.cancel.assert_called_once()
+
+    def test_is_company_banned(self):
+        BannedCompanyName.objects.create(name="Spam Corp")
+        self.assertTrue(is_company_banned({'company': 'Big spam corp Ltd.'}))
+        self.assertFalse(is_company_banned({'company': 'Acme Inc.'}))
+
+    def test_public_email_domain(self):
+        PublicEmailDomain.objects.create(domain="mail.example")
+        self.assertEqual(get_email_domain('John <john@Mail.Example>'), '')
+        self.assertEqual(get_email_domain('ann@acme.example'), 'acme.example')
@@ -99,8 +99,8 @@ class TestDeleteDuplicateObj(BaseTestCase):
         request.refresh_from_db()
         self.assertEqual(request.company_id, original_company.id)
         mailing_out.refresh_from_db()
-        self.assertNotIn(f"{duplicate_company.id},", mailing_out.recipient_ids)
-        self.assertIn(f"{original_company.id},", mailing_out.recipient_ids)
+        self.assertNotIn(duplicate_company.id, mailing_out.get_recipient_ids())
+        self.assertIn(original_company.id, mailing_out.get_recipient_ids())
         self.assertFalse(
             Company.objects.filter(id=duplicate_company.id).exists(),
             "The duplicate object has not been deleted."
@@ -167,8 +167,8 @@ class TestDeleteDuplicateObj(BaseTestCase):
         request.refresh_from_db()
         self.assertEqual(request.contact_id, original_contact.id)
         mailing_out.refresh_from_db()
-        self.assertNotIn(f",{duplicate_contact.id},", mailing_out.recipient_ids)
-        self.assertIn(f",{original_contact.id},", mailing_out.recipient_ids)
+        self.assertNotIn(duplicate_contact.id, mailing_out.get_recipient_ids())
+        self.assertIn(original_contact.id, mailing_out.get_recipient_ids())
         
         file.refresh_from_db()
         self.assertEqual(file.content_object, original_contact)
@@ -221,8 +221,8 @@ class TestDeleteDuplicateObj(BaseTestCase):
         request.refresh_from_db()
         self.assertEqual(request.lead_id, original_lead.id)
         mailing_out.refresh_from_db()
-        self.assertNotIn(f",{duplicate_lead.id}", mailing_out.recipient_ids)
-        self.assertIn(f",{original_lead.id}", mailing_out.recipient_ids)
+        self.assertNotIn(duplicate_lead.id, mailing_out.get_recipient_ids())
+        self.assertIn(original_lead.id, mailing_out.get_recipient_ids())
         self.assertFalse(
             Lead.objects.filter(id=duplicate_lead.id).exists(),
             "The duplicate object has not been deleted."
@@ -230,11 +230,14 @@ class TestDeleteDuplicateObj(BaseTestCase):
 
     def get_mailing_out(self, model) -> MailingOut:
         content_type = ContentType.objects.get_for_model(model)
-        return MailingOut.objects.create(
+        mailing_out = MailingOut.objects.create(
             name="Test MailingOut",
             content_type=content_type,
-            recipient_ids="6003,7155,6005,6871,7141,7143,7146,7153,7156",
             recipients_number=9,
             owner=self.owner,
             department_id=self.department_id
         )
+        mailing_out.add_recipient_ids(
+            [6003, 7155, 6005, 6871, 7141, 7143, 7146, 7153, 7156]
+        )
+        return mailing_out
@@ -1,8 +1,10 @@
 from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.messages.storage import default_storage
+from django.db import connection
 from django.test import RequestFactory
 from django.test import tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils.translation import gettext as _
 
@@ -124,14 +126,15 @@ class TesttestAdminActions(BaseTestCase):
             self.request._messages = default_storage(self.request)
             response = merge_mailing_outs(None, self.request, queryset)
             self.assertEqual(response.status_code, 302, response.reason_phrase)
-            self.assertTrue(
-                MailingOut.objects.filter(
+            try:
+                mailing_out = MailingOut.objects.get(
                     name="Test MO" + f' ({_("united")})',
-                    recipient_ids='1,2,3,4',
                     recipients_number=4
-                ).exists(),
-                "Mailing out not created"
-            )
+                )
+            except MailingOut.DoesNotExist:
+                self.fail("Mailing out not created")
+            self.assertCountEqual(mailing_out.get_recipient_ids(), [1, 3, 4])
+            self.assertEqual(mailing_out.get_successful_ids(), [2])
             self.assertFalse(
                 MailingOut.objects.filter(
                     id__in=(mo.id, mo1.id)
@@ -165,14 +168,16 @@ class TesttestAdminActions(BaseTestCase):
             response = make_mailing_out(None, self.request, queryset)
             self.assertEqual(response.status_code, 302, response.reason_phrase)
             corrected_qs = queryset.exclude(id=lead4.id)
-            recipient_ids = ",".join([str(x.id) for x in corrected_qs])
             try:
                 mailing_out = MailingOut.objects.get(
-                    recipient_ids=recipient_ids,
                     recipients_number=corrected_qs.count()
                 )
             except MailingOut.DoesNotExist:
                 self.fail("Mailing out not created")
+            self.assertCountEqual(
+                mailing_out.get_recipient_ids(),
+                corrected_qs.values_list('id', flat=True)
+            )
             change_url = reverse(
                 'site:massmail_mailingout_change', args=(mailing_out.id,)
             )
@@ -217,22 +222,38 @@ class TesttestAdminActions(BaseTestCase):
             response = make_mailing_out(None, self.request, queryset)
             self.assertEqual(response.status_code, 302, response.reason_phrase)
 
+    def test_changelist_counts_pending_recipients_with_rows(self):
+        self.create_mailing_outs()
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                reverse('site:massmail_mailingout_changelist')
+            )
+        self.assertEqual(response.status_code, 200, response.reason_phrase)
+        queries = [
+            q for q in context.captured_queries
+            if 'massmail_mailingoutrecipient' in q['sql']
+        ]
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, '50.0%')    # 1 of 2 recipients
+        self.assertContains(response, '-50.0%')   # 3 pending of 2
+
     def create_mailing_outs(self):
         department_id = get_department_id(self.owner)
         mo = MailingOut.objects.create(
             name="Test MO",
-            recipient_ids='1,2',
             recipients_number=2,
             content_type_id=1,
             owner=self.owner,
             department_id=department_id
         )
+        mo.add_recipient_ids([1, 2])
+        mo.move_to_successful_ids(2)
         mo1 = MailingOut.objects.create(
             name="Test MO2",
-            recipient_ids='3,4',
             recipients_number=2,
             content_type_id=1,
             owner=self.owner,
             department_id=department_id
         )
+        mo1.add_recipient_ids([2, 3, 4])
         return mo, mo1
@@ -110,12 +110,13 @@ class TestMakeMassmail(BaseTestCase):
             self.company_make_massmail_url, data, follow=True)
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         self.assertNoFormErrors(response)
-        try:
-            mailing_out = MailingOut.objects.get(
-                recipient_ids=f'{self.company1.id},{self.company2.id}'
-            )
-        except MailingOut.DoesNotExist:
+        mailing_out = MailingOut.objects.last()
+        if mailing_out is None:
             self.fail("The MailingOut instance DoesNotExist")
+        self.assertCountEqual(
+            mailing_out.get_recipient_ids(),
+            [self.company1.id, self.company2.id]
+        )
 
         # Testing the tips when saving the mailing_out
         change_url = reverse('site:massmail_mailingout_change', args=(mailing_out.id,))
@@ -156,11 +157,11 @@ class TestMakeMassmail(BaseTestCase):
         response = self.client.post(make_massmail_url, data, follow=True)
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         self.assertNoFormErrors(response)
-        self.assertTrue(
-            MailingOut.objects.filter(
-                recipient_ids=f'{self.contact1.id},{self.contact2.id}'
-            ).exists(),
-            "The Obj DoesNotExist"
+        mailing_out = MailingOut.objects.last()
+        self.assertIsNotNone(mailing_out, "The Obj DoesNotExist")
+        self.assertCountEqual(
+            mailing_out.get_recipient_ids(),
+            [self.contact1.id, self.contact2.id]
         )
 
     def get_form_data(self, response):
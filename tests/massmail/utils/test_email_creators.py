@@ -0,0 +1,123 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+from django.test import tag
+
+from common.utils.helpers import USER_MODEL
+from common.utils.helpers import get_department_id
+from crm.models import CrmEmail
+from massmail.models.email_account import EmailAccount
+from massmail.models.email_message import EmlMessage
+from massmail.models.signature import Signature
+from massmail.utils import email_creators
+from massmail.utils.email_creators import email_creator
+from massmail.utils.email_creators import get_attachment
+from massmail.utils.email_creators import get_templates
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.massmail.utils.test_email_creators --keepdb
+
+
+@tag('TestCase')
+class TestEmailCreators(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.ea = EmailAccount.objects.create(
+            name='Email Account',
+            email_host='smtp.example.com',
+            email_port=587,
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            main=True,
+            massmail=True,
+            owner=cls.owner,
+        )
+        cls.signature = Signature.objects.create(
+            name="Test signature",
+            content="Best regards",
+            owner=cls.owner
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        email_creators.clear_cache()
+        self.message = EmlMessage.objects.create(
+            subject="Hello {{ first_name }}",
+            content="Dear {{ first_name }}",
+            signature=self.signature,
+            owner=self.owner
+        )
+
+    def test_templates_compiled_once(self):
+        with patch(
+            'massmail.utils.email_creators.Template',
+            wraps=email_creators.Template
+        ) as mock_template:
+            for name in ('Ann', 'Bob'):
+                msg = email_creator(
+                    self.message, self.ea, to=['to@example.com'],
+                    extra_context={'first_name': name},
+                    force_multipart=True, inline_images=True
+                )
+                self.assertEqual(msg.subject, f"Hello {name}")
+                self.assertIn(f"Dear {name}", msg.alternatives[0][0])
+        self.assertEqual(mock_template.call_count, 2)
+
+    def test_templates_recompiled_on_change(self):
+        subject_tmpl, body_tmpl = get_templates(self.message)
+        self.assertIs(get_templates(self.message)[1], body_tmpl)
+
+        self.message.content = "Hi {{ first_name }}"
+        self.message.save()
+        body_tmpl = get_templates(self.message)[1]
+        self.assertIn("Hi", body_tmpl.source)
+
+        self.signature.content = "Kind regards"
+        self.signature.save()
+        message = EmlMessage.objects.get(id=self.message.id)
+        self.assertIsNot(get_templates(message)[1], body_tmpl)
+        self.assertIn("Kind regards", get_templates(message)[1].source)
+
+    def test_attachment_read_once(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = Path(tmp_dir) / 'file.txt'
+            path.write_bytes(b'content')
+            with patch.object(
+                Path, 'read_bytes', autospec=True,
+                side_effect=Path.read_bytes
+            ) as mock_read:
+                self.assertEqual(
+                    get_attachment(path), ('file.txt', b'content')
+                )
+                self.assertEqual(
+                    get_attachment(path), ('file.txt', b'content')
+                )
+                self.assertEqual(mock_read.call_count, 1)
+
+    def test_crm_email_templates_not_cached(self):
+        crm_email = CrmEmail.objects.create(
+            subject="Re: offer", content="Thank you",
+            owner=self.owner, department_id=get_department_id(self.owner)
+        )
+        get_templates(self.message)
+        self.assertIsNot(get_templates(crm_email)[1], get_templates(crm_email)[1])
+        self.assertEqual(list(email_creators._templates), [self.message.id])
+
+    def test_attachment_cache_size_limit(self):
+        with TemporaryDirectory() as tmp_dir, \
+                patch.object(email_creators, 'ATTACHMENT_CACHE_SIZE', 10):
+            paths = []
+            for name, content in (('a.txt', b'1234'), ('b.txt', b'5678'),
+                                  ('c.txt', b'901'), ('large.txt', b'0' * 11)):
+                path = Path(tmp_dir) / name
+                path.write_bytes(content)
+                paths.append(path)
+                get_attachment(path)
+            # the oldest file is dropped, the file larger than the cache
+            # is not stored
+            self.assertEqual(list(email_creators._attachments), paths[1:3])
+            self.assertEqual(email_creators._attachments_size, 7)
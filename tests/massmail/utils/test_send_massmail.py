@@ -1,6 +1,7 @@
 from django.contrib.contenttypes.models import ContentType
 from django.core import mail
 from django.test import tag
+from unittest.mock import patch
 from django.urls import reverse
 from django.utils.translation import gettext as _
 
@@ -13,6 +14,9 @@ from massmail.models.email_message import EmlMessage
 from massmail.models.mass_contact import MassContact
 from massmail.models.mailing_out import MailingOut
 from massmail.models.signature import Signature
+from massmail.utils.sendmassmail import fix_masscontacts
+from massmail.utils.sendmassmail import get_masscontacts
+from massmail.utils.sendmassmail import MassmailDispatcher
 from massmail.utils.sendmassmail import send_massmail
 from settings.models import MassmailSettings
 from tests.base_test_classes import BaseTestCase
@@ -98,10 +102,10 @@ class TestMassMil(BaseTestCase):
             status='A',
             content_type=self.lead_content_type,
             recipients_number=1,
-            recipient_ids=f"{self.lead1.id},{self.lead2.id}",
             owner=self.owner,
             department_id=get_department_id(self.owner)
         )
+        self.mo.add_recipient_ids([self.lead1.id, self.lead2.id])
 
     def test_send_2_recipient(self):
         # with self.settings(TESTING=True):
@@ -109,6 +113,59 @@ class TestMassMil(BaseTestCase):
         self.assertEqual(2, len(mail.outbox))   # NOQA
         self.assertEqual(self.eml.subject, mail.outbox[0].subject)
         mail.outbox = []
+        self.assertCountEqual(
+            self.mo.get_successful_ids(), [self.lead1.id, self.lead2.id]
+        )
+        self.assertEqual(self.mo.get_recipient_ids(), [])
+
+    def test_dispatcher_counts_per_account(self):
+        dispatcher = MassmailDispatcher()
+        send_massmail(self.massmail_settings, dispatcher)
+        mail.outbox = []
+        stats = dispatcher.get_stats()
+        self.assertEqual(stats[self.ea.id]['sent'], 1)
+        self.assertEqual(stats[self.ea2.id]['sent'], 1)
+        self.assertEqual(stats[self.ea.id]['account'], self.ea.email_host_user)
+
+    def test_dispatcher_reports_stats(self):
+        dispatcher = MassmailDispatcher()
+        with patch('massmail.utils.sendmassmail.STATS_REPORT_PERIOD', 0):
+            send_massmail(self.massmail_settings, dispatcher)
+        reports = [m for m in mail.outbox if 'Massmail throughput' in m.subject]
+        mail.outbox = []
+        self.assertEqual(len(reports), 1)
+        self.assertIn(f'{self.ea.email_host_user}: sent 1, failed 0', reports[0].body)
+        self.assertIn(f'{self.ea2.email_host_user}: sent 1, failed 0', reports[0].body)
+        # the counting starts anew
+        self.assertEqual(dispatcher.get_stats(), {})
+        self.assertEqual(dispatcher.report_stats(), '')
+
+    @patch('massmail.utils.sendmassmail.send_message', return_value=True)
+    def test_dispatcher_sends_in_parallel(self, mock_send_message):
+        dispatcher = MassmailDispatcher(workers=2)
+        dispatcher.dispatch(
+            [(self.mo, self.ea, None), (self.mo, self.ea2, None)], None
+        )
+        self.assertEqual(mock_send_message.call_count, 2)
+        self.assertEqual(len(dispatcher.get_stats()), 2)
+
+    def test_fix_masscontacts(self):
+        fix_masscontacts(self.mo)
+        mc = MassContact.objects.get(
+            content_type=self.lead_content_type,
+            object_id=self.lead2.id
+        )
+        self.assertEqual(mc.email_account_id, self.ea2.id)
+        queue = EmlAccountsQueue.objects.get(owner=self.owner)
+        self.assertEqual(queue.get_queue(), [self.ea.id, self.ea2.id])
+
+    def test_get_masscontacts_loads_recipients(self):
+        fix_masscontacts(self.mo)
+        with self.assertNumQueries(2):
+            masscontacts = get_masscontacts(self.mo, [self.ea, self.ea2])
+            recipients = [mc.content_object for mc in masscontacts.values()]
+        self.assertCountEqual(masscontacts, [self.ea.id, self.ea2.id])
+        self.assertCountEqual(recipients, [self.lead1, self.lead2])
 
     def test_send_without_message(self):
         self.client.force_login(self.owner)
@@ -138,3 +195,5 @@ class TestMassMil(BaseTestCase):
         self.assertEqual(0, len(mail.outbox))   # NOQA
         mail.outbox = []
         self.assertEqual('E', self.mo.status)
+        self.assertIn(self.lead1.id, self.mo.get_failed_ids())
+        self.assertTrue(self.mo.recipients.exclude(error='').exists())
@@ -0,0 +1,115 @@
+import json
+from smtplib import SMTPServerDisconnected
+from unittest.mock import MagicMock
+from unittest.mock import patch
+from django.test import tag
+
+from common.utils.helpers import USER_MODEL
+from massmail.backends import smtp
+from massmail.backends.smtp import OAuth2EmailBackend
+from massmail.models.email_account import EmailAccount
+from massmail.utils.smtp_pool import SMTPConnectionPool
+from tests.base_test_classes import BaseTestCase
+
+# manage.py test tests.massmail.utils.test_smtp_pool --keepdb
+
+
+def get_backend(noop_code=250):
+    backend = MagicMock()
+    backend.connection.noop.return_value = (noop_code, b'OK')
+    return backend
+
+
+@tag('TestCase')
+class TestSMTPConnectionPool(BaseTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.owner = USER_MODEL.objects.get(username="Andrew.Manager.Global")
+        cls.ea = EmailAccount.objects.create(
+            name='Email Account',
+            email_host='smtp.example.com',
+            email_port=587,
+            email_host_user='andrew@example.com',
+            email_host_password='password',
+            from_email='andrew@example.com',
+            massmail=True,
+            owner=cls.owner,
+        )
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        self.pool = SMTPConnectionPool()
+
+    @patch('massmail.utils.smtp_pool.email_connection')
+    def test_connection_reused(self, mock_connection):
+        backend = get_backend()
+        mock_connection.return_value = backend
+        self.assertIs(self.pool.get_connection(self.ea), backend)
+        self.assertIs(self.pool.get_connection(self.ea), backend)
+        self.assertEqual(mock_connection.call_count, 1)
+        backend.open.assert_called_once()
+        self.assertEqual(
+            self.pool.get_stats(), {'open': 1, 'new': 1, 'reused': 1}
+        )
+
+    @patch('massmail.utils.smtp_pool.email_connection')
+    def test_dead_connection_replaced(self, mock_connection):
+        dead, fresh = get_backend(noop_code=421), get_backend()
+        mock_connection.side_effect = [dead, fresh]
+        self.pool.get_connection(self.ea)
+        self.assertIs(self.pool.get_connection(self.ea), fresh)
+        dead.close.assert_called_once()
+        self.assertEqual(self.pool.new_count, 2)
+
+    @patch('massmail.utils.smtp_pool.email_connection')
+    def test_changed_account_settings_reconnect(self, mock_connection):
+        mock_connection.side_effect = [get_backend(), get_backend()]
+        self.pool.get_connection(self.ea)
+        self.ea.email_port = 465
+        self.pool.get_connection(self.ea)
+        self.assertEqual(mock_connection.call_count, 2)
+        self.ea.email_port = 587
+
+    @patch('massmail.utils.smtp_pool.email_connection')
+    def test_send_retries_on_disconnect(self, mock_connection):
+        mock_connection.side_effect = [get_backend(), get_backend()]
+        msg = MagicMock()
+        msg.send.side_effect = [SMTPServerDisconnected(), 1]
+        self.pool.send(msg, self.ea)
+        self.assertEqual(msg.send.call_count, 2)
+        self.assertEqual(self.pool.new_count, 2)
+
+    @patch('massmail.utils.smtp_pool.email_connection')
+    def test_close_all(self, mock_connection):
+        backend = get_backend()
+        mock_connection.return_value = backend
+        self.pool.get_connection(self.ea)
+        self.pool.close_all()
+        backend.close.assert_called_once()
+        self.assertEqual(self.pool.get_stats()['open'], 0)
+
+
+@tag('TestCase')
+class TestOAuth2AccessTokenCache(BaseTestCase):
+
+    def setUp(self):
+        print(" Run Test Method:", self._testMethodName)
+        smtp._access_tokens.clear()
+
+    @patch('massmail.backends.smtp.requests.post')
+    def test_access_token_cached_until_expiry(self, mock_post):
+        mock_post.return_value.text = json.dumps(
+            {'access_token': 'token', 'expires_in': 3600}
+        )
+        backend = OAuth2EmailBackend(
+            host='smtp.gmail.com', refresh_token='refresh'
+        )
+        self.assertEqual(backend.get_access_token(), 'token')
+        self.assertEqual(backend.get_access_token(), 'token')
+        self.assertEqual(mock_post.call_count, 1)
+
+        with patch('massmail.backends.smtp.time.monotonic', return_value=10**9):
+            backend.get_access_token()
+        self.assertEqual(mock_post.call_count, 2)
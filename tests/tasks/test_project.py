@@ -174,7 +174,7 @@ class TestProject(BaseTestCase):
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         self.assertNoFormErrors(response)
         self.assertEqual(len(mail.outbox), 1)
-        self.assertEqual(mail.outbox[0].to, [self.sergey.email, self.chief.email])
+        self.assertEqual(mail.outbox[0].to, [self.chief.email, self.sergey.email])
         self.assertIn(project.name, mail.outbox[0].subject)
         mail.outbox = []
    
@@ -326,13 +326,14 @@ class TestTask(BaseTestCase):
         self.assertEqual(response.status_code, 200, response.reason_phrase)
         self.assertNoFormErrors(response)
         self.assertEqual(len(mail.outbox), 2)
-        self.assertEqual(mail.outbox[0].to, [self.sergey.email])
+        self.assertEqual(mail.outbox[0].to, [self.chief.email])
         uk_subj = get_trans_for_lang(TASK_IS_CLOSED_str, 'uk')
         en_subj = get_trans_for_lang(TASK_IS_CLOSED_str, 'en')
         self.assertNotEqual(uk_subj, en_subj)
-        self.assertIn(uk_subj, mail.outbox[0].subject)
-        self.assertEqual(mail.outbox[1].to, [self.chief.email])
-        self.assertIn(task.name, mail.outbox[0].subject)
+        self.assertIn(en_subj, mail.outbox[0].subject)
+        self.assertEqual(mail.outbox[1].to, [self.sergey.email])
+        self.assertIn(uk_subj, mail.outbox[1].subject)
+        self.assertIn(task.name, mail.outbox[1].subject)
         mail.outbox = []
 
     def test_deactivating_supertask(self):
@@ -660,7 +661,7 @@ class TestTask(BaseTestCase):
         # notice of appointment as co-owner
         self.assertEqual([self.chief.email], mail.outbox[1].to)
         # completed task notifications
-        self.assertEqual([self.chief.email, self.masha.email], mail.outbox[2].to)
+        self.assertEqual([self.masha.email, self.chief.email], mail.outbox[2].to)
         mail.outbox = []
         self.sergey.profile.language_code = sergey_code
         self.sergey.profile.save(update_fields=['language_code'])
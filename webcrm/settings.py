@@ -177,6 +177,10 @@ STATIC_ROOT = BASE_DIR / 'static'
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Directory of the original emails cache.
+# It must not be served like MEDIA_ROOT since the emails are private.
+RAW_EMAIL_CACHE_DIR = BASE_DIR / 'raw_emails'
+
 FIXTURE_DIRS = ['tests/fixtures']
 
 MESSAGE_STORAGE = 'django.contrib.messages.storage.session.SessionStorage'
@@ -315,3 +319,4 @@ if TESTING:
     SECURE_SSL_REDIRECT = False
     LANGUAGE_CODE = 'en'
     LANGUAGES = [('en', ''), ('uk', '')]
+    RAW_EMAIL_CACHE_SIZE = 0